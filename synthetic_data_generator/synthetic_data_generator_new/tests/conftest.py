@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# El paquete se importa desde su carpeta contenedora (synthetic_data_generator/)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
@@ -0,0 +1,178 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from synthetic_data_generator_new.utils.data_validation import (
+    ConstraintEngine, RangeConstraint, InequalityConstraint, UniqueConstraint,
+    RegexConstraint, SumConstraint, parse_constraint, OVERSAMPLE_FACTOR, MAX_BATCH_MULTIPLIER
+)
+
+
+class RecordingSampler:
+    """sample_fn que devuelve lotes deterministas y apunta cuántas filas se pidieron"""
+
+    def __init__(self, make_batch):
+        self.make_batch = make_batch
+        self.requests = []
+
+    def __call__(self, n):
+        self.requests.append(n)
+        return self.make_batch(n, len(self.requests))
+
+
+# ==========================================
+# RESTRICCIONES
+# ==========================================
+
+def test_range_bounds_inclusive_exclusive_and_nulls():
+    df = pd.DataFrame({"precio": [-1.0, 0.0, 5.0, 10.0, 11.0, np.nan]})
+    assert RangeConstraint("precio", min=0, max=10).is_valid(df).tolist() == [False, True, True, True, False, True]
+    assert RangeConstraint("precio", min=0, max=10, inclusive=False).is_valid(df).tolist() == \
+        [False, False, True, False, False, True]
+
+
+def test_range_with_text_dates():
+    df = pd.DataFrame({"fecha": ["2023-12-31", "2024-01-01", "2024-06-30"]})
+    valid = RangeConstraint("fecha", min="2024-01-01").is_valid(df)
+    assert valid.tolist() == [False, True, True]
+
+
+def test_range_requires_a_bound():
+    with pytest.raises(ValueError):
+        RangeConstraint("precio")
+
+
+def test_inequality_strict_and_nulls():
+    df = pd.DataFrame({"inicio": ["2024-01-01", "2024-02-01", "2024-03-01", None],
+                       "fin": ["2024-01-05", "2024-02-01", "2024-02-01", "2024-01-01"]})
+    assert InequalityConstraint("inicio", "fin").is_valid(df).tolist() == [True, True, False, True]
+    assert InequalityConstraint("inicio", "fin", strict=True).is_valid(df).tolist() == [True, False, False, True]
+
+
+def test_unique_within_batch_and_against_accepted_rows():
+    constraint = UniqueConstraint("id")
+    first = pd.DataFrame({"id": [1, 2, 2, 3]})
+    assert constraint.is_valid(first).tolist() == [True, True, False, True]
+    constraint.accept(first.iloc[[0, 1, 3]])
+    assert constraint.is_valid(pd.DataFrame({"id": [3, 4]})).tolist() == [False, True]
+    constraint.reset()
+    assert constraint.is_valid(pd.DataFrame({"id": [3, 4]})).tolist() == [True, True]
+
+
+def test_unique_on_several_columns():
+    df = pd.DataFrame({"a": [1, 1, 1], "b": ["x", "y", "x"]})
+    assert UniqueConstraint(["a", "b"]).is_valid(df).tolist() == [True, True, False]
+
+
+def test_regex_full_match_and_nulls():
+    df = pd.DataFrame({"codigo": ["AB-123", "AB-12", "xAB-123", None]})
+    assert RegexConstraint("codigo", r"[A-Z]{2}-\d{3}").is_valid(df).tolist() == [True, False, False, True]
+
+
+def test_sum_repair_derives_total_column():
+    constraint = SumConstraint(["subtotal", "impuestos"], total="total")
+    df = pd.DataFrame({"subtotal": [10.1, 20.0, np.nan], "impuestos": [2.3, 4.2, 1.0], "total": [0.0, 0.0, 7.0]})
+    repaired = constraint.repair(df)
+    assert repaired["total"].tolist()[:2] == pytest.approx([12.4, 24.2])
+    assert repaired["total"].iloc[2] == 7.0    # Con una parte nula se deja como estaba
+    assert constraint.is_valid(repaired).all()
+    assert not constraint.is_valid(df).all()
+
+
+def test_sum_repair_derives_last_part_for_fixed_total():
+    constraint = SumConstraint(["a", "b", "c"], total=100)
+    df = pd.DataFrame({"a": [30, 50], "b": [20, 10], "c": [1, 1]})
+    repaired = constraint.repair(df)
+    assert repaired["c"].tolist() == [50, 40]
+    assert repaired["c"].dtype == df["c"].dtype
+    assert constraint.is_valid(repaired).all()
+
+
+def test_sum_derive_must_belong_to_constraint():
+    with pytest.raises(ValueError):
+        SumConstraint(["a", "b"], total="total", derive="otra")
+
+
+def test_parse_constraint_rejects_unknown_type_and_bad_params():
+    assert isinstance(parse_constraint({"type": "regex", "column": "c", "pattern": "x"}), RegexConstraint)
+    with pytest.raises(ValueError):
+        parse_constraint({"type": "between", "column": "c"})
+    with pytest.raises(ValueError):
+        parse_constraint({"type": "range", "columna": "c", "min": 0})
+
+
+# ==========================================
+# MOTOR
+# ==========================================
+
+def test_batch_sizing_scales_pending_rows_by_acceptance():
+    # Filas alternas válidas: la aceptación observada tras la primera ronda es 0.5
+    sampler = RecordingSampler(lambda n, _: pd.DataFrame({"x": np.where(np.arange(n) % 2 == 0, 1.0, -1.0)}))
+    engine = ConstraintEngine([RangeConstraint("x", min=0)])
+    data, report = engine.generate(sampler, 100)
+
+    assert sampler.requests == [100, math.ceil(50 * OVERSAMPLE_FACTOR / 0.5)]
+    assert len(data) == 100 and (data["x"] >= 0).all()
+    assert report["completed"] and report["resample_rounds"] == 1
+    second = sampler.requests[1]
+    assert report["rows_sampled"] == 100 + second
+    assert report["rows_rejected"] == 50 + second // 2
+    assert report["failures_by_constraint"] == {"range(x)": 50 + second // 2}
+
+
+def test_batch_size_is_capped_when_nothing_is_accepted():
+    sampler = RecordingSampler(lambda n, _: pd.DataFrame({"x": np.full(n, -1.0)}))
+    engine = ConstraintEngine([RangeConstraint("x", min=0)], max_rounds=1)
+    data, report = engine.generate(sampler, 100)
+
+    assert sampler.requests == [100, 100 * MAX_BATCH_MULTIPLIER]
+    assert data.empty
+    assert not report["completed"] and report["rejection_rate"] == 1.0
+
+
+def test_uniqueness_holds_across_resample_rounds():
+    rng = np.random.default_rng(0)
+    sampler = RecordingSampler(lambda n, _: pd.DataFrame({"id": rng.integers(0, 400, n)}))
+    engine = ConstraintEngine([UniqueConstraint("id")])
+    data, report = engine.generate(sampler, 300)
+
+    assert report["completed"] and report["resample_rounds"] >= 1
+    assert len(data) == 300 and data["id"].is_unique
+
+
+def test_sum_constraint_needs_no_resampling():
+    rng = np.random.default_rng(1)
+    sampler = RecordingSampler(lambda n, _: pd.DataFrame({
+        "subtotal": rng.uniform(0, 100, n), "impuestos": rng.uniform(0, 20, n), "total": rng.uniform(0, 120, n)
+    }))
+    engine = ConstraintEngine.from_specs([{"type": "sum", "columns": ["subtotal", "impuestos"], "total": "total"}])
+    data, report = engine.generate(sampler, 500)
+
+    assert report["completed"] and report["rows_rejected"] == 0 and sampler.requests == [500]
+    assert np.allclose(data["subtotal"] + data["impuestos"], data["total"])
+
+
+def test_derived_sum_column_is_still_checked_by_other_constraints():
+    sampler = RecordingSampler(lambda n, _: pd.DataFrame({"a": np.resize([40.0, 120.0], n), "b": np.zeros(n)}))
+    engine = ConstraintEngine([SumConstraint(["a", "b"], total=100), RangeConstraint("b", min=0)])
+    data, report = engine.generate(sampler, 10)
+
+    assert report["completed"]
+    assert (data["b"] == 60.0).all()
+
+
+def test_unknown_columns_fail_fast():
+    engine = ConstraintEngine([RangeConstraint("precio", min=0)])
+    with pytest.raises(ValueError):
+        engine.generate(lambda n: pd.DataFrame({"otra": np.ones(n)}), 10)
+
+
+def test_validate_reports_without_previous_state():
+    engine = ConstraintEngine([UniqueConstraint("id"), RangeConstraint("x", max=5)])
+    df = pd.DataFrame({"id": [1, 1, 2], "x": [1, 2, 9]})
+    engine.generate(lambda n: df.head(n), 2)
+    report = engine.validate(df)
+    assert report == {"rows": 3, "valid_rows": 1, "invalid_rows": 2,
+                      "failures_by_constraint": {"unique(id)": 1, "range(x)": 1}}
@@ -0,0 +1,441 @@
+# utils/data_validation.py
+"""
+Motor de Restricciones Vectorizado
+==================================
+
+Valida reglas de negocio sobre lotes completos de datos sintéticos y vuelve a
+muestrear SOLO las filas que las incumplen:
+
+- range:      valores dentro de [min, max] (precios >= 0, edades 18-99...)
+- inequality: una columna menor que otra (fecha_inicio <= fecha_fin)
+- unique:     claves sin duplicados, también entre rondas de remuestreo
+- regex:      valores con un formato concreto (códigos, matrículas...)
+- sum:        columnas que suman un total (subtotal + impuestos == total); una de
+              ellas se calcula a partir de las demás, así que no se rechaza nada
+
+Cada restricción se evalúa como una operación de columna sobre todo el lote
+(máscaras booleanas de numpy/pandas), nunca fila a fila. El motor pide al
+generador tantas filas nuevas como faltan, escaladas por la tasa de aceptación
+observada, hasta alcanzar el número objetivo o agotar las rondas.
+
+Uso:
+    engine = ConstraintEngine.from_specs([
+        {"type": "range", "column": "precio", "min": 0},
+        {"type": "inequality", "low": "fecha_inicio", "high": "fecha_fin"},
+        {"type": "unique", "columns": ["pedido_id"]},
+    ])
+    data, report = engine.generate(lambda n: synthesizer.sample(num_rows=n), 10000)
+"""
+
+import re
+import math
+import logging
+from typing import Dict, Any, Optional, List, Callable, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# CONFIGURACIÓN DEL REMUESTREO
+# ==========================================
+MAX_RESAMPLE_ROUNDS = 20         # Rondas de remuestreo antes de rendirse
+OVERSAMPLE_FACTOR = 1.1          # Margen sobre las filas que se espera aceptar
+MIN_ACCEPTANCE_RATE = 0.01       # Suelo para no pedir lotes desproporcionados
+MAX_BATCH_MULTIPLIER = 50        # Un lote nunca supera este múltiplo de las filas pendientes
+
+
+def _comparable(series: pd.Series) -> pd.Series:
+    """Serie comparable con <, >: numérica o fecha; el texto se convierte si se puede"""
+    if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    numeric = pd.to_numeric(series, errors="coerce")
+    if numeric.notna().sum() >= series.notna().sum():
+        return numeric
+    return pd.to_datetime(series, errors="coerce")
+
+
+def _bound_like(bound: Any, series: pd.Series) -> Any:
+    """Convertir un límite al tipo de la serie (fechas como texto -> Timestamp)"""
+    if bound is None:
+        return None
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return pd.Timestamp(bound)
+    return bound
+
+
+# ==========================================
+# RESTRICCIONES
+# ==========================================
+
+class Constraint:
+    """
+    Regla que se evalúa sobre un lote entero.
+
+    ``is_valid(df)`` devuelve una máscara booleana (True = la fila cumple).
+    Los nulos cumplen siempre: los valores ausentes no son una violación de la regla.
+    """
+
+    kind = "constraint"
+
+    def __init__(self, name: Optional[str] = None):
+        self.name = name or self.default_name()
+
+    def default_name(self) -> str:
+        return self.kind
+
+    @property
+    def columns(self) -> List[str]:
+        return []
+
+    def is_valid(self, df: pd.DataFrame) -> np.ndarray:
+        raise NotImplementedError
+
+    def repair(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Ajustar el lote antes de evaluarlo (solo las reglas que se cumplen por construcción)"""
+        return df
+
+    def accept(self, df: pd.DataFrame) -> None:
+        """Registrar las filas aceptadas (solo las restricciones con estado lo usan)"""
+
+    def reset(self) -> None:
+        """Olvidar el estado acumulado antes de una nueva generación"""
+
+
+class RangeConstraint(Constraint):
+    """Valores de ``column`` entre ``min`` y ``max`` (cualquiera de los dos puede omitirse)"""
+
+    kind = "range"
+
+    def __init__(self, column: str, min: Any = None, max: Any = None,
+                 inclusive: bool = True, name: Optional[str] = None):
+        if min is None and max is None:
+            raise ValueError(f"La restricción range de '{column}' necesita min o max")
+        self.column = column
+        self.min = min
+        self.max = max
+        self.inclusive = inclusive
+        super().__init__(name)
+
+    def default_name(self) -> str:
+        return f"range({self.column})"
+
+    @property
+    def columns(self) -> List[str]:
+        return [self.column]
+
+    def is_valid(self, df: pd.DataFrame) -> np.ndarray:
+        values = _comparable(df[self.column])
+        valid = np.ones(len(df), dtype=bool)
+        low, high = _bound_like(self.min, values), _bound_like(self.max, values)
+        if low is not None:
+            valid &= (values >= low if self.inclusive else values > low).to_numpy()
+        if high is not None:
+            valid &= (values <= high if self.inclusive else values < high).to_numpy()
+        return valid | values.isna().to_numpy()
+
+
+class InequalityConstraint(Constraint):
+    """``low`` <= ``high`` fila a fila (``strict`` exige <)"""
+
+    kind = "inequality"
+
+    def __init__(self, low: str, high: str, strict: bool = False, name: Optional[str] = None):
+        self.low = low
+        self.high = high
+        self.strict = strict
+        super().__init__(name)
+
+    def default_name(self) -> str:
+        return f"inequality({self.low} {'<' if self.strict else '<='} {self.high})"
+
+    @property
+    def columns(self) -> List[str]:
+        return [self.low, self.high]
+
+    def is_valid(self, df: pd.DataFrame) -> np.ndarray:
+        low, high = _comparable(df[self.low]), _comparable(df[self.high])
+        valid = (low < high) if self.strict else (low <= high)
+        return (valid | low.isna() | high.isna()).to_numpy()
+
+
+class UniqueConstraint(Constraint):
+    """
+    Combinación de ``columns`` sin repetir, dentro del lote y respecto a lo ya aceptado.
+
+    Las claves aceptadas se guardan en un índice de pandas para comprobar lotes
+    nuevos con ``isin`` en una sola operación.
+    """
+
+    kind = "unique"
+
+    def __init__(self, columns: Union[str, List[str]], name: Optional[str] = None):
+        self.key_columns = [columns] if isinstance(columns, str) else list(columns)
+        self._seen: Optional[pd.Index] = None
+        super().__init__(name)
+
+    def default_name(self) -> str:
+        return f"unique({', '.join(self.key_columns)})"
+
+    @property
+    def columns(self) -> List[str]:
+        return self.key_columns
+
+    def _keys(self, df: pd.DataFrame) -> pd.Index:
+        if len(self.key_columns) == 1:
+            return pd.Index(df[self.key_columns[0]])
+        return pd.MultiIndex.from_frame(df[self.key_columns])
+
+    def is_valid(self, df: pd.DataFrame) -> np.ndarray:
+        keys = self._keys(df)
+        valid = ~keys.duplicated(keep="first")
+        if self._seen is not None and len(self._seen):
+            valid &= ~keys.isin(self._seen)
+        return np.asarray(valid)
+
+    def accept(self, df: pd.DataFrame) -> None:
+        keys = self._keys(df)
+        self._seen = keys if self._seen is None else self._seen.append(keys)
+
+    def reset(self) -> None:
+        self._seen = None
+
+
+class RegexConstraint(Constraint):
+    """Valores de ``column`` que encajan completos con ``pattern``"""
+
+    kind = "regex"
+
+    def __init__(self, column: str, pattern: str, name: Optional[str] = None):
+        self.column = column
+        self.pattern = pattern
+        self._compiled = re.compile(pattern)
+        super().__init__(name)
+
+    def default_name(self) -> str:
+        return f"regex({self.column})"
+
+    @property
+    def columns(self) -> List[str]:
+        return [self.column]
+
+    def is_valid(self, df: pd.DataFrame) -> np.ndarray:
+        values = df[self.column]
+        matches = values.astype("string").str.fullmatch(self._compiled)
+        return matches.fillna(True).to_numpy(dtype=bool)
+
+
+class SumConstraint(Constraint):
+    """
+    La suma de ``columns`` es igual a ``total`` dentro de ``tolerance``.
+
+    ``total`` puede ser el nombre de otra columna o un número fijo. Un modelo continuo
+    casi nunca acierta una igualdad, así que no se rechazan filas: ``repair`` calcula la
+    columna ``derive`` a partir de las demás. Por defecto se calcula el total si es una
+    columna y, si es un número fijo, la última columna de ``columns``.
+    """
+
+    kind = "sum"
+
+    def __init__(self, columns: List[str], total: Union[str, float],
+                 tolerance: float = 1e-6, derive: Optional[str] = None, name: Optional[str] = None):
+        if not columns:
+            raise ValueError("La restricción sum necesita al menos una columna")
+        self.sum_columns = list(columns)
+        self.total = total
+        self.tolerance = tolerance
+        self.derive = derive or (total if isinstance(total, str) else self.sum_columns[-1])
+        if self.derive not in self.sum_columns and self.derive != total:
+            raise ValueError(f"La columna a calcular '{self.derive}' no forma parte de la restricción sum")
+        super().__init__(name)
+
+    def default_name(self) -> str:
+        return f"sum({' + '.join(self.sum_columns)} = {self.total})"
+
+    @property
+    def columns(self) -> List[str]:
+        return self.sum_columns + ([self.total] if isinstance(self.total, str) else [])
+
+    def is_valid(self, df: pd.DataFrame) -> np.ndarray:
+        parts = df[self.sum_columns].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+        if isinstance(self.total, str):
+            total = pd.to_numeric(df[self.total], errors="coerce").to_numpy(dtype=float)
+        else:
+            total = np.full(len(df), float(self.total))
+        missing = np.isnan(parts).any(axis=1) | np.isnan(total)
+        valid = np.abs(parts.sum(axis=1) - total) <= self.tolerance
+        return valid | missing
+
+    def repair(self, df: pd.DataFrame) -> pd.DataFrame:
+        inputs = [col for col in self.columns if col != self.derive]
+        values = df[inputs].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+        parts = values[:, [inputs.index(col) for col in self.sum_columns if col != self.derive]]
+        if self.derive == self.total:
+            derived = parts.sum(axis=1)
+        else:
+            total = values[:, inputs.index(self.total)] if isinstance(self.total, str) else float(self.total)
+            derived = total - parts.sum(axis=1)
+
+        # Las filas con alguna entrada nula conservan su valor (los nulos cumplen siempre)
+        current = pd.to_numeric(df[self.derive], errors="coerce").to_numpy(dtype=float)
+        derived = np.where(np.isnan(values).any(axis=1), current, derived)
+        dtype = df[self.derive].dtype
+        if pd.api.types.is_integer_dtype(dtype) and not np.isnan(derived).any() \
+                and np.array_equal(derived, np.round(derived)):
+            return df.assign(**{self.derive: derived.astype(dtype)})
+        return df.assign(**{self.derive: derived})
+
+
+CONSTRAINT_TYPES = {
+    "range": RangeConstraint,
+    "inequality": InequalityConstraint,
+    "unique": UniqueConstraint,
+    "regex": RegexConstraint,
+    "sum": SumConstraint,
+}
+
+
+def parse_constraint(spec: Dict[str, Any]) -> Constraint:
+    """Crear una restricción desde un dict {"type": ..., parámetros del constructor}"""
+    params = dict(spec)
+    kind = params.pop("type", None)
+    if kind not in CONSTRAINT_TYPES:
+        raise ValueError(f"Tipo de restricción desconocido: {kind!r} "
+                         f"(disponibles: {', '.join(CONSTRAINT_TYPES)})")
+    try:
+        return CONSTRAINT_TYPES[kind](**params)
+    except TypeError as e:
+        raise ValueError(f"Parámetros inválidos para la restricción {kind}: {e}")
+
+
+# ==========================================
+# MOTOR
+# ==========================================
+
+class ConstraintEngine:
+    """
+    Evalúa un conjunto de restricciones por lotes y remuestrea las filas que fallan.
+
+    El generador es cualquier callable ``sample_fn(n) -> DataFrame``; el motor no
+    sabe si detrás hay SDV, un LLM o un muestreador propio.
+    """
+
+    def __init__(self,
+                 constraints: List[Constraint],
+                 max_rounds: int = MAX_RESAMPLE_ROUNDS,
+                 oversample: float = OVERSAMPLE_FACTOR):
+        self.constraints = list(constraints)
+        self.max_rounds = max_rounds
+        self.oversample = oversample
+
+    @classmethod
+    def from_specs(cls, specs: List[Dict[str, Any]], **kwargs) -> "ConstraintEngine":
+        return cls([parse_constraint(spec) for spec in specs], **kwargs)
+
+    def check_columns(self, columns: List[str]) -> None:
+        """Fallar pronto si una restricción nombra columnas que el generador no produce"""
+        missing = sorted({col for c in self.constraints for col in c.columns} - set(columns))
+        if missing:
+            raise ValueError(f"Columnas de las restricciones que no existen en los datos: {missing}")
+
+    def evaluate(self, df: pd.DataFrame) -> Tuple[np.ndarray, Dict[str, int]]:
+        """Máscara de filas válidas del lote y número de fallos por restricción"""
+        valid = np.ones(len(df), dtype=bool)
+        failures = {}
+        for constraint in self.constraints:
+            ok = constraint.is_valid(df)
+            failures[constraint.name] = int((~ok).sum())
+            valid &= ok
+        return valid, failures
+
+    def repair(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Aplicar las reglas que se cumplen por construcción (columnas calculadas de sum)"""
+        for constraint in self.constraints:
+            df = constraint.repair(df)
+        return df
+
+    def validate(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """Informe de cumplimiento de un DataFrame ya generado (sin estado previo)"""
+        for constraint in self.constraints:
+            constraint.reset()
+        valid, failures = self.evaluate(df)
+        return {
+            "rows": len(df),
+            "valid_rows": int(valid.sum()),
+            "invalid_rows": int((~valid).sum()),
+            "failures_by_constraint": failures
+        }
+
+    def _accept(self, batch: pd.DataFrame, valid: np.ndarray, limit: int) -> pd.DataFrame:
+        accepted = batch[valid].head(limit)
+        for constraint in self.constraints:
+            constraint.accept(accepted)
+        return accepted
+
+    def generate(self,
+                 sample_fn: Callable[[int], pd.DataFrame],
+                 num_rows: int) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        """
+        Generar ``num_rows`` filas que cumplan todas las restricciones.
+
+        Cada ronda pide solo las filas que faltan, divididas por la tasa de aceptación
+        acumulada (con un margen ``oversample``). Si se agotan las rondas devuelve las
+        filas válidas conseguidas y el informe lo indica con ``completed=False``.
+        """
+        for constraint in self.constraints:
+            constraint.reset()
+
+        accepted: List[pd.DataFrame] = []
+        accepted_rows = 0
+        rows_sampled = 0
+        rows_rejected = 0
+        rounds = 0
+        failures: Dict[str, int] = {c.name: 0 for c in self.constraints}
+
+        while accepted_rows < num_rows and rounds <= self.max_rounds:
+            pending = num_rows - accepted_rows
+            acceptance = (accepted_rows / rows_sampled) if rows_sampled else 1.0
+            acceptance = max(acceptance, MIN_ACCEPTANCE_RATE)
+            request = pending if rounds == 0 else min(
+                math.ceil(pending * self.oversample / acceptance), pending * MAX_BATCH_MULTIPLIER)
+
+            batch = sample_fn(request).reset_index(drop=True)
+            if rounds == 0:
+                self.check_columns(list(batch.columns))
+            batch = self.repair(batch)
+
+            valid, batch_failures = self.evaluate(batch)
+            for name, count in batch_failures.items():
+                failures[name] += count
+
+            kept = self._accept(batch, valid, pending)
+            if len(kept):
+                accepted.append(kept)
+            accepted_rows += len(kept)
+            rows_sampled += len(batch)
+            rows_rejected += int((~valid).sum())
+            rounds += 1
+
+            if len(batch) and not valid.any():
+                logger.warning(f"⚠️ Ronda {rounds}: ninguna de {len(batch)} filas cumple las restricciones")
+
+        data = pd.concat(accepted, ignore_index=True) if accepted else pd.DataFrame()
+        report = {
+            "rows_requested": num_rows,
+            "rows_generated": accepted_rows,
+            "rows_sampled": rows_sampled,
+            "rows_rejected": rows_rejected,
+            "rejection_rate": round(rows_rejected / rows_sampled, 4) if rows_sampled else 0.0,
+            "resample_rounds": max(rounds - 1, 0),
+            "failures_by_constraint": failures,
+            "completed": accepted_rows >= num_rows
+        }
+
+        if report["completed"]:
+            logger.info(f"✅ {accepted_rows} filas válidas ({report['rejection_rate']:.1%} rechazadas, "
+                        f"{report['resample_rounds']} rondas de remuestreo)")
+        else:
+            logger.warning(f"⚠️ Solo {accepted_rows}/{num_rows} filas cumplen las restricciones "
+                           f"tras {report['resample_rounds']} rondas")
+        return data, report
@@ -0,0 +1,390 @@
+"""
+Column Roles - Columnas que no conviene pasar al modelo (IDs, PII, texto libre, alta cardinalidad)
+CTGAN/TVAE codifican cada categoría en one-hot: una columna de emails o de IDs multiplica
+memoria y tiempo de entrenamiento. Estas columnas se quitan del modelo (o se acota su
+vocabulario) y se regeneran después de muestrear con generadores vectorizados baratos
+"""
+
+import os
+import re
+import copy
+import secrets
+import logging
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# CONFIGURACIÓN DE LOS ROLES
+# ==========================================
+MAX_MODEL_CATEGORIES = int(os.getenv("MAX_MODEL_CATEGORIES", "100"))  # Categorías que ve el modelo
+TAIL_VOCABULARY_SIZE = 1000      # Valores de la cola que se guardan para regenerar las categorías acotadas
+TEXT_MIN_MEAN_LENGTH = 40        # Caracteres medios a partir de los que una columna es texto libre
+TEXT_MIN_MEAN_WORDS = 5
+TEXT_VOCABULARY_SIZE = 2000
+PATTERN_TEMPLATES = 200          # Valores de ejemplo cuyo formato se imita en PII
+PROFILE_SAMPLE_ROWS = 5000       # Filas sobre las que se aprenden vocabularios y plantillas
+NEAR_UNIQUE_RATIO = 0.9          # Texto casi único (nombres, direcciones...) se trata como PII
+MIN_ROWS_FOR_ROLES = 20
+
+OTHER_TOKEN = "__other__"        # Categoría que agrupa la cola en el modelo
+MODELLED_SDTYPES = ("numerical", "categorical", "boolean", "datetime")
+
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[A-Za-z]{2,}$")
+_UUID_RE = re.compile(r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$")
+_PREFIXED_NUMBER_RE = re.compile(r"^(\D*?)(\d+)(\D*)$")
+_ID_NAME_RE = re.compile(r"(^id$|_id$|^id_|_key$|^key$|uuid)", re.IGNORECASE)
+
+
+def _is_text(series: pd.Series) -> bool:
+    return (series.dtype == object or isinstance(series.dtype, pd.CategoricalDtype)
+            or pd.api.types.is_string_dtype(series)) and not pd.api.types.is_bool_dtype(series)
+
+
+def _frequencies(values: pd.Series, limit: int) -> Dict[str, List[Any]]:
+    counts = values.value_counts().head(limit)
+    return {"values": [str(value) for value in counts.index], "weights": (counts / counts.sum()).round(6).tolist()}
+
+
+# ==========================================
+# DETECCIÓN
+# ==========================================
+
+def _id_generator(series: pd.Series) -> Optional[Dict[str, Any]]:
+    """Secuencia con el formato observado: enteros, UUID o prefijo + número con ceros (None si no lo hay)"""
+    values = series.dropna()
+    if pd.api.types.is_integer_dtype(values):
+        ordered = np.sort(values.to_numpy())
+        steps = np.diff(ordered)
+        return {"kind": "integer_sequence", "start": int(ordered[0]),
+                "step": int(max(1, np.median(steps))) if len(steps) else 1}
+
+    strings = values.astype(str)
+    if strings.str.match(_UUID_RE).all():
+        return {"kind": "uuid"}
+    parts = strings.str.extract(_PREFIXED_NUMBER_RE)
+    if parts[1].notna().all() and parts[0].nunique() == 1 and parts[2].nunique() == 1:
+        return {"kind": "prefixed_sequence", "prefix": parts[0].iloc[0], "suffix": parts[2].iloc[0],
+                "width": int(parts[1].str.len().max()), "start": int(parts[1].astype(np.int64).min())}
+    return None
+
+
+def _pattern_generator(series: pd.Series) -> Dict[str, Any]:
+    """Plantillas de formato (se cambian letras y dígitos, se conservan separadores y dominios)"""
+    strings = series.dropna().astype(str)
+    ascii_values = strings[strings.map(str.isascii)]
+    templates = ascii_values.sample(min(PATTERN_TEMPLATES, len(ascii_values)), random_state=0).tolist()
+    is_email = bool(len(strings)) and strings.str.match(_EMAIL_RE).mean() > 0.9
+    return {"kind": "email" if is_email else "pattern", "templates": templates}
+
+
+def _text_generator(series: pd.Series) -> Dict[str, Any]:
+    """Vocabulario acotado de palabras y distribución observada de palabras por valor"""
+    words = series.dropna().astype(str).str.split()
+    vocabulary = _frequencies(words.explode().dropna(), TEXT_VOCABULARY_SIZE)
+    return {"kind": "text", **vocabulary, "word_counts": words.str.len().astype(int).tolist()}
+
+
+def detect_column_roles(df: pd.DataFrame, metadata_dict: Dict[str, Any],
+                        pii_from_vocabulary: bool = False) -> Dict[str, Dict[str, Any]]:
+    """
+    Clasificar las columnas que no deben llegar al modelo.
+
+    - id: claves (sdtype id / primary key, enteros únicos con nombre de ID, o texto único
+      con formato de UUID o prefijo + número) -> se quitan
+    - pii: sdtypes de PII de SDV, emails o texto casi único -> se quitan
+    - text: texto largo con varias palabras -> se quita
+    - high_cardinality: categóricas con más de MAX_MODEL_CATEGORIES valores -> vocabulario acotado
+
+    Con ``pii_from_vocabulary`` la PII que no es email se regenera recombinando las palabras
+    observadas (nombres, calles...) en lugar de imitar su formato con letras al azar: útil
+    cuando los datos fuente ya son sintéticos (p.ej. filas semilla de un LLM).
+
+    Returns:
+        Rol y generador por columna (serializable en JSON, se guarda en el perfil del archivo)
+    """
+    roles: Dict[str, Dict[str, Any]] = {}
+    columns_metadata = metadata_dict.get("columns", {})
+    primary_key = metadata_dict.get("primary_key")
+    sample = df.sample(min(PROFILE_SAMPLE_ROWS, len(df)), random_state=0) if len(df) else df
+
+    for col in df.columns:
+        series = df[col]
+        non_null = series.dropna()
+        if len(non_null) < MIN_ROWS_FOR_ROLES:
+            continue
+        sdtype = columns_metadata.get(col, {}).get("sdtype")
+        unique_ratio = non_null.nunique() / len(non_null)
+        null_fraction = round(float(series.isna().mean()), 6)
+
+        is_key = sdtype == "id" or col == primary_key or (
+            unique_ratio == 1.0 and pd.api.types.is_integer_dtype(series) and _ID_NAME_RE.search(str(col))
+        )
+        id_generator = _id_generator(series) if is_key or (_is_text(series) and unique_ratio == 1.0) else None
+
+        role = None
+        if is_key or id_generator is not None:
+            generator = id_generator or {"kind": "prefixed_sequence", "prefix": f"{col}_",
+                                         "suffix": "", "width": 0, "start": 0}
+            role = {"role": "id", "treatment": "dropped", "generator": generator}
+        elif _is_text(series):
+            text = sample[col].dropna().astype(str)
+            mean_length = text.str.len().mean()
+            mean_words = text.str.split().str.len().mean()
+            if mean_length >= TEXT_MIN_MEAN_LENGTH and mean_words >= TEXT_MIN_MEAN_WORDS:
+                role = {"role": "text", "treatment": "dropped", "generator": _text_generator(sample[col])}
+            elif (sdtype is not None and sdtype not in MODELLED_SDTYPES) or unique_ratio >= NEAR_UNIQUE_RATIO \
+                    or text.str.match(_EMAIL_RE).mean() > 0.9:
+                generator = _pattern_generator(sample[col])
+                if pii_from_vocabulary and generator["kind"] == "pattern":
+                    generator = _text_generator(sample[col])
+                role = {"role": "pii", "treatment": "dropped", "generator": generator}
+            elif non_null.nunique() > MAX_MODEL_CATEGORIES:
+                kept = non_null.astype(str).value_counts().index[: MAX_MODEL_CATEGORIES - 1].tolist()
+                tail = non_null.astype(str)
+                tail = tail[~tail.isin(kept)]
+                role = {"role": "high_cardinality", "treatment": "frequency_capped", "kept_values": kept,
+                        "generator": {"kind": "tail_vocabulary", **_frequencies(tail, TAIL_VOCABULARY_SIZE)}}
+        elif sdtype is not None and sdtype not in MODELLED_SDTYPES:
+            role = {"role": "pii", "treatment": "dropped", "generator": _pattern_generator(sample[col])}
+
+        if role is not None:
+            role["null_fraction"] = null_fraction
+            role["dtype"] = str(series.dtype)
+            roles[col] = role
+
+    if roles:
+        logger.info("🏷️ Columnas fuera del modelo: " + ", ".join(f"{col} ({role['role']})" for col, role in roles.items()))
+    return roles
+
+
+def _merge_frequencies(base: Dict[str, Any], delta: Dict[str, List[Any]], delta_share: float,
+                       limit: int) -> Dict[str, List[Any]]:
+    weights = {value: weight * (1 - delta_share) for value, weight in zip(base["values"], base["weights"])}
+    for value, weight in zip(delta["values"], delta["weights"]):
+        weights[value] = weights.get(value, 0.0) + weight * delta_share
+    ordered = sorted(weights.items(), key=lambda item: item[1], reverse=True)[:limit]
+    total = sum(weight for _, weight in ordered) or 1.0
+    return {"values": [value for value, _ in ordered], "weights": [round(weight / total, 6) for _, weight in ordered]}
+
+
+def _mix_samples(base: List[Any], delta: List[Any], delta_share: float, size: int) -> List[Any]:
+    """Muestra de ``size`` elementos con la proporción del delta (ambas listas ya son muestras al azar)"""
+    size = min(size, len(base) + len(delta))
+    from_delta = min(len(delta), round(size * delta_share))
+    from_base = min(len(base), size - from_delta)
+    return base[:from_base] + delta[:size - from_base]
+
+
+def update_column_roles(roles: Dict[str, Dict[str, Any]], delta: pd.DataFrame,
+                        prior_rows: int) -> Dict[str, Dict[str, Any]]:
+    """
+    Actualizar los vocabularios de los roles con filas añadidas al archivo fuente.
+
+    El rol y el tratamiento de cada columna no cambian (el modelo ya se entrenó sin esas
+    columnas o con esas categorías); se combinan con el delta la fracción de nulos, la cola
+    de las categorías acotadas, el vocabulario de texto y las plantillas de PII, ponderando
+    por filas. Las secuencias de IDs siguen la posición de la fila y se dejan igual.
+    """
+    if not roles or delta.empty:
+        return roles
+    delta_share = len(delta) / (prior_rows + len(delta))
+    sample = delta.sample(min(PROFILE_SAMPLE_ROWS, len(delta)), random_state=0)
+    updated = copy.deepcopy(roles)
+
+    for col, role in updated.items():
+        if col not in delta.columns:
+            continue
+        non_null = delta[col].dropna()
+        role["null_fraction"] = round(role["null_fraction"] * (1 - delta_share)
+                                      + float(delta[col].isna().mean()) * delta_share, 6)
+        if non_null.empty:
+            continue
+
+        generator = role["generator"]
+        if generator["kind"] == "tail_vocabulary":
+            tail = non_null.astype(str)
+            tail = tail[~tail.isin(role["kept_values"])]
+            if len(tail):
+                generator.update(_merge_frequencies(generator, _frequencies(tail, TAIL_VOCABULARY_SIZE),
+                                                    delta_share, TAIL_VOCABULARY_SIZE))
+        elif generator["kind"] == "text":
+            fresh = _text_generator(sample[col])
+            generator.update(_merge_frequencies(generator, fresh, delta_share, TEXT_VOCABULARY_SIZE))
+            generator["word_counts"] = _mix_samples(generator["word_counts"], fresh["word_counts"],
+                                                    delta_share, PROFILE_SAMPLE_ROWS)
+        elif generator["kind"] in ("email", "pattern"):
+            fresh = _pattern_generator(sample[col])
+            generator["templates"] = _mix_samples(generator["templates"], fresh["templates"],
+                                                  delta_share, PATTERN_TEMPLATES)
+    return updated
+
+
+# ==========================================
+# APLICACIÓN ANTES DE ENTRENAR
+# ==========================================
+
+def apply_column_roles(df: pd.DataFrame, roles: Dict[str, Dict[str, Any]]) -> pd.DataFrame:
+    """Quitar las columnas regeneradas y acotar el vocabulario de las de alta cardinalidad"""
+    if not roles:
+        return df
+    dropped = [col for col, role in roles.items() if role["treatment"] == "dropped" and col in df.columns]
+    df = df.drop(columns=dropped)
+    for col, role in roles.items():
+        if role["treatment"] == "frequency_capped" and col in df.columns:
+            values = df[col].astype(object)
+            capped = values.where(values.isna() | values.astype(str).isin(role["kept_values"]), OTHER_TOKEN)
+            df = df.assign(**{col: capped})
+    return df
+
+
+def model_metadata(metadata_dict: Dict[str, Any], roles: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Metadatos SDV de las columnas que ve el modelo (sin las quitadas; las acotadas, categóricas)"""
+    if not roles:
+        return metadata_dict
+    metadata_dict = copy.deepcopy(metadata_dict)
+    for col, role in roles.items():
+        if role["treatment"] == "dropped":
+            metadata_dict["columns"].pop(col, None)
+        elif col in metadata_dict["columns"]:
+            metadata_dict["columns"][col] = {"sdtype": "categorical"}
+    if metadata_dict.get("primary_key") in roles:
+        metadata_dict.pop("primary_key")
+    if "alternate_keys" in metadata_dict:
+        metadata_dict["alternate_keys"] = [key for key in metadata_dict["alternate_keys"] if key not in roles]
+    return metadata_dict
+
+
+def summarize_roles(roles: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Tratamiento de cada columna para el resultado de la herramienta (sin vocabularios)"""
+    return {
+        col: {
+            "role": role["role"],
+            "treatment": role["treatment"],
+            "generator": role["generator"]["kind"],
+            **({"kept_categories": len(role["kept_values"])} if "kept_values" in role else {})
+        }
+        for col, role in roles.items()
+    }
+
+
+# ==========================================
+# REGENERACIÓN TRAS MUESTREAR
+# ==========================================
+
+def _random_ascii_like(templates: List[str], num_rows: int, rng: np.random.Generator,
+                       keep_after: Optional[str] = None) -> np.ndarray:
+    """Copiar plantillas cambiando cada dígito/letra por otro al azar (vectorizado por plantilla)"""
+    values = np.empty(num_rows, dtype=object)
+    choice = rng.integers(0, len(templates), num_rows)
+    for index in np.unique(choice):
+        rows = np.flatnonzero(choice == index)
+        template = np.frombuffer(templates[index].encode("ascii"), dtype=np.uint8)
+        block = np.tile(template, (len(rows), 1))
+
+        mutable = np.ones(len(template), dtype=bool)
+        if keep_after and keep_after.encode() in template.tobytes():
+            mutable[template.tobytes().index(keep_after.encode()):] = False
+        digits = mutable & (template >= 48) & (template <= 57)
+        lower = mutable & (template >= 97) & (template <= 122)
+        upper = mutable & (template >= 65) & (template <= 90)
+        for mask, low, high in ((digits, 48, 58), (lower, 97, 123), (upper, 65, 91)):
+            if mask.any():
+                block[:, mask] = rng.integers(low, high, (len(rows), int(mask.sum())), dtype=np.uint8)
+
+        values[rows] = block.view(f"S{len(template)}").ravel().astype(str)
+    return values
+
+
+def generate_column(role: Dict[str, Any], column: str, num_rows: int, start_row: int,
+                    rng: np.random.Generator) -> np.ndarray:
+    """Valores nuevos para una columna quitada del modelo"""
+    generator = role["generator"]
+    kind = generator["kind"]
+    sequence = np.arange(start_row, start_row + num_rows)
+
+    if kind == "integer_sequence":
+        values = generator["start"] + generator["step"] * sequence
+    elif kind == "prefixed_sequence":
+        numbers = (generator["start"] + sequence).astype(str)
+        if generator["width"]:
+            numbers = np.char.zfill(numbers, generator["width"])
+        values = np.char.add(np.char.add(generator["prefix"], numbers), generator["suffix"]).astype(object)
+    elif kind == "uuid":
+        hexes = rng.integers(0, 16, (num_rows, 32), dtype=np.uint8)
+        chars = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)[hexes]
+        dashed = np.insert(chars, [8, 12, 16, 20], ord("-"), axis=1)
+        values = np.ascontiguousarray(dashed).view("S36").ravel().astype(str).astype(object)
+    elif kind in ("email", "pattern"):
+        if not generator["templates"]:
+            values = np.char.add(f"{column}_", sequence.astype(str)).astype(object)
+        else:
+            values = _random_ascii_like(generator["templates"], num_rows, rng,
+                                        keep_after="@" if kind == "email" else None)
+    elif kind == "text":
+        if not generator["values"]:
+            values = np.full(num_rows, "", dtype=object)
+        else:
+            counts = rng.choice(np.maximum(np.asarray(generator["word_counts"]), 1), num_rows)
+            words = rng.choice(np.asarray(generator["values"], dtype=object), counts.sum(),
+                               p=np.asarray(generator["weights"]) / np.sum(generator["weights"]))
+            values = np.array([" ".join(chunk) for chunk in np.split(words, np.cumsum(counts)[:-1])], dtype=object)
+    else:
+        raise ValueError(f"Generador de columna desconocido: {kind}")
+
+    if role["null_fraction"] > 0:
+        values = values.astype(object)
+        values[rng.random(num_rows) < role["null_fraction"]] = None
+    return values
+
+
+class ColumnRegenerator:
+    """
+    Transformación por lote que devuelve las columnas quitadas del modelo.
+
+    Aplica ``before`` (p.ej. restore_dtypes), sustituye la categoría OTHER_TOKEN de las
+    columnas acotadas por valores de su cola, genera las columnas quitadas y deja las
+    columnas en el orden original. Lleva la cuenta de filas para que las secuencias de
+    IDs no se repitan entre lotes; en muestreo paralelo, ``for_shard`` da a cada shard
+    su primera fila y su semilla. Sin ``seed`` se usa una semilla nueva al azar (queda en
+    ``self.seed`` para poder repetir la ejecución): dos generaciones independientes no
+    comparten claves ni PII.
+    """
+
+    def __init__(self, roles: Dict[str, Dict[str, Any]], columns: List[str],
+                 seed: Optional[int] = None, before=None, start_row: int = 0):
+        self.roles = roles
+        self.columns = columns
+        self.seed = secrets.randbits(32) if seed is None else seed
+        self.before = before
+        self._next_row = start_row
+        self._rng = np.random.default_rng(self.seed)
+
+    def for_shard(self, start_row: int, seed: int) -> "ColumnRegenerator":
+        return ColumnRegenerator(self.roles, self.columns, seed=seed, before=self.before, start_row=start_row)
+
+    def __call__(self, batch: pd.DataFrame) -> pd.DataFrame:
+        if self.before is not None:
+            batch = self.before(batch)
+        num_rows = len(batch)
+        generated = {}
+        for col, role in self.roles.items():
+            if role["treatment"] == "frequency_capped" and col in batch.columns:
+                values = batch[col].to_numpy(dtype=object, copy=True)
+                others = values == OTHER_TOKEN
+                generator = role["generator"]
+                if others.any() and generator["values"]:
+                    values[others] = self._rng.choice(
+                        np.asarray(generator["values"], dtype=object), int(others.sum()),
+                        p=np.asarray(generator["weights"]) / np.sum(generator["weights"])
+                    )
+                generated[col] = values
+            elif role["treatment"] == "dropped":
+                generated[col] = generate_column(role, col, num_rows, self._next_row, self._rng)
+        self._next_row += num_rows
+
+        batch = batch.assign(**{col: values for col, values in generated.items()})
+        return batch[[col for col in self.columns if col in batch.columns]]
@@ -0,0 +1,315 @@
+"""
+Conditional Sampling - Filas que cumplen condiciones fijas (p.ej. country=ES, segment=premium)
+Tres estrategias según el modelo y si las condiciones están en el índice:
+- native: FastCopula muestrea directamente de la cópula condicionada, sin rechazo
+- submodel: en los modelos SDV, las condiciones indexadas se muestrean con una FastCopula
+  cacheada, ajustada solo con las filas fuente que cumplen las condiciones
+- rejection: solo para condiciones fuera del índice (columnas numéricas o de fecha, valores
+  de la cola no indexada); el modelo muestrea por lotes y una máscara vectorizada se queda
+  con las filas que cumplen, aprendiendo la tasa de aceptación sobre la marcha
+"""
+
+import json
+import math
+import logging
+from typing import Dict, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from column_roles import OTHER_TOKEN, MODELLED_SDTYPES
+from fast_copula import FastCopulaSynthesizer
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# CONFIGURACIÓN DEL MUESTREO CONDICIONADO
+# ==========================================
+INDEXED_SDTYPES = ("categorical", "boolean")   # Columnas con frecuencias precalculadas por valor
+CONDITION_INDEX_MAX_VALUES = 1000              # Valores por columna que se guardan en el índice
+REJECTION_OVERSAMPLE = 1.2                     # Margen sobre las filas que se espera aceptar
+MAX_REJECTION_BATCH = 500_000                  # Filas por llamada al modelo durante el rechazo
+MAX_ROUNDS_WITHOUT_MATCH = 4                   # Rondas seguidas sin ninguna fila válida antes de rendirse
+MIN_SUBMODEL_ROWS = 2
+
+
+def parse_conditions(text: Optional[str]) -> Dict[str, Any]:
+    """
+    Condiciones escritas por el agente: JSON ('{"country": "ES"}') o 'country=ES, segment=premium'.
+    """
+    if not text or not text.strip():
+        return {}
+    text = text.strip()
+    if text.startswith("{"):
+        try:
+            conditions = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Condiciones JSON inválidas: {e}")
+        if not isinstance(conditions, dict):
+            raise ValueError("Las condiciones JSON deben ser un objeto {columna: valor}")
+        return conditions
+
+    conditions = {}
+    for part in text.replace(";", ",").split(","):
+        if not part.strip():
+            continue
+        if "=" not in part:
+            raise ValueError(f"Condición sin '=': {part.strip()!r} (formato: columna=valor)")
+        column, value = part.split("=", 1)
+        conditions[column.strip()] = value.strip()
+    return conditions
+
+
+# ==========================================
+# ÍNDICE DE CONDICIONES
+# ==========================================
+
+def build_condition_index(df: pd.DataFrame, metadata_dict: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Frecuencia de cada valor de las columnas categóricas y booleanas del modelo.
+
+    ``df`` debe tener ya aplicados los roles de columna (la cola acotada aparece como
+    OTHER_TOKEN). Se guarda en el perfil del archivo fuente, así que se calcula una
+    sola vez por contenido y sirve aunque el modelo salga de la caché.
+    """
+    index = {}
+    for col, spec in metadata_dict["columns"].items():
+        if spec.get("sdtype") not in INDEXED_SDTYPES or col not in df.columns:
+            continue
+        frequencies = df[col].astype(object).value_counts(normalize=True, dropna=True)
+        index[col] = {
+            "frequencies": {str(value): float(share) for value, share in
+                            frequencies.head(CONDITION_INDEX_MAX_VALUES).items()},
+            "complete": len(frequencies) <= CONDITION_INDEX_MAX_VALUES
+        }
+    return index
+
+
+def merge_condition_index(index: Dict[str, Dict[str, Any]], delta_index: Dict[str, Dict[str, Any]],
+                          delta_share: float) -> Dict[str, Dict[str, Any]]:
+    """
+    Índice del archivo ampliado a partir del índice anterior y el de las filas añadidas.
+
+    ``delta_share`` es la fracción de filas del archivo nuevo que aporta el delta: las
+    frecuencias se promedian con ese peso y aparecen los valores que solo están en el delta.
+    """
+    merged = {}
+    for col, entry in index.items():
+        delta_entry = delta_index.get(col)
+        if delta_entry is None:
+            merged[col] = entry
+            continue
+        frequencies = {value: share * (1 - delta_share) for value, share in entry["frequencies"].items()}
+        for value, share in delta_entry["frequencies"].items():
+            frequencies[value] = frequencies.get(value, 0.0) + share * delta_share
+        ordered = sorted(frequencies.items(), key=lambda item: item[1], reverse=True)
+        merged[col] = {
+            "frequencies": dict(ordered[:CONDITION_INDEX_MAX_VALUES]),
+            "complete": entry["complete"] and delta_entry["complete"] and len(ordered) <= CONDITION_INDEX_MAX_VALUES
+        }
+    return merged
+
+
+def validate_conditions(conditions: Dict[str, Any],
+                        metadata_dict: Dict[str, Any],
+                        column_roles: Dict[str, Dict[str, Any]],
+                        condition_index: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Comprobar que cada condición es sobre una columna modelada y con un valor posible.
+
+    Los valores de columnas indexadas se normalizan a su forma en los datos ('es' -> 'ES').
+    Lanza ValueError con un mensaje para el usuario si alguna condición no se puede cumplir.
+    """
+    if not conditions:
+        raise ValueError("No se indicó ninguna condición")
+
+    columns = metadata_dict["columns"]
+    canonical = {}
+    for col, value in conditions.items():
+        role = column_roles.get(col, {})
+        if role.get("treatment") == "dropped":
+            raise ValueError(f"La columna '{col}' ({role['role']}) se regenera fuera del modelo: no se puede condicionar")
+        if col not in columns:
+            raise ValueError(f"La columna '{col}' no existe en los datos analizados")
+        if columns[col].get("sdtype") not in MODELLED_SDTYPES:
+            raise ValueError(f"La columna '{col}' no está modelada: no se puede condicionar")
+
+        entry = condition_index.get(col)
+        if entry is None:
+            canonical[col] = value
+            continue
+        frequencies = entry["frequencies"]
+        key = str(value)
+        if key not in frequencies:
+            matches = [known for known in frequencies if known.lower() == key.strip().lower()]
+            if matches:
+                key = matches[0]
+            elif entry["complete"] or role.get("treatment") == "frequency_capped":
+                examples = ", ".join(list(frequencies)[:10])
+                raise ValueError(f"El valor {value!r} no aparece en el modelo de '{col}'. Valores posibles: {examples}")
+        if key == OTHER_TOKEN:
+            raise ValueError(f"'{col}' agrupa sus valores poco frecuentes: condiciona con uno de los valores principales")
+        canonical[col] = key if key in frequencies else value
+    return canonical
+
+
+def estimate_acceptance(conditions: Dict[str, Any],
+                        condition_index: Dict[str, Dict[str, Any]]) -> Optional[float]:
+    """
+    Fracción esperada de filas que cumplen todas las condiciones (producto de frecuencias).
+    None si alguna columna no está indexada: entonces el rechazo aprende la tasa sobre la marcha.
+    """
+    acceptance = 1.0
+    for col, value in conditions.items():
+        entry = condition_index.get(col)
+        if entry is None or str(value) not in entry["frequencies"]:
+            return None
+        acceptance *= entry["frequencies"][str(value)]
+    return acceptance
+
+
+def choose_strategy(model_type: str, acceptance: Optional[float]) -> str:
+    """
+    Estrategia de muestreo: ``acceptance`` es None cuando alguna condición no está indexada,
+    y solo entonces se recurre al rechazo sobre el modelo SDV.
+    """
+    if model_type == "FastCopula":
+        return "native"
+    if acceptance is not None:
+        return "submodel"
+    return "rejection"
+
+
+def condition_mask(df: pd.DataFrame, conditions: Dict[str, Any]) -> np.ndarray:
+    """Filas de ``df`` que cumplen todas las condiciones, comparando según el tipo de cada columna"""
+    mask = np.ones(len(df), dtype=bool)
+    for col, value in conditions.items():
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes = np.flatnonzero(series.cat.categories.astype(str) == str(value))
+            mask &= np.isin(series.cat.codes.to_numpy(), codes)
+        elif pd.api.types.is_bool_dtype(series):
+            target = value if isinstance(value, bool) else str(value).strip().lower() == "true"
+            mask &= series.to_numpy() == target
+        elif pd.api.types.is_datetime64_any_dtype(series):
+            mask &= (series == pd.Timestamp(value)).to_numpy()
+        elif pd.api.types.is_numeric_dtype(series):
+            mask &= np.isclose(series.to_numpy(dtype=np.float64, na_value=np.nan), float(value))
+        else:
+            mask &= (series.astype("string") == str(value)).fillna(False).to_numpy(dtype=bool)
+    return mask
+
+
+def fit_condition_submodel(fit_df: pd.DataFrame, metadata, conditions: Dict[str, Any]) -> FastCopulaSynthesizer:
+    """FastCopula ajustada solo con las filas de entrenamiento que cumplen las condiciones"""
+    matching = fit_df[condition_mask(fit_df, conditions)]
+    if len(matching) < MIN_SUBMODEL_ROWS:
+        raise ValueError(f"Solo {len(matching)} filas fuente cumplen {conditions}: no hay datos para condicionar")
+    submodel = FastCopulaSynthesizer(metadata)
+    submodel.fit(matching.reset_index(drop=True))
+    logger.info(f"🎯 Submodelo condicionado ajustado con {len(matching)} filas para {conditions}")
+    return submodel
+
+
+# ==========================================
+# SAMPLER CONDICIONADO
+# ==========================================
+
+class ConditionalSampler:
+    """
+    Envuelve un synthesizer para que ``sample(n)`` devuelva ``n`` filas que cumplen las condiciones.
+
+    Expone la misma interfaz que usa el muestreo por lotes (sample, reset_sampling,
+    _set_random_state, save), así que funciona igual con sample_to_csv y con los
+    workers de sample_to_csv_parallel.
+    """
+
+    def __init__(self, synthesizer, conditions: Dict[str, Any], strategy: str,
+                 expected_acceptance: Optional[float] = None):
+        self.synthesizer = synthesizer
+        self.conditions = conditions
+        self.strategy = strategy
+        self.expected_acceptance = expected_acceptance
+        self.rows_drawn = 0
+        self.rows_matched = 0
+        self.model_calls = 0
+
+    def sample(self, num_rows: int) -> pd.DataFrame:
+        if self.strategy == "native":
+            self.model_calls += 1
+            return self.synthesizer.sample_conditioned(num_rows, self.conditions)
+        if self.strategy == "submodel":
+            self.model_calls += 1
+            return self.synthesizer.sample(num_rows)
+        return self._sample_rejection(num_rows)
+
+    def _sample_rejection(self, num_rows: int) -> pd.DataFrame:
+        # La tasa se aprende dentro de cada llamada: el resultado de sample(n) depende solo
+        # del estado aleatorio del modelo, no de las llamadas anteriores (muestreo por rango)
+        start_row = getattr(self.synthesizer, "_rows_sampled", None)
+        kept = []
+        pending = num_rows
+        drawn = matched_total = 0
+        rounds_without_match = 0
+        while pending > 0:
+            if matched_total:
+                acceptance = matched_total / drawn
+            else:
+                acceptance = (self.expected_acceptance or 1.0) / (2 ** rounds_without_match)
+            acceptance = max(acceptance, 1e-9)
+            request = min(math.ceil(pending * REJECTION_OVERSAMPLE / acceptance), MAX_REJECTION_BATCH)
+            batch = self.synthesizer.sample(request)
+            mask = condition_mask(batch, self.conditions)
+            matched = int(mask.sum())
+
+            drawn += len(batch)
+            matched_total += matched
+            self.model_calls += 1
+            self.rows_drawn += len(batch)
+            self.rows_matched += matched
+            if matched == 0:
+                rounds_without_match += 1
+                if rounds_without_match >= MAX_ROUNDS_WITHOUT_MATCH:
+                    raise ValueError(
+                        f"El modelo no generó ninguna fila con {self.conditions} en {self.rows_drawn:,} intentos"
+                    )
+                continue
+
+            rounds_without_match = 0
+            kept.append(batch[mask].head(pending))
+            pending -= len(kept[-1])
+        result = pd.concat(kept, ignore_index=True) if len(kept) > 1 else kept[0].reset_index(drop=True)
+        if start_row is not None and hasattr(self.synthesizer, "renumber_ids"):
+            # Las filas descartadas no consumen IDs: las aceptadas siguen la posición en el trabajo
+            result = self.synthesizer.renumber_ids(result, start_row)
+        return result
+
+    def reset_sampling(self) -> None:
+        self.synthesizer.reset_sampling()
+
+    def set_start_row(self, start_row: int) -> None:
+        if hasattr(self.synthesizer, "set_start_row"):
+            self.synthesizer.set_start_row(start_row)
+
+    def _set_random_state(self, seed: Optional[int]) -> None:
+        self.synthesizer._set_random_state(seed)
+
+    def save(self, filepath: str) -> None:
+        import cloudpickle
+        with open(filepath, "wb") as f:
+            cloudpickle.dump(self, f)
+
+    def summary(self) -> Dict[str, Any]:
+        """Estrategia y coste del rechazo (solo lo muestreado en este proceso)"""
+        summary = {
+            "conditions": self.conditions,
+            "strategy": self.strategy,
+            "expected_acceptance": round(self.expected_acceptance, 6) if self.expected_acceptance is not None else None,
+            "model_calls": self.model_calls
+        }
+        if self.strategy == "rejection" and self.rows_drawn:
+            summary["rows_drawn"] = self.rows_drawn
+            summary["observed_acceptance"] = round(self.rows_matched / self.rows_drawn, 6)
+        if self.strategy == "submodel":
+            summary["submodel"] = "FastCopula"
+        return summary
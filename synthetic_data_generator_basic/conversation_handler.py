@@ -23,6 +23,58 @@ class StreamEvent:
 # Almacén de contextos por sesión
 SESSION_CONTEXTS: Dict[str, SyntheticDataContext] = {}
 
+# Marca de fin del stream del SDK dentro de la cola combinada
+_STREAM_END = object()
+
+async def _stream_with_progress(
+    result,
+    sdk_context: SyntheticDataContext
+) -> AsyncGenerator[Any, None]:
+    """
+    Combina los eventos del SDK con el progreso que reportan las herramientas.
+
+    Las herramientas pesadas corren en un executor y llaman a
+    sdk_context.report_progress() desde otro hilo; ese progreso se encola en el
+    event loop y se entrega como StreamEvent("tool_progress") intercalado con
+    los eventos normales del SDK.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    def on_progress(progress: Dict[str, Any]) -> None:
+        # El resumen de métricas de cada herramienta va como evento propio
+        event_type = "tool_metrics" if progress.get("phase") == "metrics" else "tool_progress"
+        try:
+            loop.call_soon_threadsafe(
+                queue.put_nowait, StreamEvent(type=event_type, data=progress)
+            )
+        except RuntimeError:
+            pass  # Event loop cerrado: el stream ya terminó
+
+    async def pump_sdk_events() -> None:
+        try:
+            async for sdk_event in result.stream_events():
+                await queue.put(sdk_event)
+        except Exception as e:
+            await queue.put(e)
+        finally:
+            await queue.put(_STREAM_END)
+
+    sdk_context.progress_listener = on_progress
+    pump_task = asyncio.create_task(pump_sdk_events())
+    try:
+        while True:
+            item = await queue.get()
+            if item is _STREAM_END:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        sdk_context.progress_listener = None
+        if not pump_task.done():
+            pump_task.cancel()
+
 async def handle_message(
     message: str,
     user_id: str,
@@ -143,11 +195,15 @@ async def handle_message_stream(
             }
         )
 
-        # Stream de eventos en tiempo real
-        async for event in result.stream_events():
+        # Stream de eventos en tiempo real (SDK + progreso de herramientas)
+        async for event in _stream_with_progress(result, sdk_context):
+            
+            # 📡 Progreso de herramientas en ejecución (fase, época, filas muestreadas)
+            if isinstance(event, StreamEvent):
+                yield event
             
             # 🔥 Eventos de texto (deltas de tokens)
-            if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+            elif event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
                 if event.data.delta:
                     yield StreamEvent(
                         type="content_block_delta",
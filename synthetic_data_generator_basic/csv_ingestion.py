@@ -0,0 +1,252 @@
+"""
+CSV Ingestion - Capa de lectura de CSV con inferencia de tipos por muestra
+Lee con el lector columnar multihilo de pyarrow (o pandas si no está disponible),
+parsea las fechas una sola vez y carga las columnas categóricas como diccionario
+"""
+
+import os
+import time
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.compute  # noqa: F401  (registra pa.compute)
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# CONFIGURACIÓN DE LECTURA
+# ==========================================
+CSV_INGESTION_ENGINE = os.getenv("CSV_INGESTION_ENGINE", "auto")  # auto | pyarrow | pandas
+SCHEMA_SAMPLE_ROWS = int(os.getenv("CSV_SCHEMA_SAMPLE_ROWS", "10000"))  # Muestra con pandas
+SCHEMA_SAMPLE_BYTES = int(os.getenv("CSV_SCHEMA_SAMPLE_BYTES", str(1024 * 1024)))  # Muestra con pyarrow
+PYARROW_BLOCK_SIZE = 8 * 1024 * 1024  # Bytes por bloque que procesa cada hilo
+
+# Una columna de texto se carga como categórica si tiene pocos valores distintos
+CATEGORICAL_MAX_RATIO = 0.5
+CATEGORICAL_MAX_VALUES = 1000
+
+
+class SchemaMismatchError(ValueError):
+    """El archivo contiene valores que no encajan en el esquema inferido de la muestra"""
+
+
+@dataclass
+class CsvSchema:
+    """Tipos lógicos por columna inferidos de una muestra de filas"""
+    columns: List[str]
+    numeric: Dict[str, str] = field(default_factory=dict)  # columna -> int64 | float64 | bool
+    categorical: List[str] = field(default_factory=list)
+    datetime: List[str] = field(default_factory=list)
+    text: List[str] = field(default_factory=list)
+    sample_rows: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "sample_rows": self.sample_rows,
+            "numeric": self.numeric,
+            "categorical": self.categorical,
+            "datetime": self.datetime,
+            "text": self.text
+        }
+
+
+def infer_schema(file_path: str, engine: Optional[str] = None) -> CsvSchema:
+    """Inferir el esquema a partir de las primeras filas del archivo, no del archivo completo"""
+    if resolve_engine(engine) == "pyarrow":
+        return _infer_schema_pyarrow(file_path)
+    return _infer_schema_pandas(file_path)
+
+
+def _is_categorical(non_null_count: int, distinct_count: int) -> bool:
+    return non_null_count > 0 and distinct_count <= min(CATEGORICAL_MAX_VALUES,
+                                                        CATEGORICAL_MAX_RATIO * non_null_count)
+
+
+def _infer_schema_pyarrow(file_path: str, sample_bytes: int = SCHEMA_SAMPLE_BYTES) -> CsvSchema:
+    """Primer bloque de ``sample_bytes`` con la inferencia nativa de pyarrow"""
+    read_options = pa_csv.ReadOptions(use_threads=True, block_size=sample_bytes)
+    with pa_csv.open_csv(file_path, read_options=read_options) as reader:
+        try:
+            sample = reader.read_next_batch()
+        except StopIteration:
+            raise pd.errors.EmptyDataError("No rows to parse from file")
+
+    schema = CsvSchema(columns=sample.schema.names, sample_rows=sample.num_rows)
+    for col, column in zip(sample.schema.names, sample.columns):
+        arrow_type = column.type
+        if pa.types.is_boolean(arrow_type):
+            schema.numeric[col] = "bool"
+        elif pa.types.is_integer(arrow_type):
+            schema.numeric[col] = "int64"
+        elif pa.types.is_floating(arrow_type):
+            schema.numeric[col] = "float64"
+        elif pa.types.is_timestamp(arrow_type) or pa.types.is_date(arrow_type):
+            schema.datetime.append(col)
+        elif _is_categorical(len(column) - column.null_count, len(pa.compute.unique(column.drop_null()))):
+            schema.categorical.append(col)
+        else:
+            schema.text.append(col)
+    return schema
+
+
+def _infer_schema_pandas(file_path: str, sample_rows: int = SCHEMA_SAMPLE_ROWS) -> CsvSchema:
+    """Primeras ``sample_rows`` filas con la inferencia de pandas"""
+    sample = pd.read_csv(file_path, nrows=sample_rows)
+    schema = CsvSchema(columns=list(sample.columns), sample_rows=len(sample))
+
+    for col in sample.columns:
+        series = sample[col]
+        if pd.api.types.is_bool_dtype(series):
+            schema.numeric[col] = "bool"
+        elif pd.api.types.is_integer_dtype(series):
+            schema.numeric[col] = "int64"
+        elif pd.api.types.is_float_dtype(series):
+            schema.numeric[col] = "float64"
+        else:
+            non_null = series.dropna().astype(str)
+            if len(non_null) and _looks_like_datetime(non_null):
+                schema.datetime.append(col)
+            elif _is_categorical(len(non_null), non_null.nunique()):
+                schema.categorical.append(col)
+            else:
+                schema.text.append(col)
+
+    return schema
+
+
+def _looks_like_datetime(values: pd.Series) -> bool:
+    """Fechas ISO 8601 (el formato que ambos motores parsean sin ambigüedad)"""
+    if not values.str.match(r"^\d{4}-\d{2}-\d{2}").all():
+        return False
+    parsed = pd.to_datetime(values, format="ISO8601", errors="coerce")
+    return bool(parsed.notna().all())
+
+
+# ==========================================
+# MOTORES DE LECTURA
+# ==========================================
+
+def _pyarrow_options(schema: CsvSchema) -> Tuple[Any, Any]:
+    column_types = {col: pa.dictionary(pa.int32(), pa.string()) for col in schema.categorical}
+    column_types.update({col: pa.string() for col in schema.text})
+    column_types.update({col: pa.timestamp("ns") for col in schema.datetime})
+    column_types.update({
+        col: {"int64": pa.int64(), "float64": pa.float64(), "bool": pa.bool_()}[kind]
+        for col, kind in schema.numeric.items()
+    })
+    read_options = pa_csv.ReadOptions(use_threads=True, block_size=PYARROW_BLOCK_SIZE)
+    convert_options = pa_csv.ConvertOptions(column_types=column_types, strings_can_be_null=True)
+    return read_options, convert_options
+
+
+def _arrow_to_pandas(table) -> pd.DataFrame:
+    # Fechas como datetime64 (no objetos date) y diccionarios como pandas Categorical
+    return table.to_pandas(date_as_object=False)
+
+
+def _read_pyarrow(file_path: str, schema: CsvSchema) -> pd.DataFrame:
+    read_options, convert_options = _pyarrow_options(schema)
+    try:
+        table = pa_csv.read_csv(file_path, read_options=read_options, convert_options=convert_options)
+    except pa.ArrowInvalid as e:
+        raise SchemaMismatchError(str(e)) from e
+    return _arrow_to_pandas(table)
+
+
+def _pandas_options(schema: CsvSchema) -> Dict[str, Any]:
+    return {
+        "dtype": {col: "category" for col in schema.categorical},
+        "parse_dates": schema.datetime or False
+    }
+
+
+def _read_pandas(file_path: str, schema: CsvSchema) -> pd.DataFrame:
+    return pd.read_csv(file_path, **_pandas_options(schema))
+
+
+INGESTION_ENGINES = {
+    "pyarrow": _read_pyarrow,
+    "pandas": _read_pandas
+}
+
+
+def resolve_engine(engine: Optional[str] = None) -> str:
+    """Motor efectivo: el pedido, o pyarrow si está instalado"""
+    engine = engine or CSV_INGESTION_ENGINE
+    if engine == "auto":
+        return "pyarrow" if PYARROW_AVAILABLE else "pandas"
+    if engine not in INGESTION_ENGINES:
+        raise ValueError(f"Motor de lectura no soportado: {engine}")
+    if engine == "pyarrow" and not PYARROW_AVAILABLE:
+        logger.warning("⚠️ pyarrow no está instalado, se usa pandas")
+        return "pandas"
+    return engine
+
+
+def read_csv(file_path: str, engine: Optional[str] = None) -> pd.DataFrame:
+    """
+    Leer un CSV completo con el esquema inferido de una muestra.
+
+    Si algún valor posterior a la muestra no encaja en el esquema, se relee con
+    la inferencia completa de pandas. Las métricas de lectura quedan en
+    ``df.attrs["ingestion"]`` (motor, segundos, MB/s).
+    """
+    engine = resolve_engine(engine)
+    size_bytes = os.path.getsize(file_path)
+    start = time.perf_counter()
+
+    schema = infer_schema(file_path, engine)
+    try:
+        df = INGESTION_ENGINES[engine](file_path, schema)
+        schema_fallback = False
+    except SchemaMismatchError as e:
+        logger.warning(f"⚠️ El esquema de la muestra no encaja con {os.path.basename(file_path)} ({e}), "
+                       f"se relee con inferencia completa")
+        df = pd.read_csv(file_path)
+        engine, schema_fallback = "pandas", True
+
+    read_seconds = time.perf_counter() - start
+    df.attrs["ingestion"] = {
+        "engine": engine,
+        "read_seconds": round(read_seconds, 3),
+        "bytes": size_bytes,
+        "mb_per_second": round(size_bytes / 1024 / 1024 / read_seconds, 2) if read_seconds > 0 else None,
+        "schema_fallback": schema_fallback,
+        "categorical_columns": len(schema.categorical),
+        "datetime_columns": len(schema.datetime)
+    }
+    logger.info(f"📥 {os.path.basename(file_path)} leído con {engine} en {read_seconds:.2f}s "
+                f"({df.attrs['ingestion']['mb_per_second']} MB/s)")
+    return df
+
+
+def iter_csv_chunks(file_path: str, chunk_size: int, engine: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    """
+    Recorrer un CSV por bloques con el esquema inferido de una muestra.
+
+    Con pyarrow los bloques son de tamaño en bytes fijo (no de ``chunk_size`` filas exactas).
+    Lanza SchemaMismatchError si un bloque no encaja en el esquema.
+    """
+    engine = resolve_engine(engine)
+    schema = infer_schema(file_path, engine)
+
+    if engine == "pandas":
+        yield from pd.read_csv(file_path, chunksize=chunk_size, **_pandas_options(schema))
+        return
+
+    read_options, convert_options = _pyarrow_options(schema)
+    try:
+        with pa_csv.open_csv(file_path, read_options=read_options, convert_options=convert_options) as reader:
+            for batch in reader:
+                yield _arrow_to_pandas(pa.Table.from_batches([batch]))
+    except pa.ArrowInvalid as e:
+        raise SchemaMismatchError(str(e)) from e
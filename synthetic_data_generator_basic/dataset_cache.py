@@ -0,0 +1,227 @@
+"""
+Dataset Cache - Caché por sesión de los DataFrames ya parseados
+Evita releer el mismo CSV en cada herramienta (analyze_csv_file, generate_synthetic_data_with_sdv)
+"""
+
+import os
+import uuid
+import weakref
+import logging
+import itertools
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable, Tuple, List
+
+import pandas as pd
+
+from synthesizer_cache import hash_file
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# PRESUPUESTO DE MEMORIA POR PROCESO
+# ==========================================
+DATASET_CACHE_MAX_MEMORY_MB = float(os.getenv("DATASET_CACHE_MAX_MEMORY_MB", "1024"))
+
+# Frames residentes en memoria de todas las sesiones, en orden LRU: (token de caché, ruta) -> (ref. débil, bytes).
+# La referencia débil no retiene las cachés de sesiones terminadas; al recolectarse, su
+# finalizador descuenta sus frames. El token no se reutiliza, a diferencia de id()
+_RESIDENT: "OrderedDict[Tuple[int, str], Tuple[weakref.ref, int]]" = OrderedDict()
+_RESIDENT_BYTES = 0
+_RESIDENT_LOCK = threading.RLock()
+_CACHE_TOKENS = itertools.count()
+
+
+def _admit(cache: "DatasetCache", path: str, size_bytes: int) -> List[Tuple["DatasetCache", str]]:
+    """
+    Registrar un frame residente. Si se supera el presupuesto devuelve los frames menos
+    usados que hay que volcar a disco; el llamador los vuelca tras soltar su propio lock
+    (así dos sesiones que se expulsan mutuamente nunca se bloquean entre sí).
+    """
+    global _RESIDENT_BYTES
+    max_bytes = DATASET_CACHE_MAX_MEMORY_MB * 1024 * 1024
+    victims = []
+    with _RESIDENT_LOCK:
+        _release(cache, path)
+        _RESIDENT[(cache._token, path)] = (weakref.ref(cache), size_bytes)
+        _RESIDENT_BYTES += size_bytes
+
+        while _RESIDENT_BYTES > max_bytes and len(_RESIDENT) > 1:
+            (_, lru_path), (lru_ref, lru_bytes) = _RESIDENT.popitem(last=False)
+            _RESIDENT_BYTES -= lru_bytes
+            lru_cache = lru_ref()
+            if lru_cache is not None:
+                victims.append((lru_cache, lru_path))
+    return victims
+
+
+def _is_resident(cache: "DatasetCache", path: str) -> bool:
+    with _RESIDENT_LOCK:
+        return (cache._token, path) in _RESIDENT
+
+
+def _touch(cache: "DatasetCache", path: str) -> None:
+    with _RESIDENT_LOCK:
+        key = (cache._token, path)
+        if key in _RESIDENT:
+            _RESIDENT.move_to_end(key)
+
+
+def _release(cache: "DatasetCache", path: str) -> None:
+    global _RESIDENT_BYTES
+    with _RESIDENT_LOCK:
+        entry = _RESIDENT.pop((cache._token, path), None)
+        if entry is not None:
+            _RESIDENT_BYTES -= entry[1]
+
+
+def _release_all(token: int) -> None:
+    """Finalizador de una caché recolectada: descontar todos sus frames del presupuesto"""
+    global _RESIDENT_BYTES
+    with _RESIDENT_LOCK:
+        for key in [key for key in _RESIDENT if key[0] == token]:
+            _RESIDENT_BYTES -= _RESIDENT.pop(key)[1]
+
+
+def _file_signature(path: str) -> Tuple[int, int]:
+    """(mtime en ns, tamaño) para detectar si el archivo cambió desde que se cacheó"""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+# ==========================================
+# CACHÉ DE SESIÓN
+# ==========================================
+
+class DatasetCache:
+    """
+    DataFrames parseados de una sesión, indexados por ruta de archivo.
+
+    - Cada entrada guarda la firma (mtime, tamaño) del archivo: si cambia, se invalida.
+    - Si el total de frames residentes del proceso supera DATASET_CACHE_MAX_MEMORY_MB,
+      los menos usados se vuelcan a Parquet (o pickle sin pyarrow) en ``spill_dir``
+      y se recargan desde ahí, que es mucho más rápido que volver a parsear el CSV.
+
+    Los frames devueltos son compartidos: no deben modificarse in-place. Conservan
+    ``df.attrs`` (p.ej. la información de ingestión) aunque pasen por un volcado.
+    """
+
+    def __init__(self, spill_dir: str):
+        self.spill_dir = spill_dir
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.RLock()
+        self._token = next(_CACHE_TOKENS)
+        weakref.finalize(self, _release_all, self._token)
+        self.stats = {"hits": 0, "spill_hits": 0, "misses": 0, "invalidations": 0, "spills": 0}
+
+    def load(self, path: str, reader: Callable[[str], pd.DataFrame] = pd.read_csv) -> pd.DataFrame:
+        """Devolver el frame de ``path`` desde caché, o leerlo con ``reader`` y cachearlo"""
+        victims = []
+        with self._lock:
+            df = self._get(path, victims)
+            if df is None:
+                self.stats["misses"] += 1
+                signature = _file_signature(path)
+                df = reader(path)
+                self._put(path, df, signature, victims)
+
+        for victim_cache, victim_path in victims:
+            victim_cache._spill(victim_path)
+        return df
+
+    def file_hash(self, path: str) -> str:
+        """Hash del contenido del archivo, memorizado mientras su firma no cambie"""
+        with self._lock:
+            signature = _file_signature(path)
+            entry = self._entries.get(path)
+            if entry is not None and entry["signature"] == signature and entry.get("file_hash"):
+                return entry["file_hash"]
+
+            digest = hash_file(path)
+            if entry is not None and entry["signature"] == signature:
+                entry["file_hash"] = digest
+            return digest
+
+    def _get(self, path: str, victims: List) -> Optional[pd.DataFrame]:
+        entry = self._entries.get(path)
+        if entry is None:
+            return None
+
+        if entry["signature"] != _file_signature(path):
+            self.stats["invalidations"] += 1
+            logger.info(f"♻️ {os.path.basename(path)} cambió en disco, se invalida su caché")
+            self.invalidate(path)
+            return None
+
+        if entry["frame"] is not None:
+            self.stats["hits"] += 1
+            _touch(self, path)
+            return entry["frame"]
+
+        # Recargar desde el volcado en disco
+        spill_path = entry["spill_path"]
+        if spill_path.endswith(".parquet"):
+            df = pd.read_parquet(spill_path)
+        else:
+            df = pd.read_pickle(spill_path)
+        df.attrs = dict(entry["attrs"])
+        self.stats["spill_hits"] += 1
+        entry["frame"] = df
+        victims.extend(_admit(self, path, entry["size_bytes"]))
+        return df
+
+    def _put(self, path: str, df: pd.DataFrame, signature: Tuple[int, int], victims: List) -> None:
+        size_bytes = int(df.memory_usage(deep=True).sum())
+        self._entries[path] = {
+            "signature": signature,
+            "frame": df,
+            "size_bytes": size_bytes,
+            "spill_path": None,
+            "attrs": {},
+            "file_hash": None
+        }
+        victims.extend(_admit(self, path, size_bytes))
+
+    def _spill(self, path: str) -> None:
+        """Volcar un frame a disco y liberar la memoria (llamado por el presupuesto global)"""
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry["frame"] is None or _is_resident(self, path):
+                return  # Ya volcado, invalidado o readmitido entretanto
+
+            if entry["spill_path"] is None or not os.path.exists(entry["spill_path"]):
+                base_path = os.path.join(self.spill_dir, f"dataset_{uuid.uuid4().hex[:12]}")
+                try:
+                    entry["frame"].to_parquet(f"{base_path}.parquet", index=False)
+                    entry["spill_path"] = f"{base_path}.parquet"
+                except Exception:
+                    # Sin pyarrow o con tipos no soportados por Parquet
+                    if os.path.exists(f"{base_path}.parquet"):
+                        os.remove(f"{base_path}.parquet")
+                    entry["frame"].to_pickle(f"{base_path}.pkl")
+                    entry["spill_path"] = f"{base_path}.pkl"
+
+            entry["attrs"] = dict(entry["frame"].attrs)  # Parquet no los guarda
+            entry["frame"] = None
+            self.stats["spills"] += 1
+            logger.info(f"💾 {os.path.basename(path)} volcado a disco por presupuesto de memoria")
+
+    def invalidate(self, path: str) -> None:
+        """Eliminar la entrada de ``path`` (memoria y volcado en disco)"""
+        with self._lock:
+            entry = self._entries.pop(path, None)
+            _release(self, path)
+            if entry and entry["spill_path"] and os.path.exists(entry["spill_path"]):
+                os.remove(entry["spill_path"])
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                "datasets": len(self._entries),
+                "in_memory": sum(1 for entry in self._entries.values() if entry["frame"] is not None),
+                "memory_mb": round(sum(
+                    entry["size_bytes"] for entry in self._entries.values() if entry["frame"] is not None
+                ) / 1024 / 1024, 2),
+                "process_budget_mb": DATASET_CACHE_MAX_MEMORY_MB
+            }
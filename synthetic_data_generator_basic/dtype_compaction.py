@@ -0,0 +1,170 @@
+"""
+Dtype Compaction - Reducción de memoria de los DataFrames antes de entrenar
+Convierte cada columna al tipo más pequeño que conserva sus valores y guarda
+un esquema reversible para devolver la salida sintética a los tipos originales
+"""
+
+import logging
+from typing import Dict, Any, Tuple, Iterable
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Una columna de texto pasa a categórica si tiene pocos valores distintos
+CATEGORICAL_MAX_RATIO = 0.5
+
+_INTEGER_CANDIDATES = ("uint8", "int8", "uint16", "int16", "uint32", "int32")
+_BOOL_TOKENS = {"true": True, "false": False}
+
+
+def memory_mb(df: pd.DataFrame) -> float:
+    return round(df.memory_usage(deep=True).sum() / 1024 / 1024, 2)
+
+
+def _smallest_integer(series: pd.Series) -> str:
+    low, high = series.min(), series.max()
+    for dtype in _INTEGER_CANDIDATES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return str(series.dtype)
+
+
+def _float32_is_exact(series: pd.Series) -> bool:
+    """float32 solo si todos los valores sobreviven la ida y vuelta sin cambios"""
+    values = series.to_numpy()
+    roundtrip = values.astype(np.float32).astype(values.dtype)
+    return bool(np.array_equal(values, roundtrip, equal_nan=True))
+
+
+def _bool_tokens(series: pd.Series) -> Dict[str, Any]:
+    """Tokens originales de una columna booleana guardada como texto u objeto (vacío si no lo es)"""
+    if len(series) == 0 or series.isna().any():
+        return {}  # Con nulos se deja como está: el bool nullable no lo admiten todos los modelos
+    uniques = series.unique()
+    if all(isinstance(value, (bool, np.bool_)) for value in uniques):
+        return {"true": True, "false": False}
+    if all(isinstance(value, str) and value.strip().lower() in _BOOL_TOKENS for value in uniques):
+        tokens = {}
+        for value in uniques:
+            tokens[value.strip().lower()] = value
+        return tokens
+    return {}
+
+
+def compact_dataframe(df: pd.DataFrame,
+                      exclude: Iterable[str] = ()) -> Tuple[pd.DataFrame, Dict[str, Dict[str, Any]]]:
+    """
+    Compactar los tipos de ``df`` sin perder información.
+
+    - Enteros al ancho más pequeño que cubre su rango
+    - Flotantes a float32 cuando la conversión es exacta
+    - Texto repetido a categórica, y texto/objeto booleano a bool
+    El DataFrame de entrada no se modifica (puede venir de la caché de la sesión).
+    Las columnas de ``exclude`` (p.ej. IDs o PII que el modelo genera fuera de los
+    valores observados) no se compactan; si ya venían como categóricas pasan a
+    texto, porque una categoría fija convertiría los valores nuevos en nulos.
+
+    Returns:
+        (DataFrame compactado, esquema por columna para restore_dtypes)
+    """
+    columns = {}
+    schema: Dict[str, Dict[str, Any]] = {}
+    exclude = set(exclude)
+
+    for col in df.columns:
+        series = df[col]
+        original_dtype = str(series.dtype)
+        entry: Dict[str, Any] = {"original_dtype": original_dtype}
+
+        if col in exclude:
+            compacted = series.astype(object) if isinstance(series.dtype, pd.CategoricalDtype) else series
+        elif pd.api.types.is_bool_dtype(series) or isinstance(series.dtype, pd.CategoricalDtype):
+            compacted = series
+        elif pd.api.types.is_integer_dtype(series) and len(series):
+            compacted = series.astype(_smallest_integer(series))
+        elif pd.api.types.is_float_dtype(series) and series.dtype != np.float32 and _float32_is_exact(series):
+            compacted = series.astype(np.float32)
+        elif series.dtype == object:
+            tokens = _bool_tokens(series)
+            if tokens:
+                compacted = series.map(lambda value: _BOOL_TOKENS[str(value).strip().lower()]).astype("bool")
+                entry["bool_tokens"] = tokens
+            elif series.nunique() <= CATEGORICAL_MAX_RATIO * series.notna().sum():
+                compacted = series.astype("category")
+            else:
+                compacted = series
+        else:
+            compacted = series
+
+        columns[col] = compacted
+        if str(compacted.dtype) != original_dtype:
+            entry["compact_dtype"] = str(compacted.dtype)
+            schema[col] = entry
+
+    compacted_df = pd.DataFrame(columns, index=df.index)
+    logger.info(f"🗜️ Tipos compactados en {len(schema)}/{len(df.columns)} columnas: "
+                f"{memory_mb(df)} MB → {memory_mb(compacted_df)} MB")
+    return compacted_df, schema
+
+
+def apply_compaction(df: pd.DataFrame, schema: Dict[str, Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Compactar ``df`` (p.ej. filas añadidas a un archivo ya visto) con un esquema existente.
+
+    Lanza ValueError si algún valor no cabe en el tipo compacto del esquema (entero fuera
+    de rango, flotante no exacto en float32 o booleano con otros tokens): en ese caso el
+    esquema ya no describe los datos y hay que recompactar el archivo completo.
+    """
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        entry = schema.get(col)
+        if entry is None:
+            columns[col] = series
+            continue
+
+        compact_dtype = entry["compact_dtype"]
+        if "bool_tokens" in entry:
+            tokens = series.astype(str).str.strip().str.lower()
+            if series.isna().any() or not tokens.isin(list(_BOOL_TOKENS)).all():
+                raise ValueError(f"La columna {col} ya no es booleana")
+            columns[col] = tokens.map(_BOOL_TOKENS).astype("bool")
+        elif compact_dtype == "category":
+            columns[col] = series.astype("category")
+        elif compact_dtype in _INTEGER_CANDIDATES:
+            info = np.iinfo(compact_dtype)
+            fits = pd.api.types.is_integer_dtype(series) and (
+                len(series) == 0 or (info.min <= series.min() and series.max() <= info.max)
+            )
+            if not fits:
+                raise ValueError(f"Los valores de {col} no caben en {compact_dtype}")
+            columns[col] = series.astype(compact_dtype)
+        elif compact_dtype == "float32":
+            if not _float32_is_exact(series):
+                raise ValueError(f"Los valores de {col} no son exactos en float32")
+            columns[col] = series.astype(np.float32)
+        else:
+            columns[col] = series.astype(compact_dtype)
+    return pd.DataFrame(columns, index=df.index)
+
+
+def restore_dtypes(df: pd.DataFrame, schema: Dict[str, Dict[str, Any]]) -> pd.DataFrame:
+    """Devolver un DataFrame (p.ej. un lote sintético) a los tipos originales registrados en ``schema``"""
+    for col, entry in schema.items():
+        if col not in df.columns:
+            continue
+        series = df[col]
+        original_dtype = entry["original_dtype"]
+
+        if "bool_tokens" in entry:
+            tokens = entry["bool_tokens"]
+            df[col] = series.map(lambda value: value if pd.isna(value)
+                                 else tokens.get("true" if value else "false", bool(value))).astype(object)
+        elif original_dtype.startswith(("int", "uint")) and series.isna().any():
+            df[col] = series.astype("float64")  # Con nulos no se puede volver a entero sin nulos
+        else:
+            df[col] = series.astype(original_dtype)
+    return df
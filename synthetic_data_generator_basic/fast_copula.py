@@ -0,0 +1,610 @@
+"""
+Fast Copula - Cópula gaussiana vectorizada con NumPy
+Alternativa rápida a GaussianCopulaSynthesizer de SDV para tablas anchas:
+todas las columnas se ajustan y muestrean en bloque, sin bucles por fila
+"""
+
+import pickle
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr, ndtri
+
+logger = logging.getLogger(__name__)
+
+# Misma semilla fija que SDV: sin semilla explícita el muestreo es reproducible
+FIXED_RNG_SEED = 73251
+
+QUANTILE_GRID_SIZE = 1001  # Puntos de la CDF empírica por columna numérica
+MAX_DECIMALS = 6
+_U_EPSILON = 1e-9
+
+# Tipos semánticos de SDV que el modelo aprende; el resto (IDs, PII) se genera aparte
+MODELLED_SDTYPES = ("numerical", "categorical", "boolean", "datetime")
+
+
+def _learn_decimals(values: np.ndarray) -> Optional[int]:
+    """Decimales con los que están escritos los valores (None si más de MAX_DECIMALS)"""
+    values = values[np.isfinite(values)]
+    for decimals in range(MAX_DECIMALS + 1):
+        if np.allclose(values, np.round(values, decimals), rtol=0, atol=1e-9):
+            return decimals
+    return None
+
+
+def _learn_time_unit(values: np.ndarray) -> int:
+    """Mayor unidad (día, hora, minuto, segundo, ns) de la que todas las fechas son múltiplo"""
+    values = values[np.isfinite(values)].astype(np.int64)
+    for unit in (86_400 * 10 ** 9, 3_600 * 10 ** 9, 60 * 10 ** 9, 10 ** 9):
+        if np.all(values % unit == 0):
+            return unit
+    return 1
+
+
+def _merge_quantiles(old: np.ndarray, old_weight: float, new: np.ndarray, new_weight: float) -> np.ndarray:
+    """Rejilla de cuantiles de la mezcla de dos distribuciones (CDF ponderada por filas no nulas)"""
+    if old_weight <= 0 or np.isnan(old).all():
+        return new
+    if new_weight <= 0 or np.isnan(new).all():
+        return old
+    grid = np.linspace(0, 1, len(old))
+    points = np.unique(np.concatenate([old, new]))
+    cdf = (old_weight * np.interp(points, old, grid, left=0.0, right=1.0)
+           + new_weight * np.interp(points, new, grid, left=0.0, right=1.0)) / (old_weight + new_weight)
+    return np.interp(grid, cdf, points)
+
+
+def _nearest_correlation(corr: np.ndarray) -> np.ndarray:
+    """Proyectar a una matriz de correlación definida positiva (para Cholesky)"""
+    corr = np.nan_to_num(corr, nan=0.0)
+    np.fill_diagonal(corr, 1.0)
+    eigenvalues, eigenvectors = np.linalg.eigh((corr + corr.T) / 2)
+    corr = (eigenvectors * np.clip(eigenvalues, 1e-6, None)) @ eigenvectors.T
+    scale = np.sqrt(np.diag(corr))
+    return corr / np.outer(scale, scale)
+
+
+def _psd_cholesky(covariance: np.ndarray) -> np.ndarray:
+    """Factor de Cholesky de una covarianza casi singular (autovalores recortados)"""
+    if covariance.size == 0:
+        return np.zeros((0, 0))
+    eigenvalues, eigenvectors = np.linalg.eigh((covariance + covariance.T) / 2)
+    covariance = (eigenvectors * np.clip(eigenvalues, 1e-9, None)) @ eigenvectors.T
+    return np.linalg.cholesky(covariance)
+
+
+class FastCopulaSynthesizer:
+    """
+    Cópula gaussiana con marginales empíricas (o normales) y codificación por frecuencia.
+
+    - Numéricas y fechas: CDF empírica en una rejilla de cuantiles, invertida con np.interp
+    - Categóricas y booleanas: cada categoría ocupa un intervalo de [0, 1) proporcional a su
+      frecuencia; al ajustar se toma un punto al azar dentro de su intervalo
+    - Las columnas se llevan al espacio normal, se estima la correlación y al muestrear
+      se usa su factor de Cholesky sobre una matriz de normales estándar por lote
+
+    Misma interfaz que los synthesizers de SDV que usa la aplicación:
+    fit, sample, save, load, reset_sampling y _set_random_state. Además ``partial_fit``
+    actualiza un modelo ya ajustado con filas nuevas a partir de estadísticos suficientes
+    (recuentos, sumas, rejillas de cuantiles y momentos en espacio normal), y
+    ``sample_conditioned`` muestrea directamente de la cópula condicionada a valores fijos.
+    """
+
+    def __init__(self, metadata=None, marginals: str = "empirical"):
+        if marginals not in ("empirical", "normal"):
+            raise ValueError(f"Marginales no soportadas: {marginals}")
+        self.metadata = metadata
+        self.marginals = marginals
+        self.columns: List[str] = []
+        self._numeric: List[Dict[str, Any]] = []
+        self._categorical: List[Dict[str, Any]] = []
+        self._generated: List[Dict[str, Any]] = []
+        self._cholesky: Optional[np.ndarray] = None
+        # Estadísticos suficientes para partial_fit: filas representadas y momentos en espacio normal
+        self._rows_fitted = 0
+        self._z_sum: Optional[np.ndarray] = None
+        self._z_cross: Optional[np.ndarray] = None
+        # Ganancia y factor de Cholesky de la normal condicionada, por conjunto de columnas fijadas
+        self._conditional_factors: Dict[Tuple[int, ...], Tuple[np.ndarray, np.ndarray]] = {}
+        self._fitted = False
+        self._seed: Optional[int] = None
+        self._rng = np.random.default_rng(FIXED_RNG_SEED)
+        self._rows_sampled = 0  # Fila absoluta de la próxima fila muestreada (IDs generados)
+
+    # ==========================================
+    # AJUSTE
+    # ==========================================
+
+    def _sdtype(self, column: str) -> Optional[str]:
+        if self.metadata is None:
+            return None
+        spec = self.metadata.columns.get(column, {}) if hasattr(self.metadata, "columns") else {}
+        return spec.get("sdtype")
+
+    def fit(self, data: pd.DataFrame) -> None:
+        rng = np.random.default_rng(FIXED_RNG_SEED)
+        self.columns = list(data.columns)
+        self._numeric, self._categorical, self._generated = [], [], []
+
+        numeric_columns, categorical_columns = [], []
+        for col in self.columns:
+            series = data[col]
+            sdtype = self._sdtype(col)
+            if sdtype is not None and sdtype not in MODELLED_SDTYPES:
+                self._generated.append(self._fit_generated(col, series, sdtype))
+            elif (pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)) \
+                    or pd.api.types.is_datetime64_any_dtype(series):
+                numeric_columns.append(col)
+            else:
+                categorical_columns.append(col)
+
+        z_blocks = []
+        if numeric_columns:
+            z_blocks.append(self._fit_numeric(data[numeric_columns]))
+        for col in categorical_columns:
+            spec, z = self._fit_categorical(col, data[col], rng)
+            self._categorical.append(spec)
+            z_blocks.append(z[:, None])
+
+        self._rows_fitted = len(data)
+        if z_blocks:
+            z = np.nan_to_num(np.hstack(z_blocks), nan=0.0)
+            self._z_sum, self._z_cross = z.sum(axis=0), z.T @ z
+            corr = np.corrcoef(z, rowvar=False) if z.shape[1] > 1 else np.ones((1, 1))
+            self._cholesky = np.linalg.cholesky(_nearest_correlation(np.atleast_2d(corr)))
+        else:
+            self._z_sum, self._z_cross = np.zeros(0), np.zeros((0, 0))
+            self._cholesky = np.zeros((0, 0))
+
+        self._fitted = True
+        self._conditional_factors = {}
+        self.reset_sampling()
+        logger.info(f"⚡ FastCopula ajustada: {len(numeric_columns)} numéricas, "
+                    f"{len(self._categorical)} categóricas, {len(self._generated)} generadas")
+
+    @staticmethod
+    def _numeric_values(block: pd.DataFrame) -> np.ndarray:
+        """Columnas numéricas y fechas (en ns) como una matriz float64 con NaN en los nulos"""
+        values = np.empty(block.shape, dtype=np.float64)
+        for i, col in enumerate(block.columns):
+            series = block[col]
+            if pd.api.types.is_datetime64_any_dtype(series):
+                values[:, i] = series.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+                values[series.isna().to_numpy(), i] = np.nan
+            else:
+                values[:, i] = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        return values
+
+    def _fit_numeric(self, block: pd.DataFrame) -> np.ndarray:
+        """Marginales de todas las columnas numéricas a la vez; devuelve sus valores en espacio normal"""
+        values = self._numeric_values(block)
+
+        grid = np.linspace(0, 1, QUANTILE_GRID_SIZE)
+        with np.errstate(all="ignore"):
+            quantiles = np.nanquantile(values, grid, axis=0) if len(values) else np.zeros((len(grid), 0))
+        means, stds = np.nanmean(values, axis=0), np.nanstd(values, axis=0)
+        null_fractions = np.isnan(values).mean(axis=0)
+
+        # Rango medio de cada valor entre los no nulos de su columna -> uniforme -> normal
+        ranks = pd.DataFrame(values).rank(method="average").to_numpy()
+        counts = (~np.isnan(values)).sum(axis=0)
+        z = ndtri(np.clip(ranks / (counts + 1), _U_EPSILON, 1 - _U_EPSILON))
+
+        for i, col in enumerate(block.columns):
+            series = block[col]
+            is_datetime = pd.api.types.is_datetime64_any_dtype(series)
+            is_integer = pd.api.types.is_integer_dtype(series) or is_datetime
+            self._numeric.append({
+                "column": col,
+                "dtype": series.dtype,
+                "is_datetime": is_datetime,
+                "is_integer": is_integer,
+                "decimals": 0 if is_integer else _learn_decimals(values[:, i]),
+                "time_unit": _learn_time_unit(values[:, i]) if is_datetime else None,
+                "quantiles": quantiles[:, i],
+                "mean": means[i],
+                "std": stds[i],
+                "null_fraction": null_fractions[i],
+                "count": int(counts[i]),
+                "sum": float(np.nansum(values[:, i])),
+                "sum_sq": float(np.nansum(values[:, i] ** 2))
+            })
+        return z
+
+    @staticmethod
+    def _fit_categorical(col: str, series: pd.Series,
+                         rng: np.random.Generator) -> Tuple[Dict[str, Any], np.ndarray]:
+        """Codificación por frecuencia: las categorías más frecuentes ocupan los primeros intervalos"""
+        codes, uniques = pd.factorize(series, use_na_sentinel=False)
+        counts = np.bincount(codes, minlength=len(uniques))
+        order = np.argsort(-counts, kind="stable")
+        frequencies = counts[order] / max(1, len(series))
+        upper = np.cumsum(frequencies)
+        upper[-1] = 1.0
+        lower = upper - frequencies
+
+        # Cada fila toma un punto al azar dentro del intervalo de su categoría
+        rank_of_code = np.empty_like(order)
+        rank_of_code[order] = np.arange(len(order))
+        ranks = rank_of_code[codes]
+        u = lower[ranks] + rng.random(len(series)) * frequencies[ranks]
+
+        spec = {
+            "column": col,
+            "dtype": series.dtype,
+            "values": np.asarray(uniques, dtype=object)[order],
+            "upper": upper,
+            "counts": counts[order].astype(np.float64)
+        }
+        return spec, ndtri(np.clip(u, _U_EPSILON, 1 - _U_EPSILON))
+
+    def _fit_generated(self, col: str, series: pd.Series, sdtype: str) -> Dict[str, Any]:
+        """Columnas que no se modelan (IDs, PII): se generan valores nuevos al muestrear"""
+        return {
+            "column": col,
+            "sdtype": sdtype,
+            "dtype": series.dtype,
+            "numeric": pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series),
+            "null_fraction": float(series.isna().mean())
+        }
+
+    # ==========================================
+    # ACTUALIZACIÓN INCREMENTAL
+    # ==========================================
+
+    @property
+    def supports_partial_fit(self) -> bool:
+        """Los modelos guardados antes de existir partial_fit no tienen estadísticos suficientes"""
+        return self._fitted and getattr(self, "_z_cross", None) is not None
+
+    def partial_fit(self, data: pd.DataFrame,
+                    represented_rows: Optional[int] = None,
+                    prior_rows: Optional[int] = None) -> None:
+        """
+        Actualizar marginales y correlación con filas nuevas sin volver a ver las anteriores.
+
+        Args:
+            data: Filas nuevas, con las mismas columnas que el ajuste original
+            represented_rows: Filas reales que representa ``data`` (si es una submuestra)
+            prior_rows: Filas reales que representa el modelo actual (por defecto, las ajustadas)
+
+        Las filas nuevas se llevan al espacio normal con las marginales ya combinadas y sus
+        momentos se suman a los anteriores, de modo que el coste es proporcional a ``data``.
+        """
+        if not self.supports_partial_fit:
+            raise ValueError("Este modelo FastCopula no guarda estadísticos suficientes: reentrénalo con fit()")
+        if list(data.columns) != self.columns:
+            raise ValueError("Las columnas nuevas no coinciden con las del modelo ajustado")
+        if len(data) == 0:
+            return
+
+        rng = np.random.default_rng(FIXED_RNG_SEED + self._rows_fitted)
+        prior_rows = prior_rows or self._rows_fitted
+        represented_rows = represented_rows or len(data)
+        old_scale = prior_rows / max(self._rows_fitted, 1)
+        new_scale = represented_rows / len(data)
+
+        z_blocks = []
+        if self._numeric:
+            block = data[[spec["column"] for spec in self._numeric]]
+            z_blocks.append(self._update_numeric(self._numeric_values(block), old_scale, new_scale))
+        for spec in self._categorical:
+            z_blocks.append(self._update_categorical(spec, data[spec["column"]], old_scale, new_scale, rng)[:, None])
+        for spec in self._generated:
+            null_fraction = float(data[spec["column"]].isna().mean())
+            spec["null_fraction"] = (spec["null_fraction"] * prior_rows + null_fraction * represented_rows) \
+                / (prior_rows + represented_rows)
+
+        if z_blocks:
+            z = np.nan_to_num(np.hstack(z_blocks), nan=0.0)
+            self._z_sum = self._z_sum * old_scale + z.sum(axis=0) * new_scale
+            self._z_cross = self._z_cross * old_scale + (z.T @ z) * new_scale
+            total = prior_rows + represented_rows
+            mean = self._z_sum / total
+            covariance = self._z_cross / total - np.outer(mean, mean)
+            scale = np.sqrt(np.clip(np.diag(covariance), 1e-12, None))
+            corr = covariance / np.outer(scale, scale)
+            self._cholesky = np.linalg.cholesky(_nearest_correlation(np.atleast_2d(corr)))
+
+        self._rows_fitted = prior_rows + represented_rows
+        self._conditional_factors = {}
+        self.reset_sampling()
+        logger.info(f"⚡ FastCopula actualizada con {len(data)} filas nuevas ({self._rows_fitted} en total)")
+
+    def _update_numeric(self, values: np.ndarray, old_scale: float, new_scale: float) -> np.ndarray:
+        """Combinar conteos, sumas y cuantiles; devuelve las filas nuevas en espacio normal"""
+        grid = np.linspace(0, 1, QUANTILE_GRID_SIZE)
+        with np.errstate(all="ignore"):
+            new_quantiles = np.nanquantile(values, grid, axis=0)
+        z = np.empty(values.shape, dtype=np.float64)
+
+        for i, spec in enumerate(self._numeric):
+            column = values[:, i]
+            valid = ~np.isnan(column)
+            old_count, new_count = spec["count"] * old_scale, valid.sum() * new_scale
+            old_total = self._rows_fitted * old_scale
+            new_total = len(column) * new_scale
+
+            spec["quantiles"] = _merge_quantiles(spec["quantiles"], old_count, new_quantiles[:, i], new_count)
+            spec["count"] = old_count + new_count
+            spec["sum"] = spec["sum"] * old_scale + np.nansum(column) * new_scale
+            spec["sum_sq"] = spec["sum_sq"] * old_scale + np.nansum(column ** 2) * new_scale
+            if spec["count"] > 0:
+                spec["mean"] = spec["sum"] / spec["count"]
+                spec["std"] = float(np.sqrt(max(spec["sum_sq"] / spec["count"] - spec["mean"] ** 2, 0.0)))
+            spec["null_fraction"] = 1 - spec["count"] / (old_total + new_total)
+
+            if spec["time_unit"]:
+                spec["time_unit"] = int(np.gcd(spec["time_unit"], _learn_time_unit(column)))
+            elif not spec["is_integer"] and spec["decimals"] is not None:
+                decimals = _learn_decimals(column)
+                spec["decimals"] = None if decimals is None else max(spec["decimals"], decimals)
+
+            # Rango medio dentro de la rejilla combinada (los empates quedan en el centro)
+            quantiles = spec["quantiles"]
+            ranks = np.searchsorted(quantiles, column, side="left") + np.searchsorted(quantiles, column, side="right")
+            u = ranks / (2 * len(quantiles))
+            z[:, i] = np.where(valid, ndtri(np.clip(u, _U_EPSILON, 1 - _U_EPSILON)), np.nan)
+        return z
+
+    @staticmethod
+    def _update_categorical(spec: Dict[str, Any], series: pd.Series, old_scale: float, new_scale: float,
+                            rng: np.random.Generator) -> np.ndarray:
+        """Sumar frecuencias (con categorías nuevas al final) y codificar las filas nuevas"""
+        counts = pd.Series(spec["counts"] * old_scale, index=pd.Index(spec["values"], dtype=object))
+        new_counts = series.astype(object).value_counts(dropna=False) * new_scale
+        counts = counts.add(new_counts, fill_value=0.0)
+        counts = counts.iloc[np.argsort(-counts.to_numpy(), kind="stable")]
+
+        frequencies = counts.to_numpy() / counts.sum()
+        upper = np.cumsum(frequencies)
+        upper[-1] = 1.0
+        spec["values"] = np.asarray(counts.index, dtype=object)
+        spec["counts"] = counts.to_numpy()
+        spec["upper"] = upper
+        if isinstance(spec["dtype"], pd.CategoricalDtype):
+            spec["dtype"] = pd.CategoricalDtype([value for value in spec["values"] if not pd.isna(value)])
+
+        positions = pd.Index(spec["values"], dtype=object).get_indexer(series.astype(object))
+        lower = upper - frequencies
+        u = lower[positions] + rng.random(len(series)) * frequencies[positions]
+        return ndtri(np.clip(u, _U_EPSILON, 1 - _U_EPSILON))
+
+    # ==========================================
+    # MUESTREO
+    # ==========================================
+
+    def reset_sampling(self) -> None:
+        """Reiniciar el generador aleatorio (con la semilla fijada o la semilla por defecto)"""
+        self._rng = np.random.default_rng(FIXED_RNG_SEED if self._seed is None else self._seed)
+        self._rows_sampled = 0
+
+    def _set_random_state(self, seed: Optional[int]) -> None:
+        self._seed = seed
+        self._rng = np.random.default_rng(FIXED_RNG_SEED if seed is None else seed)
+
+    def set_start_row(self, start_row: int) -> None:
+        """Fila absoluta de la próxima muestra: los IDs generados siguen la posición en el trabajo"""
+        self._rows_sampled = start_row
+
+    def renumber_ids(self, data: pd.DataFrame, start_row: int) -> pd.DataFrame:
+        """
+        IDs generados de ``data`` como filas [start_row, start_row + len(data)) y la
+        siguiente muestra a continuación (p.ej. tras descartar filas por rechazo).
+        """
+        data = data.copy()
+        for spec in self._generated:
+            if spec["sdtype"] == "id" and spec["column"] in data.columns:
+                data[spec["column"]] = self._id_values(spec, start_row, len(data))
+        self._rows_sampled = start_row + len(data)
+        return data
+
+    def sample(self, num_rows: int) -> pd.DataFrame:
+        if not self._fitted:
+            raise ValueError("El modelo FastCopula no está entrenado: llama a fit() primero")
+
+        rng = self._rng
+        dimensions = self._cholesky.shape[0]
+        u = ndtr(rng.standard_normal((num_rows, dimensions)) @ self._cholesky.T)
+        return self._decode(u, num_rows, rng)
+
+    def _decode(self, u: np.ndarray, num_rows: int, rng: np.random.Generator) -> pd.DataFrame:
+        """Uniformes de la cópula -> valores de cada columna (más las columnas generadas)"""
+        output: Dict[str, Any] = {}
+        for i, spec in enumerate(self._numeric):
+            output[spec["column"]] = self._numeric_from_uniform(spec, u[:, i], rng)
+        offset = len(self._numeric)
+        for i, spec in enumerate(self._categorical):
+            output[spec["column"]] = self._categorical_from_uniform(spec, u[:, offset + i])
+        for spec in self._generated:
+            output[spec["column"]] = self._generate_values(spec, num_rows, rng)
+
+        self._rows_sampled += num_rows
+        return pd.DataFrame(output, columns=self.columns)
+
+    # ==========================================
+    # MUESTREO CONDICIONADO
+    # ==========================================
+
+    def _condition_dimension(self, column: str, value: Any) -> Tuple[int, Dict[str, Any], bool]:
+        """Posición de la columna en el espacio normal, su spec y si es numérica"""
+        for i, spec in enumerate(self._numeric):
+            if spec["column"] == column:
+                return i, spec, True
+        for i, spec in enumerate(self._categorical):
+            if spec["column"] == column:
+                return len(self._numeric) + i, spec, False
+        raise ValueError(f"La columna '{column}' no está modelada por la cópula: no se puede condicionar")
+
+    @staticmethod
+    def _category_position(spec: Dict[str, Any], value: Any) -> int:
+        values = spec["values"]
+        if pd.api.types.is_bool_dtype(spec["dtype"]) and isinstance(value, str):
+            value = value.strip().lower() == "true"
+        matches = [i for i, candidate in enumerate(values) if candidate == value or str(candidate) == str(value)]
+        if not matches:
+            raise ValueError(f"El valor {value!r} no aparece en la columna '{spec['column']}'")
+        return matches[0]
+
+    @staticmethod
+    def _numeric_condition(spec: Dict[str, Any], value: Any) -> float:
+        if spec["is_datetime"]:
+            return float(pd.Timestamp(value).value)
+        number = float(value)
+        if spec["is_integer"] and not number.is_integer():
+            raise ValueError(f"La columna '{spec['column']}' es entera: {value!r} no es un valor posible")
+        return number
+
+    def _uniform_of_value(self, spec: Dict[str, Any], number: float) -> float:
+        """Posición de un valor numérico en la marginal (rango medio dentro de la rejilla)"""
+        if self.marginals == "normal":
+            return float(ndtr((number - spec["mean"]) / spec["std"])) if spec["std"] > 0 else 0.5
+        quantiles = spec["quantiles"]
+        rank = np.searchsorted(quantiles, number, side="left") + np.searchsorted(quantiles, number, side="right")
+        return float(rank / (2 * len(quantiles)))
+
+    def _conditional_factor(self, fixed: Tuple[int, ...]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Ganancia Σ_oc Σ_cc⁻¹ y Cholesky de Σ_oo − Σ_oc Σ_cc⁻¹ Σ_co para unas dimensiones fijadas.
+
+        Se calcula una vez por conjunto de columnas condicionadas y se reutiliza en cada
+        lote y para cualquier combinación de valores de esas columnas.
+        """
+        factors = getattr(self, "_conditional_factors", None)
+        if factors is None:
+            factors = self._conditional_factors = {}
+        if fixed not in factors:
+            corr = self._cholesky @ self._cholesky.T
+            free = [i for i in range(corr.shape[0]) if i not in fixed]
+            fixed_idx = list(fixed)
+            gain = np.linalg.solve(corr[np.ix_(fixed_idx, fixed_idx)], corr[np.ix_(fixed_idx, free)]).T
+            covariance = corr[np.ix_(free, free)] - gain @ corr[np.ix_(fixed_idx, free)]
+            factors[fixed] = (gain, _psd_cholesky(covariance))
+        return factors[fixed]
+
+    def sample_conditioned(self, num_rows: int, conditions: Dict[str, Any]) -> pd.DataFrame:
+        """
+        Muestrear filas con ``conditions`` ({columna: valor}) fijadas, sin rechazo.
+
+        Las categorías fijadas toman un punto al azar dentro de su intervalo y las numéricas
+        su posición exacta en la marginal; el resto de columnas sale de la normal condicionada
+        a esos valores. El coste no depende de lo rara que sea la combinación.
+        """
+        if not self._fitted:
+            raise ValueError("El modelo FastCopula no está entrenado: llama a fit() primero")
+        if not conditions:
+            return self.sample(num_rows)
+
+        rng = self._rng
+        dimensions = self._cholesky.shape[0]
+        fixed_columns: Dict[int, np.ndarray] = {}
+        exact_numeric: Dict[str, Tuple[Dict[str, Any], float]] = {}
+        for column, value in conditions.items():
+            dimension, spec, is_numeric = self._condition_dimension(column, value)
+            if is_numeric:
+                number = self._numeric_condition(spec, value)
+                u_fixed = np.full(num_rows, self._uniform_of_value(spec, number))
+                exact_numeric[column] = (spec, number)
+            else:
+                position = self._category_position(spec, value)
+                lower = spec["upper"][position - 1] if position > 0 else 0.0
+                u_fixed = lower + rng.random(num_rows) * (spec["upper"][position] - lower)
+            fixed_columns[dimension] = ndtri(np.clip(u_fixed, _U_EPSILON, 1 - _U_EPSILON))
+
+        fixed = tuple(sorted(fixed_columns))
+        gain, cholesky = self._conditional_factor(fixed)
+        z_fixed = np.column_stack([fixed_columns[i] for i in fixed])
+        free = [i for i in range(dimensions) if i not in fixed_columns]
+
+        z = np.empty((num_rows, dimensions))
+        z[:, list(fixed)] = z_fixed
+        z[:, free] = z_fixed @ gain.T + rng.standard_normal((num_rows, len(free))) @ cholesky.T
+        output = self._decode(ndtr(z), num_rows, rng)
+
+        # Las numéricas fijadas llevan el valor pedido, sin redondeo de la rejilla ni nulos
+        for column, (spec, number) in exact_numeric.items():
+            values = np.full(num_rows, number)
+            if spec["is_datetime"]:
+                output[column] = pd.Series(values.astype(np.int64).astype("datetime64[ns]")).astype(spec["dtype"])
+            else:
+                output[column] = pd.Series(values).astype(spec["dtype"])
+        return output
+
+    def _numeric_from_uniform(self, spec: Dict[str, Any], u: np.ndarray, rng: np.random.Generator):
+        quantiles = spec["quantiles"]
+        if self.marginals == "normal":
+            values = spec["mean"] + spec["std"] * ndtri(np.clip(u, _U_EPSILON, 1 - _U_EPSILON))
+            values = np.clip(values, quantiles[0], quantiles[-1])
+        else:
+            values = np.interp(u, np.linspace(0, 1, len(quantiles)), quantiles)
+
+        if spec["time_unit"]:
+            values = np.round(values / spec["time_unit"]) * spec["time_unit"]
+        elif spec["decimals"] is not None:
+            values = np.round(values, spec["decimals"])
+
+        has_nulls = spec["null_fraction"] > 0
+        if has_nulls:
+            values[rng.random(len(values)) < spec["null_fraction"]] = np.nan
+
+        if spec["is_datetime"]:
+            stamps = np.full(len(values), np.datetime64("NaT"), dtype="datetime64[ns]")
+            valid = ~np.isnan(values)
+            stamps[valid] = values[valid].astype(np.int64).astype("datetime64[ns]")
+            return pd.Series(stamps).astype(spec["dtype"])
+        if spec["is_integer"] and not np.isnan(values).any():
+            return values.astype(spec["dtype"])
+        if pd.api.types.is_float_dtype(spec["dtype"]):
+            return values.astype(spec["dtype"])
+        return values
+
+    @staticmethod
+    def _categorical_from_uniform(spec: Dict[str, Any], u: np.ndarray):
+        index = np.minimum(np.searchsorted(spec["upper"], u, side="right"), len(spec["values"]) - 1)
+        values = spec["values"][index]
+        if isinstance(spec["dtype"], pd.CategoricalDtype):
+            return pd.Categorical(values, dtype=spec["dtype"])
+        if pd.api.types.is_bool_dtype(spec["dtype"]):
+            return values.astype(bool)
+        return values
+
+    @staticmethod
+    def _id_values(spec: Dict[str, Any], start: int, num_rows: int) -> np.ndarray:
+        sequence = np.arange(start, start + num_rows)
+        return sequence if spec["numeric"] else np.char.add(f"{spec['column']}_", sequence.astype(str))
+
+    def _generate_values(self, spec: Dict[str, Any], num_rows: int, rng: np.random.Generator):
+        if spec["sdtype"] == "id":
+            return self._id_values(spec, self._rows_sampled, num_rows)
+
+        try:
+            from faker import Faker
+            faker = Faker()
+            faker.seed_instance(int(rng.integers(2 ** 31)))
+            provider = getattr(faker, spec["sdtype"], None)
+        except ImportError:
+            provider = None
+
+        if callable(provider):
+            values = np.array([provider() for _ in range(num_rows)], dtype=object)
+        else:
+            values = np.char.add(f"{spec['sdtype']}_", rng.integers(0, 2 ** 40, num_rows).astype(str))
+        if spec["null_fraction"] > 0:
+            values = values.astype(object)
+            values[rng.random(num_rows) < spec["null_fraction"]] = None
+        return values
+
+    # ==========================================
+    # PERSISTENCIA
+    # ==========================================
+
+    def save(self, filepath: str) -> None:
+        with open(filepath, "wb") as f:
+            pickle.dump(self, f)
+
+    @classmethod
+    def load(cls, filepath: str) -> "FastCopulaSynthesizer":
+        with open(filepath, "rb") as f:
+            return pickle.load(f)
@@ -0,0 +1,197 @@
+"""
+Fit Sampling - Submuestreo acotado de filas para entrenar
+Con millones de filas el entrenamiento (sobre todo CTGAN/TVAE) crece linealmente sin
+ganar calidad: se entrena con un máximo de filas, conservando las categorías raras
+"""
+
+import os
+import logging
+from typing import Dict, Any, Iterable, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from csv_ingestion import iter_csv_chunks, SchemaMismatchError
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# CONFIGURACIÓN DEL SUBMUESTREO
+# ==========================================
+MAX_FIT_ROWS = int(os.getenv("MAX_FIT_ROWS", "100000"))
+FIT_SAMPLING_STRATEGIES = ("stratified", "reservoir")
+FIT_SAMPLING_SEED = 0  # Semilla fija: el mismo archivo da siempre la misma muestra (y la misma caché)
+
+MIN_ROWS_PER_CATEGORY = 20      # Filas garantizadas por categoría en el muestreo estratificado
+MAX_STRATA_CARDINALITY = 1000   # Columnas con más categorías no se usan como estratos
+RARE_SHARE = 0.01               # Por debajo de esta proporción una categoría es rara
+MAX_UPWEIGHT = 10               # Máximo de réplicas por fila al sobreponderar
+RESERVOIR_POOL_FACTOR = 2       # Tamaño del reservorio al leer por bloques (x filas máximas)
+RESERVOIR_CHUNK_SIZE = 100_000
+
+
+def strata_columns(df: pd.DataFrame, metadata_dict: Dict[str, Any]) -> List[str]:
+    """Columnas categóricas/booleanas de cardinalidad acotada que se usan como estratos"""
+    columns = []
+    for col, spec in metadata_dict.get("columns", {}).items():
+        if col in df.columns and spec.get("sdtype") in ("categorical", "boolean"):
+            if df[col].nunique(dropna=False) <= MAX_STRATA_CARDINALITY:
+                columns.append(col)
+    return columns
+
+
+def _stratified_indices(df: pd.DataFrame, max_rows: int, strata: Sequence[str],
+                        rng: np.random.Generator) -> Tuple[np.ndarray, int]:
+    """
+    Índices de una muestra que garantiza hasta MIN_ROWS_PER_CATEGORY filas de cada
+    categoría de cada estrato y completa el resto con un muestreo uniforme.
+    """
+    n = len(df)
+    order = rng.permutation(n)
+    codes = {col: pd.factorize(df[col], use_na_sentinel=False)[0][order] for col in strata}
+
+    per_category = MIN_ROWS_PER_CATEGORY
+    while True:
+        mandatory = np.zeros(n, dtype=bool)
+        for col in strata:
+            rank = pd.Series(codes[col]).groupby(codes[col]).cumcount().to_numpy()
+            mandatory[order[rank < per_category]] = True
+        # Si las filas garantizadas no caben, se reduce el mínimo por categoría
+        if mandatory.sum() <= max_rows or per_category == 1:
+            break
+        per_category = max(1, per_category // 2)
+
+    mandatory_rows = np.flatnonzero(mandatory)
+    if len(mandatory_rows) > max_rows:
+        mandatory_rows = rng.choice(mandatory_rows, max_rows, replace=False)
+    remaining = rng.choice(np.flatnonzero(~mandatory), max_rows - len(mandatory_rows), replace=False)
+    return np.sort(np.concatenate([mandatory_rows, remaining])), per_category
+
+
+def _upweight_rare(sample: pd.DataFrame, strata: Sequence[str]) -> Tuple[pd.DataFrame, Dict[str, Dict[str, int]]]:
+    """Replicar las filas de categorías raras hasta acercarlas a RARE_SHARE (máximo MAX_UPWEIGHT veces)"""
+    row_factor = np.ones(len(sample), dtype=np.int64)
+    factors: Dict[str, Dict[str, int]] = {}
+    for col in strata:
+        shares = sample[col].value_counts(normalize=True, dropna=False)
+        shares = shares[shares > 0]
+        category_factor = np.clip(np.ceil(RARE_SHARE / shares), 1, MAX_UPWEIGHT).astype(np.int64)
+        rare = category_factor[category_factor > 1]
+        if len(rare):
+            factors[col] = {str(category): int(factor) for category, factor in rare.items()}
+            column_factor = sample[col].astype(object).map(category_factor.to_dict()).fillna(1).to_numpy(dtype=np.int64)
+            row_factor = np.maximum(row_factor, column_factor)
+
+    if (row_factor == 1).all():
+        return sample, factors
+    return sample.iloc[np.repeat(np.arange(len(sample)), row_factor)].reset_index(drop=True), factors
+
+
+def sample_for_fit(df: pd.DataFrame,
+                   max_rows: int = MAX_FIT_ROWS,
+                   strategy: str = "stratified",
+                   strata: Sequence[str] = (),
+                   upweight_rare: bool = False,
+                   seed: int = FIT_SAMPLING_SEED) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Reducir ``df`` a como mucho ``max_rows`` filas para entrenar.
+
+    Estrategias:
+        stratified: garantiza filas de cada categoría de ``strata`` y completa al azar
+        reservoir: muestra uniforme (en memoria equivale al muestreo por reservorio)
+
+    Returns:
+        (frame de entrenamiento, plan de muestreo para el historial)
+    """
+    if strategy not in FIT_SAMPLING_STRATEGIES:
+        raise ValueError(f"Estrategia de submuestreo no soportada: {strategy}")
+
+    rng = np.random.default_rng(seed)
+    plan: Dict[str, Any] = {
+        "strategy": strategy,
+        "max_fit_rows": max_rows,
+        "input_rows": len(df),
+        "strata_columns": list(strata) if strategy == "stratified" else []
+    }
+
+    if len(df) <= max_rows:
+        sample = df
+        plan["strategy"] = "all_rows"
+    elif strategy == "stratified" and strata:
+        indices, per_category = _stratified_indices(df, max_rows, strata, rng)
+        sample = df.iloc[indices]
+        plan["min_rows_per_category"] = per_category
+    else:
+        sample = df.iloc[np.sort(rng.choice(len(df), max_rows, replace=False))]
+
+    if strategy == "stratified" and strata:
+        plan["categories_kept"] = {
+            col: f"{sample[col].nunique(dropna=False)}/{df[col].nunique(dropna=False)}" for col in strata
+        }
+
+    if upweight_rare and strata:
+        sample, factors = _upweight_rare(sample, strata)
+        plan["upweight_factors"] = factors
+    plan["fit_rows"] = len(sample)
+
+    logger.info(f"🎯 Submuestreo para entrenar: {plan['input_rows']:,} → {plan['fit_rows']:,} filas "
+                f"({plan['strategy']})")
+    return sample, plan
+
+
+# ==========================================
+# RESERVORIO POR BLOQUES (ARCHIVOS QUE NO CABEN EN MEMORIA)
+# ==========================================
+
+def reservoir_sample_chunks(chunks: Iterable[pd.DataFrame], k: int,
+                            seed: int = FIT_SAMPLING_SEED) -> Tuple[pd.DataFrame, int]:
+    """
+    Muestra uniforme de ``k`` filas en una sola pasada (algoritmo R vectorizado por bloque).
+
+    Solo se guardan las filas candidatas aceptadas, compactándolas de vez en cuando,
+    así que la memoria es O(k) sin importar el tamaño del archivo.
+
+    Returns:
+        (muestra, filas totales leídas)
+    """
+    rng = np.random.default_rng(seed)
+    slots = np.full(k, -1, dtype=np.int64)  # Fila candidata que ocupa cada hueco del reservorio
+    candidates: List[pd.DataFrame] = []
+    candidate_rows = 0
+    seen = 0
+
+    for chunk in chunks:
+        positions = np.arange(seen, seen + len(chunk))
+        targets = np.where(positions < k, positions, rng.integers(0, positions + 1))
+        accepted = np.flatnonzero(targets < k)
+
+        # Si varias filas del bloque caen en el mismo hueco, gana la última (como en el algoritmo secuencial)
+        reversed_targets = targets[accepted][::-1]
+        _, last = np.unique(reversed_targets, return_index=True)
+        winners = np.sort(accepted[::-1][last])
+
+        candidates.append(chunk.iloc[winners])
+        slots[targets[winners]] = candidate_rows + np.arange(len(winners))
+        candidate_rows += len(winners)
+        seen += len(chunk)
+
+        if candidate_rows > 4 * k:
+            live = slots[slots >= 0]
+            candidates = [pd.concat(candidates, ignore_index=True).iloc[live].reset_index(drop=True)]
+            slots[slots >= 0] = np.arange(len(live))
+            candidate_rows = len(live)
+
+    if not candidates:
+        raise pd.errors.EmptyDataError("No rows to sample from file")
+    pool = pd.concat(candidates, ignore_index=True)
+    return pool.iloc[slots[slots >= 0]].reset_index(drop=True), seen
+
+
+def reservoir_sample_csv(file_path: str, k: int, seed: int = FIT_SAMPLING_SEED) -> Tuple[pd.DataFrame, int]:
+    """Reservorio de ``k`` filas leyendo el CSV por bloques, sin cargarlo entero"""
+    logger.info(f"🪣 Muestreo por reservorio de {k:,} filas en {os.path.basename(file_path)}")
+    try:
+        sample, seen = reservoir_sample_chunks(iter_csv_chunks(file_path, RESERVOIR_CHUNK_SIZE), k, seed)
+    except SchemaMismatchError:
+        sample, seen = reservoir_sample_chunks(pd.read_csv(file_path, chunksize=RESERVOIR_CHUNK_SIZE), k, seed)
+    return sample, seen
@@ -0,0 +1,385 @@
+"""
+Generation Jobs - Cola de trabajos de generación SDV en segundo plano
+Permite lanzar entrenamientos largos (CTGAN, TVAE...) sin bloquear el turno del agente
+"""
+
+import os
+import time
+import uuid
+import queue
+import logging
+import itertools
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, List
+from agents import function_tool, RunContextWrapper
+from sdk_tools_and_context import SyntheticDataContext, run_sdv_generation
+from conditional_sampling import parse_conditions
+from tool_metrics import instrument_tool, track_tool_call
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# CONFIGURACIÓN DE LA COLA
+# ==========================================
+GENERATION_JOB_WORKERS = int(os.getenv("GENERATION_JOB_WORKERS", "2"))
+MAX_FINISHED_JOBS = 200  # Trabajos terminados que se conservan para consulta
+
+# Prioridad: menor número = se ejecuta antes
+MIN_PRIORITY = 1
+MAX_PRIORITY = 10
+DEFAULT_PRIORITY = 5
+
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+
+@dataclass
+class GenerationJob:
+    """Trabajo de generación con sus tiempos y estado"""
+    job_id: str
+    session_id: str
+    params: Dict[str, Any]
+    priority: int
+    context: SyntheticDataContext = field(repr=False)
+
+    status: str = "queued"  # queued | running | completed | failed | cancelled
+    queue_depth_at_submit: int = 0
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    progress: Dict[str, Any] = field(default_factory=dict)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def wait_seconds(self) -> float:
+        """Tiempo en cola hasta empezar (o hasta ahora si sigue en cola)"""
+        end = self.started_at or self.finished_at or time.time()
+        return round(end - self.submitted_at, 3)
+
+    @property
+    def run_seconds(self) -> Optional[float]:
+        """Tiempo de ejecución (o hasta ahora si sigue corriendo)"""
+        if self.started_at is None:
+            return None
+        return round((self.finished_at or time.time()) - self.started_at, 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "priority": self.priority,
+            "params": self.params,
+            "queue_depth_at_submit": self.queue_depth_at_submit,
+            "wait_seconds": self.wait_seconds,
+            "run_seconds": self.run_seconds,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error
+        }
+
+
+class GenerationJobQueue:
+    """
+    Cola con prioridad y un pool acotado de hilos worker.
+
+    Los hilos se arrancan al enviar el primer trabajo. Cada worker ejecuta
+    run_sdv_generation() con el contexto de la sesión que envió el trabajo,
+    así que al terminar el archivo generado queda reflejado en la sesión.
+    """
+
+    def __init__(self, max_workers: int = GENERATION_JOB_WORKERS):
+        self.max_workers = max(1, max_workers)
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._sequence = itertools.count()  # Desempate FIFO entre prioridades iguales
+        self._jobs: "OrderedDict[str, GenerationJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._workers: List[threading.Thread] = []
+
+    def _ensure_workers(self) -> None:
+        while len(self._workers) < self.max_workers:
+            worker = threading.Thread(
+                target=self._worker_loop,
+                name=f"generation-job-{len(self._workers)}",
+                daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def queue_depth(self) -> int:
+        """Trabajos esperando turno"""
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job.status == "queued")
+
+    def submit(self, context: SyntheticDataContext, params: Dict[str, Any],
+               priority: int = DEFAULT_PRIORITY) -> GenerationJob:
+        """Encolar un trabajo y devolverlo inmediatamente"""
+        job = GenerationJob(
+            job_id=uuid.uuid4().hex[:12],
+            session_id=context.session_id,
+            params=params,
+            priority=priority,
+            context=context,
+            queue_depth_at_submit=self.queue_depth()
+        )
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._forget_old_jobs()
+            self._ensure_workers()
+        self._queue.put((priority, next(self._sequence), job.job_id))
+        logger.info(f"📥 Job {job.job_id} encolado (prioridad {priority}, {job.queue_depth_at_submit} en cola)")
+        return job
+
+    def get(self, job_id: str) -> Optional[GenerationJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self, session_id: str) -> List[GenerationJob]:
+        with self._lock:
+            return [job for job in self._jobs.values() if job.session_id == session_id]
+
+    def cancel(self, job_id: str) -> Optional[GenerationJob]:
+        """
+        Cancelar un trabajo. Si está en cola no llegará a ejecutarse; si está
+        corriendo se detiene en la siguiente época o lote.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED_STATUSES:
+                return job
+            job.cancel_event.set()
+            if job.status == "queued":
+                job.status = "cancelled"
+                job.finished_at = time.time()
+        logger.info(f"🛑 Cancelación solicitada para job {job_id}")
+        return job
+
+    def _forget_old_jobs(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in FINISHED_STATUSES]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+    def _worker_loop(self) -> None:
+        while True:
+            _, _, job_id = self._queue.get()
+            try:
+                self._run(job_id)
+            except Exception as e:
+                logger.error(f"Error inesperado en worker de jobs: {e}", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job_id: str) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != "queued":
+                return  # Cancelado mientras esperaba
+            job.status = "running"
+            job.started_at = time.time()
+
+        # Métricas propias del trabajo: no se registran con el nombre de la herramienta para
+        # no mezclarse con una llamada a generate_synthetic_data_with_sdv de la misma sesión
+        with track_tool_call(job.context, "generation_job", register=False) as metrics:
+            def on_progress(progress: Dict[str, Any]) -> None:
+                job.progress = progress
+                metrics.observe(progress["phase"], progress)
+
+            result = run_sdv_generation(
+                job.context,
+                progress_callback=on_progress,
+                cancel_event=job.cancel_event,
+                **job.params
+            )
+            metrics.success = bool(result.get("success"))
+
+        with self._lock:
+            job.finished_at = time.time()
+            job.result = result
+            if result.get("cancelled"):
+                job.status = "cancelled"
+            elif result.get("success"):
+                job.status = "completed"
+            else:
+                job.status = "failed"
+                job.error = result.get("error")
+
+        job.context.add_to_history("generation_job_finished", {
+            "job_id": job.job_id,
+            "status": job.status,
+            "queue_depth_at_submit": job.queue_depth_at_submit,
+            "wait_seconds": job.wait_seconds,
+            "run_seconds": job.run_seconds
+        })
+        logger.info(f"🏁 Job {job.job_id} {job.status}: espera {job.wait_seconds}s, ejecución {job.run_seconds}s")
+
+
+# Cola compartida por todas las sesiones del proceso
+GENERATION_JOBS = GenerationJobQueue()
+
+
+# ==========================================
+# HERRAMIENTAS DE TRABAJOS EN SEGUNDO PLANO
+# ==========================================
+
+@function_tool
+@instrument_tool
+def submit_generation_job(
+    wrapper: RunContextWrapper[SyntheticDataContext],
+    num_rows: int,
+    model_type: str = "GaussianCopula",
+    priority: int = DEFAULT_PRIORITY,
+    batch_size: Optional[int] = None,
+    num_workers: int = 1,
+    seed: Optional[int] = None,
+    partitioned_output: bool = False,
+    max_fit_rows: Optional[int] = None,
+    fit_sampling: str = "stratified",
+    upweight_rare: bool = False,
+    epochs: Optional[int] = None,
+    max_training_seconds: Optional[float] = None,
+    early_stopping: bool = True,
+    incremental: bool = True,
+    conditions: Optional[str] = None,
+    shard_index: Optional[int] = None,
+    shard_count: Optional[int] = None,
+    row_offset: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Lanza una generación SDV en segundo plano y devuelve un job_id al instante.
+    Úsalo para modelos lentos (CTGAN, TVAE, CopulaGAN) o muchas filas.
+
+    Args:
+        num_rows: Número de filas sintéticas a generar
+        model_type: Tipo de modelo (GaussianCopula, CTGAN, CopulaGAN, TVAE, FastCopula)
+        priority: Prioridad de 1 (más urgente) a 10
+        batch_size: Filas por lote de muestreo
+        num_workers: Procesos de muestreo en paralelo
+        seed: Semilla base para resultados reproducibles
+        partitioned_output: Con varios workers, dejar un CSV por shard
+        max_fit_rows: Máximo de filas fuente para entrenar
+        fit_sampling: Submuestreo de entrenamiento (stratified o reservoir)
+        upweight_rare: Replicar las filas de categorías raras al entrenar
+        epochs: Épocas de CTGAN/TVAE/CopulaGAN (por defecto, según la máquina)
+        max_training_seconds: Presupuesto de tiempo de entrenamiento
+        early_stopping: Parar cuando la pérdida deja de mejorar
+        incremental: Si el archivo amplía uno ya entrenado, actualizar solo con las filas nuevas
+        conditions: Valores fijos para todas las filas, p.ej. "country=ES, segment=premium" o JSON
+        shard_index: Shard a generar de un trabajo de num_rows filas repartido en shard_count (requiere seed)
+        shard_count: Número total de shards del trabajo
+        row_offset: Generar num_rows filas a partir de esta fila del trabajo (requiere seed)
+
+    Returns:
+        Identificador del trabajo y posición en la cola
+    """
+    try:
+        context = wrapper.context
+
+        if not context.analyzed_file_path:
+            return {
+                "success": False,
+                "error": "❌ Primero debes analizar un archivo CSV usando analyze_csv_file()"
+            }
+
+        if num_rows <= 0:
+            return {
+                "success": False,
+                "error": "❌ El número de filas debe ser mayor a 0"
+            }
+
+        if not MIN_PRIORITY <= priority <= MAX_PRIORITY:
+            return {
+                "success": False,
+                "error": f"❌ La prioridad debe estar entre {MIN_PRIORITY} y {MAX_PRIORITY}"
+            }
+
+        try:
+            parsed_conditions = parse_conditions(conditions)
+        except ValueError as e:
+            return {"success": False, "error": f"❌ {e}"}
+
+        job = GENERATION_JOBS.submit(context, {
+            "num_rows": num_rows,
+            "model_type": model_type,
+            "batch_size": batch_size,
+            "num_workers": num_workers,
+            "seed": seed,
+            "partitioned_output": partitioned_output,
+            "max_fit_rows": max_fit_rows,
+            "fit_sampling": fit_sampling,
+            "upweight_rare": upweight_rare,
+            "epochs": epochs,
+            "max_training_seconds": max_training_seconds,
+            "early_stopping": early_stopping,
+            "incremental": incremental,
+            "conditions": parsed_conditions,
+            "shard_index": shard_index,
+            "shard_count": shard_count,
+            "row_offset": row_offset
+        }, priority=priority)
+
+        context.add_to_history("generation_job_submitted", {
+            "job_id": job.job_id,
+            "model_type": model_type,
+            "num_rows": num_rows,
+            "priority": priority,
+            "queue_depth_at_submit": job.queue_depth_at_submit
+        })
+
+        return {
+            "success": True,
+            "job_id": job.job_id,
+            "status": job.status,
+            "queue_depth_at_submit": job.queue_depth_at_submit,
+            "message": f"📥 Trabajo {job.job_id} encolado. Consulta su estado con get_generation_job_status()"
+        }
+
+    except Exception as e:
+        error_msg = f"❌ Error encolando trabajo de generación: {str(e)}"
+        logger.error(error_msg)
+        return {"success": False, "error": error_msg}
+
+
+@function_tool
+@instrument_tool
+def get_generation_job_status(wrapper: RunContextWrapper[SyntheticDataContext], job_id: str) -> Dict[str, Any]:
+    """
+    Consulta el estado, progreso y resultado de un trabajo de generación.
+
+    Args:
+        job_id: Identificador devuelto por submit_generation_job()
+
+    Returns:
+        Estado del trabajo (queued, running, completed, failed, cancelled) con tiempos y resultado
+    """
+    job = GENERATION_JOBS.get(job_id)
+    if job is None or job.session_id != wrapper.context.session_id:
+        return {"success": False, "error": f"❌ Trabajo no encontrado: {job_id}"}
+
+    return {"success": True, **job.to_dict()}
+
+
+@function_tool
+@instrument_tool
+def cancel_generation_job(wrapper: RunContextWrapper[SyntheticDataContext], job_id: str) -> Dict[str, Any]:
+    """
+    Cancela un trabajo de generación en cola o en ejecución.
+
+    Args:
+        job_id: Identificador devuelto por submit_generation_job()
+
+    Returns:
+        Estado del trabajo tras solicitar la cancelación
+    """
+    job = GENERATION_JOBS.get(job_id)
+    if job is None or job.session_id != wrapper.context.session_id:
+        return {"success": False, "error": f"❌ Trabajo no encontrado: {job_id}"}
+
+    job = GENERATION_JOBS.cancel(job_id)
+    return {
+        "success": True,
+        "job_id": job.job_id,
+        "status": job.status,
+        "message": "🛑 Cancelación solicitada" if job.status == "running" else f"Estado: {job.status}"
+    }
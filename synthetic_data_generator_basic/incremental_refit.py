@@ -0,0 +1,313 @@
+"""
+Incremental Refit - Actualizar un modelo ya entrenado cuando el CSV fuente crece por el final
+Las exportaciones diarias solo añaden filas: en lugar de reentrenar con todo el histórico,
+se detecta la región añadida (filas + hash del prefijo) y se entrena solo con ella
+"""
+
+import io
+import os
+import copy
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Callable
+
+import pandas as pd
+
+from synthesizer_cache import SYNTHESIZER_CACHE
+from dtype_compaction import apply_compaction
+from column_roles import apply_column_roles, update_column_roles
+from conditional_sampling import build_condition_index, merge_condition_index
+from fit_sampling import sample_for_fit, strata_columns
+from training_monitor import epoch_hook, EpochCallback
+from training_budget import resolve_training_plan, apply_torch_threads
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# CONFIGURACIÓN DEL REENTRENAMIENTO INCREMENTAL
+# ==========================================
+INCREMENTAL_MODELS = ("FastCopula", "CTGAN", "TVAE", "CopulaGAN")
+# Si lo añadido supera esta proporción del archivo anterior, sale más a cuenta reentrenar
+INCREMENTAL_MAX_DELTA_RATIO = float(os.getenv("INCREMENTAL_MAX_DELTA_RATIO", "1.0"))
+WARM_START_EPOCHS = int(os.getenv("WARM_START_EPOCHS", "10"))
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+_local = threading.local()
+_patch_lock = threading.Lock()
+_patched = False
+
+
+# ==========================================
+# REGISTRO Y DETECCIÓN DE ARCHIVOS AMPLIADOS
+# ==========================================
+
+def hash_prefix(file_path: str, size_bytes: int) -> str:
+    """Hash SHA-256 de los primeros ``size_bytes`` bytes (igual que hash_file sobre ese prefijo)"""
+    digest = hashlib.sha256()
+    remaining = size_bytes
+    with open(file_path, "rb") as f:
+        while remaining > 0:
+            chunk = f.read(min(_HASH_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            digest.update(chunk)
+            remaining -= len(chunk)
+    return digest.hexdigest()
+
+
+def record_fit(file_path: str, file_hash: str, source_profile: Dict[str, Any], model_type: str,
+               base_hyperparameters: Dict[str, Any], cache_key: str) -> None:
+    """Registrar un modelo entrenado para poder actualizarlo cuando su archivo crezca"""
+    if "dtypes" not in source_profile:
+        return  # Perfil anterior a este registro: no se sabe cómo leer las filas nuevas
+    SYNTHESIZER_CACHE.add_fit_record({
+        "file_hash": file_hash,
+        "size_bytes": os.path.getsize(file_path),
+        "rows": source_profile["rows"],
+        "columns": list(source_profile["dtypes"]),
+        "model_type": model_type,
+        "base_hyperparameters": base_hyperparameters,
+        "cache_key": cache_key
+    })
+
+
+def find_appended_base(file_path: str, model_type: str,
+                       base_hyperparameters: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Buscar un entrenamiento anterior cuyo archivo sea un prefijo de ``file_path``.
+
+    Un candidato vale si es del mismo modelo y configuración de submuestreo, su tamaño
+    es menor, el archivo nuevo tiene un salto de línea justo en ese límite (el prefijo
+    termina en una fila completa) y el hash de ese prefijo coincide con el del archivo
+    registrado. Se prefiere el prefijo más largo (el delta más pequeño).
+    """
+    if model_type not in INCREMENTAL_MODELS:
+        return None
+
+    size_bytes = os.path.getsize(file_path)
+    candidates = [
+        record for record in SYNTHESIZER_CACHE.get_fit_records()
+        if record["model_type"] == model_type
+        and record["base_hyperparameters"] == base_hyperparameters
+        and record["size_bytes"] < size_bytes
+        and size_bytes - record["size_bytes"] <= INCREMENTAL_MAX_DELTA_RATIO * record["size_bytes"]
+    ]
+    prefix_hashes: Dict[int, str] = {}
+    with open(file_path, "rb") as f:
+        for record in sorted(candidates, key=lambda entry: -entry["size_bytes"]):
+            f.seek(record["size_bytes"] - 1)
+            if f.read(1) != b"\n":
+                continue
+            prefix_size = record["size_bytes"]
+            if prefix_size not in prefix_hashes:
+                prefix_hashes[prefix_size] = hash_prefix(file_path, prefix_size)
+            if prefix_hashes[prefix_size] == record["file_hash"]:
+                return record
+    return None
+
+
+def read_appended_rows(file_path: str, record: Dict[str, Any], dtypes: Dict[str, str]) -> pd.DataFrame:
+    """Leer solo las filas posteriores al prefijo registrado, con los tipos del archivo original"""
+    with open(file_path, "rb") as f:
+        header = f.readline()
+        f.seek(record["size_bytes"])
+        appended = f.read()
+
+    df = pd.read_csv(io.BytesIO(header + appended))
+    if list(df.columns) != record["columns"]:
+        raise ValueError("La cabecera del archivo no coincide con la del archivo entrenado")
+
+    for col, dtype in dtypes.items():
+        if dtype.startswith("datetime64"):
+            df[col] = pd.to_datetime(df[col])
+        elif str(df[col].dtype) != dtype:
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+# ==========================================
+# ARRANQUE EN CALIENTE DE LOS MODELOS NEURONALES
+# ==========================================
+
+class _FittedTransformer:
+    """DataTransformer ya ajustado cuyo ``fit`` no hace nada (conserva la codificación del modelo)"""
+
+    def __init__(self, transformer):
+        self._transformer = transformer
+
+    def fit(self, *args, **kwargs):
+        return None
+
+    def __getattr__(self, name):
+        if name == "_transformer":
+            raise AttributeError(name)
+        return getattr(self._transformer, name)
+
+
+def _unwrap_transformer(model) -> None:
+    """Dejar en el modelo el DataTransformer real (el envoltorio no debe guardarse con él)"""
+    for attribute in ("_transformer", "transformer"):
+        wrapped = getattr(model, attribute, None)
+        if isinstance(wrapped, _FittedTransformer):
+            setattr(model, attribute, wrapped._transformer)
+
+
+def _install_patch() -> None:
+    """Sustituir DataTransformer, Generator y Decoder de ctgan por versiones que reutilizan los del hilo"""
+    global _patched
+    with _patch_lock:
+        if _patched:
+            return
+
+        from ctgan.synthesizers import ctgan as ctgan_module
+        from ctgan.synthesizers import tvae as tvae_module
+
+        def reuse(original, attribute):
+            def factory(*args, **kwargs):
+                state = getattr(_local, "warm_start", None)
+                if state is not None and state.get(attribute) is not None:
+                    return state[attribute]
+                return original(*args, **kwargs)
+            return factory
+
+        original_transformer = ctgan_module.DataTransformer
+        ctgan_module.DataTransformer = reuse(original_transformer, "transformer")
+        tvae_module.DataTransformer = reuse(original_transformer, "transformer")
+        ctgan_module.Generator = reuse(ctgan_module.Generator, "network")
+        tvae_module.Decoder = reuse(tvae_module.Decoder, "network")
+        _patched = True
+
+
+@contextmanager
+def warm_start(model):
+    """
+    Durante el bloque, los entrenamientos de ctgan lanzados desde este hilo reutilizan
+    el codificador de datos y la red generadora (CTGAN) o decodificadora (TVAE) de ``model``.
+    El discriminador (CTGAN) y el codificador (TVAE) no se guardan tras entrenar y se
+    crean de nuevo; se ajustan en las primeras iteraciones del delta.
+    """
+    _install_patch()
+    transformer = getattr(model, "_transformer", None) or getattr(model, "transformer", None)
+    network = getattr(model, "_generator", None) or getattr(model, "decoder", None)
+    if transformer is None or network is None:
+        raise ValueError("El modelo neuronal no tiene pesos entrenados que reutilizar")
+
+    previous = getattr(_local, "warm_start", None)
+    _local.warm_start = {"transformer": _FittedTransformer(transformer), "network": network}
+    try:
+        yield
+    finally:
+        _local.warm_start = previous
+
+
+def warm_start_fit(synthesizer, model_type: str, data: pd.DataFrame, epochs: int,
+                   on_epoch: Optional[EpochCallback] = None) -> None:
+    """
+    Continuar el entrenamiento de un synthesizer neuronal de SDV con filas nuevas.
+
+    Las filas se transforman con los transformadores ya ajustados (no se reajustan sobre
+    el delta) y el modelo interno entrena ``epochs`` épocas partiendo de sus pesos.
+    Lanza una excepción si el delta no encaja en la codificación aprendida.
+    """
+    processed = synthesizer._data_processor.transform(data)
+    model_kwargs = synthesizer._model_kwargs
+    planned_epochs = model_kwargs.get("epochs")
+    model_kwargs["epochs"] = epochs
+    try:
+        with warm_start(synthesizer._model), epoch_hook(on_epoch):
+            if model_type == "CopulaGAN":
+                from sdv.single_table import CTGANSynthesizer
+                # Las marginales gaussianas se conservan: solo se reentrena la parte CTGAN
+                processed = synthesizer._gaussian_normalizer_hyper_transformer.transform(processed)
+                CTGANSynthesizer._fit(synthesizer, processed)
+            else:
+                synthesizer._fit(processed)
+        _unwrap_transformer(synthesizer._model)
+    finally:
+        model_kwargs["epochs"] = planned_epochs
+
+
+# ==========================================
+# ACTUALIZACIÓN INCREMENTAL
+# ==========================================
+
+def refit_appended(file_path: str,
+                   base: Dict[str, Any],
+                   model_type: str,
+                   load_fn: Callable[[str], Any],
+                   fit_row_limit: int,
+                   fit_sampling: str = "stratified",
+                   upweight_rare: bool = False,
+                   on_epoch: Optional[EpochCallback] = None) -> Optional[Dict[str, Any]]:
+    """
+    Actualizar el modelo de ``base`` con las filas añadidas a ``file_path``.
+
+    FastCopula combina sus estadísticos suficientes con los del delta; CTGAN, TVAE y
+    CopulaGAN entrenan WARM_START_EPOCHS épocas sobre el delta desde los pesos cacheados.
+    El modelo cacheado no se modifica (se trabaja sobre una copia).
+
+    Returns:
+        synthesizer actualizado, perfil del archivo nuevo y resumen; None si no se puede
+        actualizar (modelo expulsado de la caché, tipos incompatibles...) y hay que reentrenar
+    """
+    base_profile = SYNTHESIZER_CACHE.get_source_profile(base["file_hash"])
+    base_synthesizer = SYNTHESIZER_CACHE.get(base["cache_key"], load_fn)
+    if base_profile is None or base_synthesizer is None:
+        logger.info("♻️ El modelo del archivo anterior ya no está en caché: se reentrena completo")
+        return None
+
+    try:
+        appended = read_appended_rows(file_path, base, base_profile["dtypes"])
+        delta = apply_column_roles(appended, base_profile.get("column_roles", {}))
+        delta_index = build_condition_index(delta, base_profile["metadata"])
+        delta = apply_compaction(delta, base_profile["compaction"])
+        fit_frame, plan = sample_for_fit(
+            delta,
+            max_rows=fit_row_limit,
+            strategy=fit_sampling,
+            strata=strata_columns(delta, base_profile["metadata"]),
+            upweight_rare=upweight_rare
+        )
+        with SYNTHESIZER_CACHE.sampling_lock(base["cache_key"]):
+            synthesizer = copy.deepcopy(base_synthesizer)  # Sin copiar a medias un muestreo de otra sesión
+
+        if model_type == "FastCopula":
+            synthesizer.partial_fit(fit_frame, represented_rows=len(delta), prior_rows=base["rows"])
+            epochs = None
+        else:
+            categorical = fit_frame.select_dtypes(include="category").columns
+            fit_frame = fit_frame.astype({col: object for col in categorical})
+            plan_epochs = resolve_training_plan(model_type, len(fit_frame))
+            epochs = min(WARM_START_EPOCHS, plan_epochs["epochs"])
+            apply_torch_threads(plan_epochs["torch_threads"])
+            warm_start_fit(synthesizer, model_type, fit_frame, epochs, on_epoch=on_epoch)
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo actualizar el modelo de forma incremental, se reentrena completo: {e}")
+        return None
+
+    rows = base["rows"] + len(delta)
+    scale = rows / max(base["rows"], 1)
+    source_profile = {
+        **base_profile,
+        "rows": rows,
+        "memory_mb": {key: round(value * scale, 2) for key, value in base_profile["memory_mb"].items()},
+        "incremental_from": base["file_hash"]
+    }
+    # Los valores que solo aparecen en el delta también deben poder condicionarse y regenerarse
+    if "column_roles" in base_profile:
+        source_profile["column_roles"] = update_column_roles(base_profile["column_roles"], appended, base["rows"])
+    if "condition_index" in base_profile:
+        source_profile["condition_index"] = merge_condition_index(base_profile["condition_index"], delta_index,
+                                                                  len(delta) / rows)
+    summary = {
+        "mode": "sufficient_statistics" if model_type == "FastCopula" else "warm_start",
+        "base_rows": base["rows"],
+        "appended_rows": len(delta),
+        "delta_fit_rows": len(fit_frame),
+        "delta_fit_sampling": plan,
+        "warm_start_epochs": epochs
+    }
+    logger.info(f"🔁 {model_type} actualizado con {len(delta):,} filas nuevas sobre {base['rows']:,} anteriores")
+    return {"synthesizer": synthesizer, "source_profile": source_profile, "summary": summary}
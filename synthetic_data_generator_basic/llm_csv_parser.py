@@ -0,0 +1,180 @@
+"""
+LLM CSV Parser - Parseo estricto de las filas CSV que devuelve el LLM
+Cada línea se lee con el módulo csv (comillas incluidas) y se comprueba contra la
+estructura diseñada: número de columnas y, si el esquema tiene tipos, números, fechas y
+booleanos coercionados por lotes con pandas. La coerción solo decide si la fila vale: se
+escribe el texto que dio el modelo. Las filas rechazadas se devuelven con su motivo para
+pedir su reparación en una sola petición
+"""
+
+import io
+import re
+import csv
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# CONFIGURACIÓN DEL PARSEO
+# ==========================================
+COLUMN_NAME_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_ \-]{0,63}$")
+MISSING_VALUES = {"", "null", "none", "nan", "n/a", "na"}
+BOOLEAN_VALUES = {
+    "true": "true", "false": "false", "yes": "true", "no": "false",
+    "si": "true", "sí": "true", "1": "true", "0": "false"
+}
+MIN_HEADER_COLUMNS = 2
+# Países que escriben las fechas con el mes primero (en el resto, 03/04 es 3 de abril)
+MONTH_FIRST_COUNTRIES = {
+    "united states", "usa", "us", "u.s.", "estados unidos", "eeuu", "ee.uu.",
+    "philippines", "filipinas", "belize", "belice"
+}
+
+# Rechazo de una línea: (texto original, motivo)
+Rejection = Tuple[str, str]
+
+
+def _is_fence(line: str) -> bool:
+    return line.startswith("```")
+
+
+def dayfirst_for(country: Optional[str]) -> bool:
+    """Si las fechas de ``country`` llevan el día delante del mes (todos salvo MONTH_FIRST_COUNTRIES)"""
+    return (country or "").strip().lower() not in MONTH_FIRST_COUNTRIES
+
+
+def parse_header_line(response: str) -> Optional[List[str]]:
+    """
+    Primera línea de la respuesta de diseño que es una cabecera CSV válida: al menos
+    MIN_HEADER_COLUMNS nombres de columna distintos con forma de identificador.
+    """
+    for line in response.splitlines():
+        line = line.strip()
+        if not line or _is_fence(line):
+            continue
+        columns = [name.strip() for name in next(csv.reader(io.StringIO(line)), [])]
+        if (len(columns) >= MIN_HEADER_COLUMNS
+                and all(COLUMN_NAME_RE.match(name) for name in columns)
+                and len({name.lower() for name in columns}) == len(columns)):
+            return columns
+    return None
+
+
+class CsvLineAssembler:
+    """Junta los fragmentos del stream en líneas CSV completas (con comillas abiertas, el salto es parte del valor)"""
+
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        self._buffer += text
+        lines = []
+        search_from = 0
+        while True:
+            newline = self._buffer.find("\n", search_from)
+            if newline == -1:
+                return lines
+            candidate = self._buffer[:newline]
+            if candidate.count('"') % 2:
+                search_from = newline + 1
+                continue
+            lines.append(candidate.rstrip("\r"))
+            self._buffer = self._buffer[newline + 1:]
+            search_from = 0
+
+    def flush(self) -> List[str]:
+        rest, self._buffer = self._buffer, ""
+        return [rest] if rest.strip() else []
+
+
+class RowParser:
+    """
+    Parseo estricto contra la estructura diseñada.
+
+    ``parse_line`` separa cada línea en fila candidata, ruido (vacías, bloques de código,
+    prosa sin separadores, cabecera repetida) o rechazo (columnas de más o de menos).
+    ``validate`` comprueba los tipos de un lote de filas candidatas de una vez y devuelve
+    las filas aceptadas, con su texto original, y los rechazos. ``dayfirst`` indica cómo
+    leer fechas como 03/04/2024 (ver dayfirst_for).
+    """
+
+    def __init__(self, columns: List[str], column_types: Optional[Dict[str, str]] = None,
+                 dayfirst: bool = True):
+        self.columns = columns
+        self.column_types = {col: kind for col, kind in (column_types or {}).items() if col in columns}
+        self.dayfirst = dayfirst
+        self._header = [c.lower() for c in columns]
+
+    def parse_line(self, line: str) -> Tuple[Optional[List[str]], Optional[Rejection]]:
+        stripped = line.strip()
+        if not stripped or _is_fence(stripped):
+            return None, None
+        try:
+            row = [value.strip() for value in next(csv.reader(io.StringIO(stripped), strict=True), [])]
+        except csv.Error as e:
+            return None, (stripped, f"malformed CSV: {e}")
+        if len(row) < max(2, len(self.columns) // 2) or (len(row) != len(self.columns) and stripped.endswith(":")):
+            return None, None  # Prosa del modelo ("Sure, here are the rows:"), no una fila
+        if [value.lower() for value in row] == self._header:
+            return None, None
+        if len(row) != len(self.columns):
+            return None, (stripped, f"{len(row)} fields instead of {len(self.columns)}")
+        return row, None
+
+    def validate(self, rows: List[List[str]], lines: List[str]) -> Tuple[List[List[str]], List[Rejection]]:
+        """
+        Coerción vectorizada por columna; una fila con cualquier valor inválido se rechaza entera.
+
+        Las filas aceptadas conservan el texto original (ceros a la izquierda, formato de
+        fecha...); solo los marcadores de ausencia de las columnas tipadas (null, n/a...)
+        se escriben vacíos.
+        """
+        if not rows:
+            return [], []
+        if not self.column_types:
+            return list(rows), []
+
+        df = pd.DataFrame(rows, columns=self.columns, dtype="string")
+        reasons = pd.Series("", index=df.index, dtype="object")
+        for col, kind in self.column_types.items():
+            values = df[col].str.strip()
+            missing = values.str.lower().isin(MISSING_VALUES).fillna(True)
+            if kind in ("integer", "float"):
+                numbers = pd.to_numeric(values.where(~missing), errors="coerce")
+                invalid = ~missing & numbers.isna()
+                if kind == "integer":
+                    invalid |= ~missing & numbers.notna() & (numbers % 1 != 0)
+            elif kind == "datetime":
+                dates = pd.to_datetime(values.where(~missing), errors="coerce", format="mixed",
+                                       dayfirst=self.dayfirst)
+                invalid = ~missing & dates.isna()
+            elif kind == "boolean":
+                invalid = ~missing & values.str.lower().map(BOOLEAN_VALUES).isna()
+            else:
+                continue
+            reasons[invalid.fillna(False).to_numpy(dtype=bool)] += f"{col} is not {kind}; "
+            df[col] = values.where(~missing, "").fillna("")
+
+        bad = reasons.str.len().to_numpy() > 0
+        accepted = df[~bad].fillna("").values.tolist()
+        rejected = [(lines[i], reasons.iat[i].rstrip("; ")) for i in range(len(rows)) if bad[i]]
+        return accepted, rejected
+
+
+def build_repair_prompt(rejected: List[Rejection], columns: List[str], column_types: Dict[str, str]) -> str:
+    """Una sola petición con todas las líneas rechazadas y el motivo de cada una"""
+    types = ", ".join(f"{col}: {column_types[col]}" for col in columns if col in column_types)
+    lines = "\n".join(f"{line}    <- {reason}" for line, reason in rejected)
+    prompt = f"""These CSV lines do not match the header: {",".join(columns)}
+"""
+    if types:
+        prompt += f"Column types: {types}\n"
+    prompt += f"""
+Fix each line so it has exactly {len(columns)} fields with valid values. Quote fields that contain commas.
+Output ONLY the fixed CSV lines, one per input line, in the same order, without the header or the comments after "<-".
+
+{lines}"""
+    return prompt
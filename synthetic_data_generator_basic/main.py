@@ -69,6 +69,20 @@ async def cli_loop():
                     print(f"\n🛠️  Llamando herramienta: {tool_name}")
                     print(f"🤖 {current_agent}: ", end="", flush=True)
                 
+                elif event.type == "tool_progress":
+                    progress = event.data
+                    if progress.get("epoch"):
+                        print(f"\n⏳ {progress.get('phase')}: época {progress['epoch']}/{progress.get('total_epochs')}", end="", flush=True)
+                    elif progress.get("total_rows"):
+                        print(f"\n⏳ {progress.get('phase')}: {progress.get('rows_sampled', progress.get('rows_generated', 0)):,}/{progress['total_rows']:,} filas", end="", flush=True)
+                    else:
+                        print(f"\n⏳ {progress.get('phase')}...", end="", flush=True)
+
+                elif event.type == "tool_metrics":
+                    metrics = event.data
+                    phases = ", ".join(f"{p['phase']} {p['wall_seconds']:.2f}s" for p in metrics.get("phases", []))
+                    print(f"\n📏 {metrics.get('tool')}: {metrics.get('wall_seconds', 0):.2f}s ({phases})", end="", flush=True)
+
                 elif event.type == "tool_result":
                     print(f"\n✅ Herramienta completada")
                     print(f"🤖 {current_agent}: ", end="", flush=True)
@@ -0,0 +1,295 @@
+"""
+Model Calibration - Coste medido de cada modelo sobre el archivo analizado
+Entrena cada modelo sobre submuestras pequeñas (y pocas épocas en los neuronales),
+mide tiempo de ajuste, velocidad de muestreo y pico de memoria, y extrapola a las
+filas reales del archivo en esta máquina. Las mediciones se cachean por hash de archivo
+"""
+
+import os
+import time
+import logging
+import warnings
+import tracemalloc
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from sdk_tools_and_context import SyntheticDataContext
+from synthesizer_cache import SYNTHESIZER_CACHE
+from fit_sampling import MAX_FIT_ROWS, sample_for_fit, strata_columns, reservoir_sample_csv
+from dtype_compaction import compact_dataframe
+from fast_copula import MODELLED_SDTYPES
+from column_roles import detect_column_roles, apply_column_roles, model_metadata
+from training_monitor import epoch_hook
+from training_budget import resolve_training_plan
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# CONFIGURACIÓN DE LA CALIBRACIÓN
+# ==========================================
+CALIBRATION_ROWS = int(os.getenv("CALIBRATION_ROWS", "2000"))
+CALIBRATION_EPOCHS = 2           # Épocas por medición en CTGAN/TVAE/CopulaGAN
+CALIBRATION_SAMPLE_ROWS = 2000   # Filas muestreadas para medir la velocidad de muestreo
+WARMUP_ROWS = 100                # Ajuste previo que absorbe el coste de arranque
+CALIBRATION_VERSION = 1          # Cambiarla invalida las calibraciones guardadas
+
+MODEL_TYPES = ("FastCopula", "GaussianCopula", "CTGAN", "TVAE", "CopulaGAN")
+NEURAL_MODELS = ("CTGAN", "TVAE", "CopulaGAN")
+
+
+def _synthesizer_class(model_type: str):
+    if model_type == "GaussianCopula":
+        from sdv.single_table import GaussianCopulaSynthesizer as Synthesizer
+    elif model_type == "CTGAN":
+        from sdv.single_table import CTGANSynthesizer as Synthesizer
+    elif model_type == "CopulaGAN":
+        from sdv.single_table import CopulaGANSynthesizer as Synthesizer
+    elif model_type == "TVAE":
+        from sdv.single_table import TVAESynthesizer as Synthesizer
+    elif model_type == "FastCopula":
+        from fast_copula import FastCopulaSynthesizer as Synthesizer
+    else:
+        raise ValueError(f"Modelo no soportado: {model_type}")
+    return Synthesizer
+
+
+# ==========================================
+# MEDICIÓN
+# ==========================================
+
+def _calibration_frame(context: SyntheticDataContext):
+    """Submuestra estratificada y compactada (como la del pipeline, sin IDs/PII/texto) + metadatos SDV"""
+    from sdv.metadata import SingleTableMetadata
+
+    info = context.analyzed_file_info or {}
+    if info.get("profiling_mode") == "streaming":
+        source_df, _ = reservoir_sample_csv(context.analyzed_file_path, CALIBRATION_ROWS)
+    else:
+        source_df = context.load_dataframe(context.analyzed_file_path)
+
+    profile = SYNTHESIZER_CACHE.get_source_profile(context.file_hash(context.analyzed_file_path))
+    if profile is not None and "column_roles" in profile:
+        metadata = SingleTableMetadata.load_from_dict(profile["metadata"])
+        column_roles = profile["column_roles"]
+    else:
+        detected = SingleTableMetadata()
+        detected.detect_from_dataframe(source_df.head(CALIBRATION_ROWS))
+        column_roles = detect_column_roles(source_df, detected.to_dict())
+        metadata = SingleTableMetadata.load_from_dict(model_metadata(detected.to_dict(), column_roles))
+    metadata_dict = metadata.to_dict()
+    source_df = apply_column_roles(source_df, column_roles)
+
+    exclude = [col for col, spec in metadata_dict["columns"].items() if spec.get("sdtype") not in MODELLED_SDTYPES]
+    frame, _ = compact_dataframe(source_df, exclude=exclude)
+    frame, _ = sample_for_fit(frame, max_rows=CALIBRATION_ROWS, strata=strata_columns(frame, metadata_dict))
+    return frame.reset_index(drop=True), metadata
+
+
+def _measure_fit(model_type: str, metadata, frame: pd.DataFrame, epochs: int = CALIBRATION_EPOCHS,
+                 trace_memory: bool = False) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Entrenar una vez midiendo tiempo total y tiempo por época (neuronales).
+    Con ``trace_memory`` mide el pico de memoria con tracemalloc (ralentiza el ajuste,
+    por eso el tiempo y la memoria se miden en entrenamientos distintos).
+    """
+    Synthesizer = _synthesizer_class(model_type)
+    if model_type in NEURAL_MODELS:
+        synthesizer = Synthesizer(metadata, epochs=epochs)
+        # Los modelos neuronales rechazan columnas 'category'
+        frame = frame.astype({col: object for col in frame.select_dtypes(include="category").columns})
+    else:
+        synthesizer = Synthesizer(metadata)
+
+    epoch_ends: List[float] = []
+
+    def on_epoch(epochs_done: int, total_epochs: int) -> bool:
+        epoch_ends.append(time.perf_counter())
+        return True
+
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        with warnings.catch_warnings(), epoch_hook(on_epoch):
+            warnings.simplefilter("ignore")
+            synthesizer.fit(frame)
+        measurement = {"rows": len(frame), "fit_seconds": time.perf_counter() - start}
+        if trace_memory:
+            measurement["peak_memory_mb"] = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+
+    if len(epoch_ends) >= 2:
+        measurement["epoch_seconds"] = (epoch_ends[-1] - epoch_ends[0]) / (len(epoch_ends) - 1)
+    return synthesizer, measurement
+
+
+def _linear(points: Sequence[Tuple[float, float]]) -> Dict[str, float]:
+    """Recta coste = fijo + por_fila * filas a partir de dos mediciones (sin pendientes ni fijos negativos)"""
+    (x1, y1), (x2, y2) = points
+    per_row = max((y2 - y1) / (x2 - x1), 0.0) if x2 != x1 else 0.0
+    fixed = max(y2 - per_row * x2, 0.0)
+    return {"fixed": fixed, "per_row": per_row}
+
+
+def calibrate_model(model_type: str, metadata, frame: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Medir un modelo con la mitad y con toda la submuestra y ajustar una recta al tiempo.
+
+    Un primer ajuste diminuto descarta el coste de arranque (imports, cachés). En los
+    neuronales el tiempo se separa en preparación (transformadores, recta en filas) y
+    épocas (tiempo por época proporcional a las filas). La memoria se escala de forma
+    proporcional al pico medido con toda la submuestra, como cota superior.
+    """
+    _measure_fit(model_type, metadata, frame.iloc[:WARMUP_ROWS], epochs=1)
+    _, small = _measure_fit(model_type, metadata, frame.iloc[: max(len(frame) // 2, 2)])
+    synthesizer, large = _measure_fit(model_type, metadata, frame)
+
+    start = time.perf_counter()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        synthesizer.sample(CALIBRATION_SAMPLE_ROWS)
+    sample_seconds = time.perf_counter() - start
+
+    _, traced = _measure_fit(model_type, metadata, frame, trace_memory=True)
+
+    calibration: Dict[str, Any] = {
+        "rows": [small["rows"], large["rows"]],
+        "fit_seconds": [round(small["fit_seconds"], 4), round(large["fit_seconds"], 4)],
+        "peak_memory_mb": round(traced["peak_memory_mb"], 3),
+        "memory_mb_per_row": traced["peak_memory_mb"] / traced["rows"],
+        "sample_rows_per_second": CALIBRATION_SAMPLE_ROWS / sample_seconds if sample_seconds > 0 else None
+    }
+
+    if "epoch_seconds" in large:
+        setup = [(m["rows"], max(m["fit_seconds"] - CALIBRATION_EPOCHS * m.get("epoch_seconds", 0.0), 0.0))
+                 for m in (small, large)]
+        calibration["setup_seconds"] = _linear(setup)
+        calibration["epoch_seconds_per_row"] = large["epoch_seconds"] / large["rows"]
+    else:
+        calibration["fit_seconds_model"] = _linear(
+            [(small["rows"], small["fit_seconds"]), (large["rows"], large["fit_seconds"])]
+        )
+    return calibration
+
+
+# ==========================================
+# EXTRAPOLACIÓN
+# ==========================================
+
+def extrapolate(model_type: str, calibration: Dict[str, Any], fit_rows: int, num_rows: int) -> Dict[str, Any]:
+    """
+    Estimaciones para entrenar con ``fit_rows`` filas y muestrear ``num_rows``.
+    Los neuronales usan las épocas del plan de training_budget: es una cota superior,
+    la parada temprana suele terminar antes.
+    """
+    if "epoch_seconds_per_row" in calibration:
+        epochs = resolve_training_plan(model_type, fit_rows)["epochs"]
+        setup = calibration["setup_seconds"]
+        epoch_seconds = calibration["epoch_seconds_per_row"] * fit_rows
+        fit_seconds = setup["fixed"] + setup["per_row"] * fit_rows + epochs * epoch_seconds
+    else:
+        epochs = None
+        epoch_seconds = None
+        model = calibration["fit_seconds_model"]
+        fit_seconds = model["fixed"] + model["per_row"] * fit_rows
+
+    throughput = calibration["sample_rows_per_second"]
+    return {
+        "model_type": model_type,
+        "estimated_fit_seconds": round(fit_seconds, 1),
+        "epochs": epochs,
+        "estimated_epoch_seconds": round(epoch_seconds, 3) if epoch_seconds is not None else None,
+        "sample_rows_per_second": int(throughput) if throughput else None,
+        "estimated_sample_seconds": round(num_rows / throughput, 1) if throughput else None,
+        "estimated_peak_memory_mb": round(max(calibration["memory_mb_per_row"] * fit_rows,
+                                              calibration["peak_memory_mb"]), 1)
+    }
+
+
+def estimate_model_costs(context: SyntheticDataContext,
+                         num_rows: Optional[int] = None,
+                         models: Optional[Sequence[str]] = None,
+                         max_fit_rows: Optional[int] = None,
+                         refresh: bool = False) -> Dict[str, Any]:
+    """
+    Calibrar (o leer de caché) los modelos y estimar su coste sobre el archivo completo.
+    Bloqueante (entrena modelos): llamarlo desde un executor.
+    """
+    try:
+        if not context.analyzed_file_path:
+            return {
+                "success": False,
+                "error": "❌ Primero debes analizar un archivo CSV usando analyze_csv_file()"
+            }
+        models = list(models or MODEL_TYPES)
+        unknown = [model for model in models if model not in MODEL_TYPES]
+        if unknown:
+            return {
+                "success": False,
+                "error": f"❌ Modelos no soportados: {', '.join(unknown)}. Modelos disponibles: {', '.join(MODEL_TYPES)}"
+            }
+
+        file_hash = context.file_hash(context.analyzed_file_path)
+        cached = None if refresh else SYNTHESIZER_CACHE.get_calibration(file_hash)
+        if cached is not None and (cached.get("version") != CALIBRATION_VERSION
+                                   or cached.get("cpu_count") != os.cpu_count()):
+            cached = None  # Otra versión de la calibración u otra máquina: se mide de nuevo
+        calibration = cached or {"version": CALIBRATION_VERSION, "cpu_count": os.cpu_count(), "models": {}}
+
+        pending = [model for model in models if model not in calibration["models"]]
+        if pending:
+            context.report_progress("list_sdv_models", "calibrating", models=pending)
+            frame, metadata = _calibration_frame(context)
+            calibration["calibration_rows"] = len(frame)
+            for model_type in pending:
+                logger.info(f"⏱️ Calibrando {model_type} con {len(frame)} filas")
+                try:
+                    calibration["models"][model_type] = calibrate_model(model_type, metadata, frame)
+                except Exception as e:
+                    logger.warning(f"⚠️ No se pudo calibrar {model_type}: {e}")
+                    calibration["models"][model_type] = {"error": str(e)}
+                context.report_progress("list_sdv_models", "calibrated", model_type=model_type)
+            SYNTHESIZER_CACHE.put_calibration(file_hash, calibration)
+
+        source_rows = (context.analyzed_file_info or {}).get("rows") or calibration["calibration_rows"]
+        fit_rows = min(source_rows, max_fit_rows or MAX_FIT_ROWS)
+        num_rows = num_rows or source_rows
+
+        estimates = []
+        for model_type in models:
+            measured = calibration["models"][model_type]
+            if "error" in measured:
+                estimates.append({"model_type": model_type, "error": f"❌ Calibración fallida: {measured['error']}"})
+            else:
+                estimates.append(extrapolate(model_type, measured, fit_rows, num_rows))
+        estimates.sort(key=lambda estimate: estimate.get("estimated_fit_seconds", float("inf")))
+
+        context.add_to_history("list_sdv_models", {
+            "models": models,
+            "calibrated": pending,
+            "fit_rows": fit_rows,
+            "num_rows": num_rows
+        })
+
+        return {
+            "success": True,
+            "source_rows": source_rows,
+            "fit_rows": fit_rows,
+            "num_rows": num_rows,
+            "calibration_rows": calibration["calibration_rows"],
+            "calibration_cached": not pending,
+            "cpu_count": calibration["cpu_count"],
+            "models": estimates,
+            "message": (
+                f"⏱️ Estimaciones medidas en esta máquina para entrenar con {fit_rows:,} filas y generar "
+                f"{num_rows:,}; la memoria cuenta solo asignaciones de Python/NumPy"
+            )
+        }
+
+    except Exception as e:
+        error_msg = f"❌ Error calibrando modelos: {str(e)}"
+        logger.error(error_msg)
+        return {"success": False, "error": error_msg}
@@ -64,18 +64,27 @@ sample_data_agent = Agent[SyntheticDataContext](
 
     Solicitar archivo: Si el usuario no ha proporcionado la ruta, pregúntala.
     Analizar datos: Usa analyze_csv_file() para examinar el archivo.
-    Explicar modelos disponibles: Usa list_sdv_models() y muestra las opciones con su explicación.
+    Explicar modelos disponibles: Usa list_sdv_models() y muestra las opciones con su explicación y su coste medido.
     Recomendar modelo: Según el análisis (tipos de columnas, valores faltantes, tamaño), elige el mejor modelo.
     Generar datos: Cuando el usuario elija modelo y cantidad, usa generate_synthetic_data_with_sdv().
     Proporcionar descarga: Usa create_download_link() para ofrecer el archivo al usuario.
 
+    VISTA PREVIA (CTGAN, TVAE, CopulaGAN):
+    generate_synthetic_data_with_sdv() devuelve en ~1 segundo una vista previa (FastCopula) y un job_id del modelo pedido.
+    Muestra al usuario las filas de la vista previa y explica que el modelo completo sigue entrenando.
+    Consulta ambas etapas con get_session_status() (progressive_generation); al completarse, el archivo final sustituye a la vista previa.
+
+    TRABAJOS EN SEGUNDO PLANO (CTGAN, TVAE, CopulaGAN o muchas filas):
+    Si el usuario no quiere vista previa, usa submit_generation_job(): devuelve un job_id al instante.
+    Informa al usuario del job_id y consulta el avance con get_generation_job_status(job_id).
+    Si el usuario quiere parar, usa cancel_generation_job(job_id).
+
     MODELOS SDV – CUÁNDO RECOMENDARLOS (con detalle):
     GaussianCopula
     Descripción: Modelo rápido y eficiente basado en cópulas gaussianas.
     Pros: Muy rápido, bajo uso de memoria, bueno para datos numéricos.
     Contras: Limitado con datos categóricos complejos, asume distribuciones gaussianas.
     Ideal para: Datasets pequeños o medianos con principalmente datos numéricos y necesidad de velocidad.
-    Tiempo de entrenamiento: Segundos
     Calidad: Buena
     Recomendado para: Prototipos rápidos, datos numéricos, datasets pequeños-medianos
 
@@ -85,7 +94,6 @@ sample_data_agent = Agent[SyntheticDataContext](
     Pros: Excelente calidad, maneja bien datos categóricos, resultados muy realistas.
     Contras: Lento, alto consumo de memoria, necesita más datos para funcionar bien.
     Ideal para: Datos complejos con muchas columnas categóricas donde la calidad es la prioridad.
-    Tiempo de entrenamiento: Minutos a horas
     Calidad: Excelente
     Recomendado para: Datos complejos, muchas columnas categóricas, cuando la calidad es prioritaria
     
@@ -95,7 +103,6 @@ sample_data_agent = Agent[SyntheticDataContext](
     Pros: Buen equilibrio entre velocidad y calidad, versátil, rendimiento general sólido.
     Contras: No es el mejor en ningún aspecto específico.
     Ideal para: Casos generales donde se quiere un buen balance.
-    Tiempo de entrenamiento: Minutos
     Calidad: Muy buena
     Recomendado para: Datos mixtos, uso general, cuando no estás seguro de qué modelo elegir
 
@@ -104,10 +111,28 @@ sample_data_agent = Agent[SyntheticDataContext](
     Pros: Excelente manejo de valores faltantes, robusto, buena calidad.
     Contras: Más lento que GaussianCopula, configuración más compleja.
     Ideal para: Datos con muchas columnas incompletas o distribuciones no gaussianas.
-    Tiempo de entrenamiento: Minutos
     Calidad: Muy buena
     Recomendado para: Datos de salud, financieros, con valores faltantes o distribuciones complejas
 
+    FastCopula
+    Descripción: Cópula gaussiana propia, vectorizada con NumPy (misma idea que GaussianCopula, sin la sobrecarga de SDV).
+    Pros: Decenas de veces más rápido que GaussianCopula al entrenar y muestrear, ideal para tablas anchas o millones de filas.
+    Contras: Mismas limitaciones que GaussianCopula con relaciones no lineales complejas.
+    Ideal para: Tablas anchas principalmente numéricas, muchas filas, o cuando se necesita el resultado en segundos.
+    Calidad: Buena
+    Recomendado para: Grandes volúmenes, prototipos rápidos, tablas con muchas columnas numéricas
+
+    COSTE DE CADA MODELO:
+    No adivines tiempos de entrenamiento: list_sdv_models(num_rows=...) los mide sobre el archivo analizado en esta máquina.
+    Usa estimated_fit_seconds, estimated_sample_seconds y estimated_peak_memory_mb para comparar modelos.
+    La primera llamada tarda unos segundos por modelo (calibración); después se reutiliza para ese archivo.
+    CTGAN, TVAE y CopulaGAN ajustan épocas y lote a la máquina; TVAE para solo cuando su pérdida se estanca (CTGAN y CopulaGAN entrenan las épocas del plan salvo que se agote max_training_seconds).
+    Si el usuario tiene prisa, pasa max_training_seconds; el resultado indica en training.epochs_run las épocas realmente entrenadas.
+    Si el usuario vuelve a subir el mismo archivo con filas nuevas al final, el modelo se actualiza solo con esas filas (incremental_refit en el resultado).
+    Las columnas de IDs, PII y texto libre no entran en el modelo: se regeneran con formato realista (column_treatments en el resultado explica qué se hizo con cada una).
+    Si el usuario pide filas con valores concretos ("10k filas con country=ES y segment=premium"), pásalos en conditions="country=ES, segment=premium"; FastCopula los cumple sin rechazo, incluso en combinaciones raras. Con los modelos SDV, las condiciones sobre columnas categóricas se muestrean con un submodelo FastCopula (model_used lo indica).
+    Para repartir un trabajo enorme entre máquinas, usa la misma seed con shard_index/shard_count (num_rows = total) o row_offset; repetir un shard da exactamente las mismas filas.
+
     CONSEJOS PARA RECOMENDACIONES:
     Analiza tipos de columnas, valores faltantes, tamaño del dataset
     Explica por qué recomiendas ese modelo
@@ -190,6 +215,11 @@ Puntos clave
 •	Resume y valida antes de generar prompts
 •	Los datos deben reflejar comportamientos realistas, no aleatoriedad
 
+Generación
+•	generate_synthetic_data_dynamic escribe por defecto todas las filas con el LLM (mode="llm")
+•	Para volúmenes grandes (miles de filas o más), ofrece mode="amplify": el LLM escribe una semilla pequeña y el resto sale de un modelo estadístico local, mucho más rápido. Explica al usuario que esas filas no las escribe el LLM
+•	mode="auto" amplifica solo los trabajos de más de 1000 filas
+
 """,
     tools=get_tools_for_agent("pure_synthetic"), 
     handoffs=[]
@@ -3,75 +3,401 @@ Pure Synthetic Tools - Versión dinámica sin templates fijos
 """
 
 import os
+import re
+import csv
+import time
+import uuid
+import random
+import asyncio
+import logging
+import functools
+from contextlib import aclosing, nullcontext
 import pandas as pd
 import openai
-from typing import Dict, Any
+from typing import Dict, Any, Optional, List, Tuple
 from pathlib import Path
 from agents import function_tool, RunContextWrapper
-from sdk_tools_and_context import SyntheticDataContext
+from sdk_tools_and_context import SyntheticDataContext, SDV_EXECUTOR
+from sdv_sampling import resolve_row_range, derive_block_seed
+from tool_metrics import instrument_tool, measure_phase
+from schema_cache import SCHEMA_CACHE, infer_column_types
+from llm_csv_parser import CsvLineAssembler, RowParser, parse_header_line, build_repair_prompt, dayfirst_for
+from seed_amplification import (
+    amplify_seed, seed_cache_path, AMPLIFY_SEED_ROWS, AMPLIFY_MIN_ROWS, AMPLIFY_MAX_ROWS, MIN_SEED_ROWS
+)
 
 # Directorio base del proyecto
 BASE_DIR = Path(__file__).parent
 OUTPUT_DIR = BASE_DIR / "Synthetic data generated"
 
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# CONFIGURACIÓN DE LA GENERACIÓN POR TROZOS
+# ==========================================
+NEMOTRON_MODEL = "nvidia/llama-3.1-nemotron-70b-instruct"
+LLM_CHUNK_ROWS = int(os.getenv("LLM_CHUNK_ROWS", "50"))             # Filas máximas por petición
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "8"))            # Peticiones simultáneas al LLM
+LLM_CHUNK_RETRIES = int(os.getenv("LLM_CHUNK_RETRIES", "2"))        # Reintentos de los trozos que fallan
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", "1.0"))  # Espera antes del primer reintento
+LLM_MAX_ROWS = int(os.getenv("LLM_MAX_ROWS", "20000"))              # Límite de filas por llamada a la herramienta
+LLM_CHUNK_MAX_TOKENS = int(os.getenv("LLM_CHUNK_MAX_TOKENS", "4000"))  # Salida máxima por petición
+LLM_STREAMING = os.getenv("LLM_STREAMING", "1") == "1"            # Consumir la respuesta por fragmentos
+LLM_PROGRESS_ROWS = 25           # Filas escritas entre avisos de progreso
+LLM_VALIDATE_ROWS = int(os.getenv("LLM_VALIDATE_ROWS", "10"))       # Filas por lote de validación de tipos
+LLM_REPAIR_MAX_ROWS = int(os.getenv("LLM_REPAIR_MAX_ROWS", "50"))   # Filas rechazadas por petición de reparación
+SCHEMA_SAMPLE_ROWS = 200         # Filas que se guardan para inferir los tipos de columna
+TOKENS_PER_FIELD = 8             # Estimación de tokens por celda generada
+CHUNK_TOKEN_MARGIN = 1.5         # Margen sobre la estimación para no cortar la última fila
+
+# Modos de generación: todo del LLM, semilla del LLM + modelo local, o elegir por tamaño
+GENERATION_MODES = ("llm", "amplify", "auto")
+
+# Columnas clave que se reescriben con la secuencia global de filas (los shards no colisionan)
+KEY_COLUMN_RE = re.compile(r"(^id$|_id$|^id_|^key$|_key$)", re.IGNORECASE)
+
+# Un shard genera la semilla y los demás del mismo proceso esperan a reutilizarla
+_seed_locks: Dict[str, asyncio.Lock] = {}
+
 # Configurar cliente NVIDIA
-nvidia_client = openai.OpenAI(
-    base_url="https://integrate.api.nvidia.com/v1",
-    api_key="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"
-)
+NVIDIA_BASE_URL = "https://integrate.api.nvidia.com/v1"
+
+
+def nvidia_api_key() -> str:
+    """Clave de NVIDIA_API_KEY (se lee al crear el cliente, después de cargar el .env)"""
+    api_key = os.getenv("NVIDIA_API_KEY")
+    if not api_key:
+        raise RuntimeError("No se encontró NVIDIA_API_KEY (añádela al entorno o al archivo .env)")
+    return api_key
+
 
-def call_nvidia_nemotron(prompt, max_tokens=1000):
-    """Llamar a Nemotron 70B via NVIDIA API"""
+@functools.lru_cache(maxsize=None)
+def get_nvidia_client() -> openai.OpenAI:
+    return openai.OpenAI(base_url=NVIDIA_BASE_URL, api_key=nvidia_api_key())
+
+
+@functools.lru_cache(maxsize=None)
+def get_nvidia_async_client() -> openai.AsyncOpenAI:
+    return openai.AsyncOpenAI(base_url=NVIDIA_BASE_URL, api_key=nvidia_api_key())
+
+
+def retry_delay(attempt: int, base_seconds: float = LLM_RETRY_BASE_SECONDS) -> float:
+    """Espera exponencial con jitter antes del reintento ``attempt`` (los trozos no reintentan a la vez)"""
+    return base_seconds * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+
+
+def call_nvidia_nemotron(prompt, max_tokens=1000, seed: Optional[int] = None):
+    """Llamar a Nemotron 70B via NVIDIA API (con seed: temperatura 0 y semilla, para repetir respuestas)"""
     try:
-        response = nvidia_client.chat.completions.create(
-            model="nvidia/llama-3.1-nemotron-70b-instruct",
+        extra = {"seed": seed} if seed is not None else {}
+        response = get_nvidia_client().chat.completions.create(
+            model=NEMOTRON_MODEL,
             messages=[{"role": "user", "content": prompt}],
-            temperature=0.1,
+            temperature=0.0 if seed is not None else 0.1,
             max_tokens=max_tokens,
-            stream=False
+            stream=False,
+            **extra
         )
         return response.choices[0].message.content
     except Exception as e:
         return f"Error: {str(e)}"
 
-def clean_csv_response(response: str) -> str:
-    """Limpiar respuesta del LLM para obtener CSV puro"""
-    lines = response.split('\n')
-    csv_lines = []
-    
-    for line in lines:
-        line = line.strip()
-        
-        # Quitar caracteres problemáticos
-        line = line.replace('\\', '').replace('```csv', '').replace('```', '')
-        
-        # Es línea de headers o datos válidos?
-        if (line and 
-            ',' in line and
-            not line.startswith('Sure') and
-            not line.startswith('Here') and
-            not line.startswith('I can') and
-            not line.startswith('Generate') and
-            not '[' in line and
-            'example' not in line.lower()):
-            csv_lines.append(line)
-    
-    return '\n'.join(csv_lines)
+async def call_nvidia_nemotron_async(prompt, max_tokens=1000, seed: Optional[int] = None) -> str:
+    """Versión asíncrona de call_nvidia_nemotron; los errores se lanzan para poder reintentar el trozo"""
+    extra = {"seed": seed} if seed is not None else {}
+    response = await get_nvidia_async_client().chat.completions.create(
+        model=NEMOTRON_MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.0 if seed is not None else 0.1,
+        max_tokens=max_tokens,
+        stream=False,
+        **extra
+    )
+    return response.choices[0].message.content or ""
+
+async def stream_nvidia_nemotron(prompt, max_tokens=1000, seed: Optional[int] = None, stream: bool = True):
+    """Fragmentos de texto de la respuesta según llegan (stream=False: la respuesta entera de una vez)"""
+    if not stream:
+        yield await call_nvidia_nemotron_async(prompt, max_tokens, seed=seed)
+        return
+    extra = {"seed": seed} if seed is not None else {}
+    response = await get_nvidia_async_client().chat.completions.create(
+        model=NEMOTRON_MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.0 if seed is not None else 0.1,
+        max_tokens=max_tokens,
+        stream=True,
+        **extra
+    )
+    try:
+        async for event in response:
+            if event.choices and event.choices[0].delta.content:
+                yield event.choices[0].delta.content
+    finally:
+        await response.close()  # Cortar la conexión si se deja de leer antes del final
+
+
+# ==========================================
+# GENERACIÓN CONCURRENTE POR TROZOS
+# ==========================================
+
+def plan_chunks(num_rows: int, num_columns: int) -> Tuple[int, int]:
+    """
+    Filas por trozo y max_tokens por petición según el ancho de la tabla:
+    tablas anchas van en trozos más pequeños para que la respuesta quepa en LLM_CHUNK_MAX_TOKENS.
+    """
+    tokens_per_row = max(num_columns, 1) * TOKENS_PER_FIELD
+    fits = int(LLM_CHUNK_MAX_TOKENS / (tokens_per_row * CHUNK_TOKEN_MARGIN))
+    chunk_rows = max(1, min(LLM_CHUNK_ROWS, fits, num_rows))
+    max_tokens = min(LLM_CHUNK_MAX_TOKENS, int(chunk_rows * tokens_per_row * CHUNK_TOKEN_MARGIN) + 200)
+    return chunk_rows, max_tokens
+
+
+class OrderedRowWriter:
+    """
+    Escribe en el CSV de salida las filas de los trozos en orden de posición.
+
+    Las filas del primer trozo sin terminar se escriben en cuanto llegan; las de trozos
+    posteriores esperan en memoria a que terminen los anteriores (como los trozos empiezan
+    en orden, suelen ser pocos). Con ``key_column`` la clave sale de la posición global de la fila.
+    """
+
+    def __init__(self, file, columns: List[str], offsets: List[int], start_row: int = 0,
+                 key_column: Optional[int] = None, sample_rows: int = SCHEMA_SAMPLE_ROWS):
+        self._file = file
+        self._writer = csv.writer(file, lineterminator="\n")
+        self._writer.writerow(columns)
+        self._order = list(offsets)
+        self._head = 0
+        self._buffers: Dict[int, List[List[str]]] = {offset: [] for offset in offsets}
+        self._done = set()
+        self.start_row = start_row
+        self.key_column = key_column
+        self.sample_rows = sample_rows
+        self.sample: List[List[str]] = []
+        self.rows_written = 0
+
+    def add(self, offset: int, row: List[str]) -> None:
+        if self._head < len(self._order) and self._order[self._head] == offset:
+            self._write(row)
+            self._file.flush()
+        else:
+            self._buffers[offset].append(row)
+
+    def finish(self, offset: int) -> None:
+        """El trozo no recibirá más filas: avanzar y volcar los trozos siguientes ya terminados o en curso"""
+        self._done.add(offset)
+        while self._head < len(self._order) and self._order[self._head] in self._done:
+            self._head += 1
+            if self._head < len(self._order):
+                following = self._order[self._head]
+                rows, self._buffers[following] = self._buffers[following], []
+                for row in rows:
+                    self._write(row)
+        self._file.flush()
+
+    def _write(self, row: List[str]) -> None:
+        if self.key_column is not None:
+            row[self.key_column] = str(self.start_row + self.rows_written + 1)
+        self._writer.writerow(row)
+        self.rows_written += 1
+        if len(self.sample) < self.sample_rows:
+            self.sample.append(row)
+
+
+def chunk_seed(seed: Optional[int], row: int, attempt: int) -> Optional[int]:
+    """Semilla de un trozo: fija por posición; cada reintento usa otra para no repetir la respuesta fallida"""
+    if seed is None:
+        return None
+    block_seed = derive_block_seed(seed, row)
+    return derive_block_seed(block_seed, attempt) if attempt else block_seed
+
+
+def cached_seed_generation(seed_path: str) -> Dict[str, Any]:
+    """Resumen de generación de una semilla ya guardada (sin peticiones al LLM)"""
+    seed_df = pd.read_csv(seed_path, dtype=str, keep_default_na=False)
+    return {
+        "rows_written": len(seed_df),
+        "sample": seed_df.head(SCHEMA_SAMPLE_ROWS).values.tolist(),
+        "chunk_rows": 0, "chunks": 0, "streaming": False, "first_row_seconds": None,
+        "requests": 0, "failed_requests": 0, "retried_chunks": 0, "missing_rows": 0,
+        "rejected_rows": 0, "repair_requests": 0, "repaired_rows": 0,
+        "seed_reused": True
+    }
+
+
+async def generate_rows_concurrently(context,
+                                     data_prompt_for,
+                                     columns: List[str],
+                                     num_rows: int,
+                                     output_file,
+                                     column_types: Optional[Dict[str, str]] = None,
+                                     start_row: int = 0,
+                                     seed: Optional[int] = None,
+                                     key_column: Optional[int] = None,
+                                     dayfirst: bool = True,
+                                     concurrency: int = LLM_CONCURRENCY,
+                                     retries: int = LLM_CHUNK_RETRIES,
+                                     stream: bool = LLM_STREAMING) -> Dict[str, Any]:
+    """
+    Pedir ``num_rows`` filas en trozos concurrentes (como mucho ``concurrency`` a la vez)
+    y escribirlas en ``output_file`` según llegan.
+
+    ``data_prompt_for(rows, first_row)`` construye el prompt de un trozo. Cada línea
+    completa de la respuesta se parsea contra la estructura (ver RowParser), los tipos se
+    comprueban en lotes de LLM_VALIDATE_ROWS y las filas válidas se escriben ya (en orden
+    de posición, ver OrderedRowWriter): la memoria no crece con el tamaño de la respuesta.
+    Si al trozo le faltan filas, sus líneas rechazadas se reparan en una sola petición;
+    lo que siga faltando se vuelve a generar, solo por las filas que faltan.
+    ``dayfirst`` es el orden de las fechas del país pedido (ver dayfirst_for).
+    """
+    tool = "generate_synthetic_data_dynamic"
+    chunk_rows, max_tokens = plan_chunks(num_rows, len(columns))
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    chunks = [(offset, min(chunk_rows, num_rows - offset)) for offset in range(0, num_rows, chunk_rows)]
+    writer = OrderedRowWriter(output_file, columns, [offset for offset, _ in chunks],
+                              start_row=start_row, key_column=key_column)
+    parser = RowParser(columns, column_types, dayfirst=dayfirst)
+    stats = {
+        "requests": 0, "failed_requests": 0, "retried_chunks": 0, "missing_rows": 0,
+        "rejected_rows": 0, "repair_requests": 0, "repaired_rows": 0
+    }
+    started = time.perf_counter()
+    first_row_seconds = None
+    reported_rows = 0
+
+    def report(bytes_in: int = 0, bytes_out: int = 0) -> None:
+        nonlocal reported_rows
+        reported_rows = writer.rows_written
+        context.report_progress(
+            tool, "generating",
+            rows_generated=writer.rows_written, total_rows=num_rows,
+            bytes_in=bytes_in, bytes_out=bytes_out
+        )
+
+    async def run_chunk(offset: int, rows: int) -> None:
+        nonlocal first_row_seconds
+        got = 0
+        rejected: List[Tuple[str, str]] = []
+        batch_rows: List[List[str]] = []
+        batch_lines: List[str] = []
+
+        def take_line(line: str) -> None:
+            row, rejection = parser.parse_line(line)
+            if rejection is not None:
+                rejected.append(rejection)
+            elif row is not None:
+                batch_rows.append(row)
+                batch_lines.append(line)
+            if len(batch_rows) >= min(LLM_VALIDATE_ROWS, rows - got):
+                take_batch()
+
+        def take_batch() -> int:
+            """Validar el lote pendiente y escribir sus filas válidas (sin pasarse de las filas del trozo)"""
+            nonlocal got, first_row_seconds
+            accepted, batch_rejected = parser.validate(batch_rows, batch_lines)
+            batch_rows.clear()
+            batch_lines.clear()
+            rejected.extend(batch_rejected)
+            accepted = accepted[:rows - got]
+            for row in accepted:
+                writer.add(offset, row)
+            got += len(accepted)
+            if accepted and first_row_seconds is None:
+                first_row_seconds = time.perf_counter() - started
+            if writer.rows_written - reported_rows >= LLM_PROGRESS_ROWS:
+                report()
+            return len(accepted)
+
+        async def consume(prompt: str, request_tokens: int, request_seed: Optional[int], use_stream: bool) -> None:
+            bytes_in = 0
+            assembler = CsvLineAssembler()
+            stats["requests"] += 1
+            try:
+                fragments = stream_nvidia_nemotron(prompt, request_tokens, seed=request_seed, stream=use_stream)
+                async with aclosing(fragments):
+                    async for text in fragments:
+                        bytes_in += len(text.encode("utf-8"))
+                        for line in assembler.feed(text):
+                            take_line(line)
+                        if got >= rows:
+                            break  # Filas suficientes: se corta el stream
+                for line in assembler.flush():
+                    take_line(line)
+            except Exception as e:
+                stats["failed_requests"] += 1
+                logger.warning(f"⚠️ Trozo de filas {start_row + offset}-{start_row + offset + rows} falló: {e}")
+            take_batch()
+            report(bytes_in=bytes_in, bytes_out=len(prompt.encode("utf-8")))
+
+        for attempt in range(retries + 1):
+            if got >= rows:
+                break
+            if attempt:
+                stats["retried_chunks"] += 1
+                logger.info(f"🔁 Reintentando {rows - got} filas del trozo {start_row + offset} ({attempt}/{retries})")
+                await asyncio.sleep(retry_delay(attempt))  # Fuera del semáforo: la espera no ocupa un hueco
+            first_row = start_row + offset + got
+            async with semaphore:
+                rejected.clear()
+                await consume(data_prompt_for(rows - got, first_row), max_tokens,
+                              chunk_seed(seed, first_row, attempt), stream)
+                stats["rejected_rows"] += len(rejected)
+
+                # Reparar en una sola petición las líneas rechazadas que harían falta
+                if got < rows and rejected:
+                    to_repair = rejected[:min(rows - got, LLM_REPAIR_MAX_ROWS)]
+                    rejected.clear()
+                    stats["repair_requests"] += 1
+                    before = got
+                    await consume(build_repair_prompt(to_repair, columns, parser.column_types),
+                                  max_tokens, chunk_seed(seed, first_row, attempt), False)
+                    stats["repaired_rows"] += got - before
+        stats["missing_rows"] += rows - got
+        writer.finish(offset)
+
+    await asyncio.gather(*(run_chunk(offset, rows) for offset, rows in chunks))
+    return {
+        "rows_written": writer.rows_written,
+        "sample": writer.sample,
+        "chunk_rows": chunk_rows,
+        "chunks": len(chunks),
+        "streaming": stream,
+        "first_row_seconds": round(first_row_seconds, 3) if first_row_seconds is not None else None,
+        **stats
+    }
+
 
 @function_tool
-def generate_synthetic_data_dynamic(
+@instrument_tool
+async def generate_synthetic_data_dynamic(
     wrapper: RunContextWrapper[SyntheticDataContext],
     description: str,
     num_rows: int,
-    country: str = "Spain"
+    country: str = "Spain",
+    seed: Optional[int] = None,
+    shard_index: Optional[int] = None,
+    shard_count: Optional[int] = None,
+    row_offset: Optional[int] = None,
+    use_schema_cache: bool = True,
+    mode: str = "llm"
 ) -> Dict[str, Any]:
     """
     Genera datos sintéticos dinámicamente basándose en la descripción del usuario.
     
     Args:
         description: Descripción libre de qué datos necesita (ej: "clientes de una tienda online")
-        num_rows: Número de filas a generar
+        num_rows: Número de filas a generar (con shard_count, filas totales del trabajo); se piden en trozos concurrentes
         country: País para localización de datos
+        seed: Semilla para repetir la misma estructura y filas (temperatura 0)
+        shard_index: Shard a generar (0..shard_count-1); requiere seed
+        shard_count: Número total de shards del trabajo
+        row_offset: Generar num_rows filas a partir de esta fila del trabajo; requiere seed
+        use_schema_cache: Reutilizar la estructura ya diseñada para una descripción y país iguales o casi iguales
+        mode: "llm" (por defecto: todas las filas del LLM), "amplify" (el LLM solo escribe
+              AMPLIFY_SEED_ROWS filas semilla y el resto sale de una FastCopula local) o "auto"
+              (amplifica los trabajos de más de AMPLIFY_MIN_ROWS filas). Con seed, la semilla se
+              guarda y todos los shards la reutilizan
         
     Returns:
         Información del archivo generado
@@ -80,10 +406,35 @@ def generate_synthetic_data_dynamic(
         context = wrapper.context
         
         # Validaciones
-        if num_rows <= 0 or num_rows > 500:
+        try:
+            row_range = resolve_row_range(num_rows, shard_index, shard_count, row_offset) if num_rows > 0 else None
+        except ValueError as e:
+            return {"success": False, "error": str(e)}
+        if row_range is not None and seed is None:
             return {
                 "success": False,
-                "error": f"Número de filas debe estar entre 1 y 500, recibido: {num_rows}"
+                "error": "La generación por shards o por rango de filas necesita una semilla (seed)"
+            }
+        start_row = row_range[0] if row_range else 0
+        total_rows = num_rows
+        num_rows = row_range[1] - row_range[0] if row_range else num_rows
+
+        if mode not in GENERATION_MODES:
+            return {
+                "success": False,
+                "error": f"Modo desconocido: {mode}. Usa uno de: {', '.join(GENERATION_MODES)}"
+            }
+        # Se decide con las filas totales del trabajo: todos los shards eligen el mismo modo.
+        # Si no hay más filas que la semilla, amplificar no ahorra nada
+        amplify = (mode == "amplify" or (mode == "auto" and total_rows > AMPLIFY_MIN_ROWS)) \
+            and total_rows > AMPLIFY_SEED_ROWS
+        max_rows = AMPLIFY_MAX_ROWS if amplify else LLM_MAX_ROWS
+        
+        if num_rows <= 0 or num_rows > max_rows:
+            return {
+                "success": False,
+                "error": f"Número de filas debe estar entre 1 y {max_rows}, recibido: {num_rows}"
+                         + ("" if amplify else f" (con mode='amplify' hasta {AMPLIFY_MAX_ROWS})")
             }
         
         if len(description.strip()) < 5:
@@ -92,8 +443,17 @@ def generate_synthetic_data_dynamic(
                 "error": "La descripción debe tener al menos 5 caracteres"
             }
         
-        # PASO 1: Que Nemotron diseñe la estructura
-        design_prompt = f"""You are a data structure expert. Based on this description: "{description}"
+        # PASO 1: Estructura cacheada para esta descripción y país o, si no hay, que Nemotron la diseñe
+        cached_schema = SCHEMA_CACHE.get(description, country) if use_schema_cache else None
+        if cached_schema is not None:
+            headers = cached_schema["headers"]
+            columns = cached_schema["columns"]
+            column_types = cached_schema["column_types"]
+            schema_key = cached_schema["key"]
+            logger.info(f"📐 Estructura desde caché ({cached_schema['match']}): {headers}")
+        else:
+            column_types = {}
+            design_prompt = f"""You are a data structure expert. Based on this description: "{description}"
         
 Design the optimal CSV structure for this type of data in {country}.
 
@@ -106,38 +466,54 @@ Requirements:
 Output ONLY the CSV headers (first line), nothing else.
 Example: id,name,email,age,city,registration_date"""
 
-        headers_response = call_nvidia_nemotron(design_prompt, 500)
-        headers = clean_csv_response(headers_response).strip()
+            # La misma semilla en todos los shards: la misma estructura
+            with measure_phase(context, "generate_synthetic_data_dynamic", "llm_call") as io_bytes:
+                try:
+                    headers_response = await call_nvidia_nemotron_async(design_prompt, 500, seed=seed)
+                except Exception as e:
+                    headers_response = f"Error: {str(e)}"
+                io_bytes["bytes_out"] = len(design_prompt.encode("utf-8"))
+                io_bytes["bytes_in"] = len(headers_response.encode("utf-8"))
+            columns = parse_header_line(headers_response)
         
-        if not headers or ',' not in headers:
-            return {
-                "success": False,
-                "error": f"No se pudo generar estructura válida. Respuesta: {headers_response[:100]}"
-            }
+            if not columns:
+                return {
+                    "success": False,
+                    "error": f"No se pudo generar estructura válida. Respuesta: {headers_response[:100]}"
+                }
         
-        # PASO 2: Generar los datos usando la estructura diseñada
-        data_prompt = f"""Generate exactly {num_rows} rows of realistic data for: {description}
+            headers = ",".join(columns)
+            schema_key = SCHEMA_CACHE.put(description, country, headers, columns)
+
+        # PASO 2: Generar los datos por trozos concurrentes bajo la estructura diseñada
+        # (en modo amplify, solo la semilla: siempre las filas 0..AMPLIFY_SEED_ROWS, igual en todos los shards)
+        llm_rows = AMPLIFY_SEED_ROWS if amplify else num_rows
+        llm_total_rows = AMPLIFY_SEED_ROWS if amplify else total_rows
+        llm_start_row = 0 if amplify else start_row
+
+        def data_prompt_for(rows: int, first_row: int) -> str:
+            prompt = f"""Generate exactly {rows} rows of realistic data for: {description}
 
 Use this exact structure: {headers}
 
 Requirements:
-- Generate exactly {num_rows} data rows
+- Generate exactly {rows} data rows
 - Make data realistic for {country}
 - Use appropriate {country} names, cities, dates, etc.
-- Start with the headers, then {num_rows} data rows
-- Output ONLY CSV data, no explanations
+- Output ONLY CSV data rows, no header line, no explanations
 
 Headers: {headers}
-Data: (generate {num_rows} rows)"""
+Data: (generate {rows} rows)"""
+            if column_types:
+                prompt += "\nColumn types: " + ", ".join(f"{col}: {kind}" for col, kind in column_types.items())
+            if amplify:
+                prompt += ("\nThis is a seed sample for a statistical model: cover the realistic range, mix and "
+                           "correlations of values (common and rare cases), without repeating rows.")
+            if llm_rows > rows or (row_range and not amplify):
+                # Posición del trozo: variedad entre trozos y mismo trozo = misma petición
+                prompt += f"\n(These are rows {first_row + 1} to {first_row + rows} of a {llm_total_rows}-row dataset.)"
+            return prompt
 
-        response = call_nvidia_nemotron(data_prompt, 100000)
-        
-        # Limpiar respuesta
-        clean_csv = clean_csv_response(response)
-        
-        if not clean_csv or len(clean_csv.strip()) < 10:
-            clean_csv = response
-        
         # Directorio de salida específico
         output_dir = str(OUTPUT_DIR)
         os.makedirs(output_dir, exist_ok=True)
@@ -147,33 +523,129 @@ Data: (generate {num_rows} rows)"""
         # Limpiar descripción para nombre de archivo
         clean_desc = "".join(c for c in description if c.isalnum() or c in (' ', '-', '_')).rstrip()
         clean_desc = clean_desc.replace(' ', '_')[:30]  # Max 30 chars
-        filename = f"{clean_desc}_synthetic_{num_rows}rows_{timestamp}.csv"
+        rows_tag = f"rows{row_range[0]}-{row_range[1]}" if row_range else f"{num_rows}rows"
+        filename = f"{clean_desc}_synthetic_{rows_tag}_{timestamp}.csv"
         full_path = os.path.join(output_dir, filename)
+        llm_path = os.path.join(output_dir, f"{clean_desc}_seed_{llm_rows}rows_{timestamp}.csv") if amplify else full_path
+        # Semilla reproducible: una sola generación por (estructura, semilla) para todos los shards
+        reuse_seed = amplify and seed is not None
+        if reuse_seed:
+            llm_path = str(seed_cache_path(schema_key, seed, llm_rows))
+            os.makedirs(os.path.dirname(llm_path), exist_ok=True)
+        
+        # Claves desde la secuencia global de filas, no desde lo que invente el modelo
+        key_columns = [i for i, name in enumerate(columns) if KEY_COLUMN_RE.search(name)] if row_range or amplify else []
+        key_column = key_columns[0] if key_columns else None
+        
+        async with (_seed_locks.setdefault(llm_path, asyncio.Lock()) if reuse_seed else nullcontext()):
+            if reuse_seed and os.path.exists(llm_path):
+                generation = cached_seed_generation(llm_path)
+                logger.info(f"🌱 Semilla reutilizada: {os.path.basename(llm_path)} ({generation['rows_written']} filas)")
+            else:
+                # Las filas se escriben en el archivo según llegan del stream (la semilla cacheada
+                # se escribe aparte y se publica entera con os.replace)
+                write_path = f"{llm_path}.{uuid.uuid4().hex}.tmp" if reuse_seed else llm_path
+                with open(write_path, 'w', encoding='utf-8', newline='') as f:
+                    generation = await generate_rows_concurrently(
+                        context, data_prompt_for, columns, llm_rows, f, column_types=column_types,
+                        start_row=llm_start_row, seed=seed, key_column=key_column, dayfirst=dayfirst_for(country)
+                    )
+                if not generation["rows_written"] or (amplify and generation["rows_written"] < MIN_SEED_ROWS):
+                    os.remove(write_path)
+                    return {
+                        "success": False,
+                        "error": f"❌ El modelo devolvió {generation['rows_written']} filas válidas para {headers} "
+                                 f"tras {generation['requests']} peticiones"
+                                 + (f" (la semilla necesita al menos {MIN_SEED_ROWS})" if amplify else "")
+                    }
+                if reuse_seed:
+                    os.replace(write_path, llm_path)
+
+        # Tipos inferidos de lo generado: los siguientes usos del esquema los incluyen en el prompt
+        if not column_types:
+            column_types = infer_column_types(pd.DataFrame(generation["sample"], columns=columns))
+            SCHEMA_CACHE.set_column_types(schema_key, column_types)
+
+        # PASO 3 (amplify): ajustar un modelo local con la semilla y muestrear las filas pedidas
+        amplification = None
+        if amplify:
+            def on_batch(rows_sampled: int, rows_total: int) -> None:
+                context.report_progress(
+                    "generate_synthetic_data_dynamic", "sampling",
+                    rows_sampled=rows_sampled, total_rows=rows_total
+                )
+
+            context.report_progress("generate_synthetic_data_dynamic", "fitting", seed_rows=generation["rows_written"])
+            loop = asyncio.get_running_loop()
+            amplification = await loop.run_in_executor(
+                SDV_EXECUTOR,
+                functools.partial(
+                    amplify_seed, llm_path, column_types, num_rows, full_path,
+                    key_column=columns[key_column] if key_column is not None else None,
+                    start_row=start_row, seed=seed, on_batch=on_batch
+                )
+            )
         
-        # Guardar archivo
-        with open(full_path, 'w', encoding='utf-8') as f:
-            f.write(clean_csv)
+        rows_from_llm = generation["rows_written"]
+        rows_from_model = amplification["rows_written"] if amplification else 0
+        actual_rows = rows_from_model if amplification else rows_from_llm
         
         # Actualizar contexto
         context.generated_file_path = full_path
         context.generated_file_id = timestamp
-        context.generated_rows = num_rows
-        context.last_model_used = "nvidia/llama-3.1-nemotron-70b-instruct"
+        context.generated_rows = actual_rows
+        context.last_model_used = f"{NEMOTRON_MODEL} + FastCopula" if amplification else NEMOTRON_MODEL
         
-        # Extraer info del CSV generado
-        lines = clean_csv.split('\n')
-        actual_headers = lines[0] if lines else headers
-        actual_rows = len(lines) - 1 if len(lines) > 1 else 0
+        actual_headers = ",".join(columns)
         
         return {
             "success": True,
             "filename": filename,
             "rows_generated": actual_rows,
+            "rows_from_llm": rows_from_llm,
+            "rows_from_model": rows_from_model,
+            "mode": "amplify" if amplification else "llm",
             "description": description,
             "headers_designed": actual_headers,
             "file_path": full_path,
             "country": country,
-            "message": f"✅ Generados {actual_rows} registros de '{description}' usando Nemotron 70B"
+            "row_range": {
+                "start_row": row_range[0],
+                "end_row": row_range[1],
+                "shard_index": shard_index,
+                "shard_count": shard_count,
+                "seed": seed
+            } if row_range else None,
+            "schema": {
+                "from_cache": cached_schema is not None,
+                "match": cached_schema["match"] if cached_schema else None,
+                "column_types": column_types
+            },
+            "generation": {
+                "chunk_rows": generation["chunk_rows"],
+                "chunks": generation["chunks"],
+                "concurrency": LLM_CONCURRENCY,
+                "streaming": generation["streaming"],
+                "first_row_seconds": generation["first_row_seconds"],
+                "requests": generation["requests"],
+                "failed_requests": generation["failed_requests"],
+                "retried_chunks": generation["retried_chunks"],
+                "missing_rows": generation["missing_rows"],
+                "rejected_rows": generation["rejected_rows"],
+                "repair_requests": generation["repair_requests"],
+                "repaired_rows": generation["repaired_rows"]
+            },
+            "amplification": {
+                "seed_file": llm_path,
+                "seed_reused": generation.get("seed_reused", False),
+                **{k: v for k, v in amplification.items() if k != "rows_written"}
+            } if amplification else None,
+            "message": (f"✅ Generados {actual_rows:,} registros de '{description}': {rows_from_llm} filas semilla "
+                        f"de Nemotron 70B y {rows_from_model:,} muestreadas con FastCopula"
+                        if amplification else
+                        f"✅ Generados {actual_rows} registros de '{description}' usando Nemotron 70B")
+                       + (f" (faltan {generation['missing_rows']} filas tras {LLM_CHUNK_RETRIES} reintentos)"
+                          if generation["missing_rows"] else "")
         }
         
     except Exception as e:
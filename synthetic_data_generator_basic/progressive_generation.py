@@ -0,0 +1,216 @@
+"""
+Progressive Generation - Vista previa inmediata mientras entrena el modelo pesado
+Primera etapa: FastCopula sobre una submuestra pequeña devuelve filas en ~1 segundo.
+Segunda etapa: el modelo pedido (CTGAN, TVAE...) entrena como trabajo en segundo plano
+y, al terminar, su archivo sustituye a la vista previa en el contexto de la sesión
+"""
+
+import os
+import time
+import logging
+from typing import Dict, Any, Optional, Tuple
+
+import pandas as pd
+
+from sdk_tools_and_context import SyntheticDataContext, OUTPUT_DIR, validate_generation_params
+from synthesizer_cache import SYNTHESIZER_CACHE
+from fit_sampling import sample_for_fit, strata_columns
+from column_roles import detect_column_roles, apply_column_roles, model_metadata, ColumnRegenerator
+from fast_copula import FastCopulaSynthesizer
+from generation_jobs import GENERATION_JOBS, DEFAULT_PRIORITY
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# CONFIGURACIÓN DE LA VISTA PREVIA
+# ==========================================
+PREVIEW_ROWS = int(os.getenv("PREVIEW_ROWS", "300"))
+PREVIEW_FIT_ROWS = int(os.getenv("PREVIEW_FIT_ROWS", "2000"))
+PREVIEW_HEAD_ROWS = 10 * PREVIEW_FIT_ROWS  # Filas leídas de archivos perfilados por bloques (demasiado grandes)
+PREVIEW_RESULT_ROWS = 5  # Filas de la vista previa que se devuelven en la respuesta de la herramienta
+
+# Modelos lentos para los que se ofrece vista previa por defecto
+HEAVY_MODELS = ("CTGAN", "TVAE", "CopulaGAN")
+
+
+def _preview_source(context: SyntheticDataContext) -> pd.DataFrame:
+    """
+    Filas de las que sale la vista previa: el frame de la sesión (ya cargado por
+    analyze_csv_file) o, si el archivo solo se perfiló por bloques, sus primeras filas.
+    """
+    info = context.analyzed_file_info or {}
+    if info.get("profiling_mode") == "streaming":
+        return pd.read_csv(context.analyzed_file_path, nrows=PREVIEW_HEAD_ROWS)
+    return context.load_dataframe(context.analyzed_file_path)
+
+
+def _preview_roles(context: SyntheticDataContext, sample: pd.DataFrame) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Metadatos del modelo y roles de columna del perfil cacheado, o detectados sobre la muestra"""
+    from sdv.metadata import SingleTableMetadata
+
+    profile = SYNTHESIZER_CACHE.get_source_profile(context.file_hash(context.analyzed_file_path))
+    if profile is not None and "column_roles" in profile:
+        return profile["metadata"], profile["column_roles"]
+    detected = SingleTableMetadata()
+    detected.detect_from_dataframe(sample.head(PREVIEW_FIT_ROWS))
+    column_roles = detect_column_roles(sample, detected.to_dict())
+    return model_metadata(detected.to_dict(), column_roles), column_roles
+
+
+def run_preview(context: SyntheticDataContext, num_rows: int, model_type: str,
+                conditions: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Etapa 1: ajustar FastCopula sobre una submuestra y escribir una vista previa.
+    IDs, PII y texto libre se quitan del modelo y se regeneran como en la etapa completa.
+    Con conditions la vista previa sale de la cópula condicionada (si alguna condición no
+    es aplicable aquí, la vista previa va sin condicionar; la etapa completa la valida).
+    Bloqueante (pandas/NumPy): llamarlo desde un executor.
+    """
+    from sdv.metadata import SingleTableMetadata
+
+    start = time.perf_counter()
+    source_df = _preview_source(context)
+
+    metadata_dict, column_roles = _preview_roles(context, source_df)
+    model_df = apply_column_roles(source_df, column_roles)
+    fit_df, _ = sample_for_fit(model_df, max_rows=PREVIEW_FIT_ROWS,
+                               strata=strata_columns(model_df, metadata_dict))
+
+    synthesizer = FastCopulaSynthesizer(SingleTableMetadata.load_from_dict(metadata_dict))
+    synthesizer.fit(fit_df)
+    conditions_applied = False
+    if conditions:
+        try:
+            preview_df = synthesizer.sample_conditioned(min(PREVIEW_ROWS, num_rows), conditions)
+            conditions_applied = True
+        except ValueError as e:
+            logger.warning(f"⚠️ Vista previa sin condicionar: {e}")
+    if not conditions_applied:
+        preview_df = synthesizer.sample(min(PREVIEW_ROWS, num_rows))
+    regeneration_seed = None
+    if column_roles:
+        regenerator = ColumnRegenerator(column_roles, list(source_df.columns))
+        preview_df = regenerator(preview_df)
+        regeneration_seed = regenerator.seed
+
+    timestamp = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
+    source_filename = os.path.splitext(os.path.basename(context.analyzed_file_path))[0]
+    output_filename = f"{source_filename}_preview_{model_type.lower()}_{len(preview_df)}rows_{timestamp}.csv"
+    os.makedirs(str(OUTPUT_DIR), exist_ok=True)
+    output_path = os.path.join(str(OUTPUT_DIR), output_filename)
+    preview_df.to_csv(output_path, index=False)
+
+    seconds = round(time.perf_counter() - start, 3)
+    logger.info(f"👀 Vista previa de {len(preview_df)} filas lista en {seconds}s")
+    return {
+        "status": "completed",
+        "model_used": "FastCopula",
+        "fit_rows": len(fit_df),
+        "rows": len(preview_df),
+        "output_filename": output_filename,
+        "output_path": output_path,
+        "file_id": timestamp,
+        "seconds_to_first_rows": seconds,
+        "conditions_applied": conditions_applied,
+        "regeneration_seed": regeneration_seed,
+        "sample_rows": preview_df.head(PREVIEW_RESULT_ROWS).to_dict("records")
+    }
+
+
+def start_progressive_generation(context: SyntheticDataContext, params: Dict[str, Any],
+                                 priority: int = DEFAULT_PRIORITY) -> Dict[str, Any]:
+    """
+    Generación en dos etapas: vista previa inmediata y modelo completo en segundo plano.
+
+    Args:
+        context: Contexto de la sesión (con un CSV ya analizado)
+        params: Parámetros de run_sdv_generation para la etapa completa
+        priority: Prioridad del trabajo de la etapa completa
+
+    Returns:
+        Resultado de la vista previa y el job_id de la etapa completa
+    """
+    try:
+        if not context.analyzed_file_path:
+            return {
+                "success": False,
+                "error": "❌ Primero debes analizar un archivo CSV usando analyze_csv_file()"
+            }
+        # Mismas validaciones que la etapa completa: un trabajo inválido no debe dejar vista previa
+        error = validate_generation_params(**params)
+        if error is not None:
+            return error
+
+        model_type = params.get("model_type", "GaussianCopula")
+        context.report_progress("generate_synthetic_data_with_sdv", "preview", model_type="FastCopula")
+        preview = run_preview(context, params["num_rows"], model_type, params.get("conditions"))
+
+        # La vista previa queda como archivo actual hasta que termine el modelo completo
+        context.generated_file_path = preview["output_path"]
+        context.generated_file_id = preview["file_id"]
+        context.generated_rows = preview["rows"]
+        context.last_model_used = "FastCopula"
+
+        job = GENERATION_JOBS.submit(context, params, priority=priority)
+        context.generation_stages = {
+            "requested_model": model_type,
+            "num_rows": params["num_rows"],
+            "preview": {key: value for key, value in preview.items() if key != "sample_rows"},
+            "full": {"job_id": job.job_id}
+        }
+        context.add_to_history("progressive_generation_started", {
+            "model_type": model_type,
+            "num_rows": params["num_rows"],
+            "preview_rows": preview["rows"],
+            "seconds_to_first_rows": preview["seconds_to_first_rows"],
+            "job_id": job.job_id
+        })
+        context.report_progress(
+            "generate_synthetic_data_with_sdv", "preview_ready",
+            rows=preview["rows"], seconds=preview["seconds_to_first_rows"], job_id=job.job_id
+        )
+
+        return {
+            "success": True,
+            "stage": "preview",
+            "preview": preview,
+            "full_model_job": {"job_id": job.job_id, "status": job.status, "model_type": model_type},
+            "message": (
+                f"👀 Vista previa de {preview['rows']} filas (FastCopula) lista en "
+                f"{preview['seconds_to_first_rows']}s. El modelo {model_type} con {params['num_rows']:,} filas "
+                f"sigue entrenando en el trabajo {job.job_id}; consulta get_session_status() o "
+                f"get_generation_job_status()"
+            )
+        }
+
+    except Exception as e:
+        error_msg = f"❌ Error generando la vista previa: {str(e)}"
+        logger.error(error_msg)
+        return {"success": False, "error": error_msg}
+
+
+def stages_status(context: SyntheticDataContext) -> Optional[Dict[str, Any]]:
+    """Estado de ambas etapas para get_session_status (None si no hubo generación progresiva)"""
+    stages = context.generation_stages
+    if not stages:
+        return None
+
+    job = GENERATION_JOBS.get(stages["full"]["job_id"])
+    full = {"job_id": stages["full"]["job_id"], "status": job.status if job else "unknown"}
+    if job is not None:
+        full.update({
+            "phase": job.progress.get("phase"),
+            "epoch": job.progress.get("epoch"),
+            "total_epochs": job.progress.get("total_epochs"),
+            "run_seconds": job.run_seconds
+        })
+        if job.status == "completed":
+            full["output_path"] = job.result.get("output_path")
+
+    return {
+        "requested_model": stages["requested_model"],
+        "num_rows": stages["num_rows"],
+        "preview": stages["preview"],
+        "full": full,
+        "current_output": "full" if full["status"] == "completed" else "preview"
+    }
@@ -0,0 +1,218 @@
+"""
+Schema Cache - Caché persistente de las estructuras CSV diseñadas por el LLM
+Evita repetir la petición de diseño de cabeceras cuando la descripción y el país ya se
+pidieron antes (o casi: mismas palabras con otro orden, mayúsculas, acentos o plurales)
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# CONFIGURACIÓN DE LA CACHÉ DE ESQUEMAS
+# ==========================================
+BASE_DIR = Path(__file__).parent
+SCHEMA_CACHE_FILE = Path(os.getenv("SCHEMA_CACHE_FILE", str(BASE_DIR / ".synthesizer_cache" / "schemas.json")))
+SCHEMA_CACHE_TTL_HOURS = float(os.getenv("SCHEMA_CACHE_TTL_HOURS", "168"))   # 7 días
+SCHEMA_CACHE_MAX_ENTRIES = int(os.getenv("SCHEMA_CACHE_MAX_ENTRIES", "500"))
+SCHEMA_CACHE_MIN_SIMILARITY = float(os.getenv("SCHEMA_CACHE_MIN_SIMILARITY", "0.8"))  # Jaccard para casi-repeticiones
+
+# Palabras que no cambian la estructura pedida
+STOPWORDS = {
+    "de", "del", "la", "las", "el", "los", "un", "una", "unos", "unas", "y", "o", "en", "con",
+    "para", "por", "que", "a", "al", "su", "sus", "datos", "dataset",
+    "the", "of", "an", "and", "or", "in", "for", "with", "to", "data", "my", "our"
+}
+
+
+def normalize_tokens(text: str) -> List[str]:
+    """Palabras significativas: minúsculas, sin acentos ni puntuación, sin plural final, ordenadas"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    tokens = set()
+    for word in re.findall(r"[a-z0-9]+", text):
+        if word in STOPWORDS:
+            continue
+        if len(word) > 4 and word.endswith("es"):
+            word = word[:-2]
+        elif len(word) > 3 and word.endswith("s"):
+            word = word[:-1]
+        tokens.add(word)
+    return sorted(tokens)
+
+
+def make_schema_key(description: str, country: str) -> str:
+    """Clave de caché: descripción normalizada + país"""
+    payload = json.dumps({
+        "description": normalize_tokens(description),
+        "country": normalize_tokens(country)
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def infer_column_types(df: pd.DataFrame) -> Dict[str, str]:
+    """Tipo de cada columna de una muestra generada: integer, float, boolean, datetime, categorical o text"""
+    types = {}
+    for col in df.columns:
+        values = df[col].dropna().astype(str).str.strip()
+        values = values[values != ""]
+        if values.empty:
+            types[col] = "text"
+            continue
+        numeric = pd.to_numeric(values, errors="coerce")
+        # Con ceros a la izquierda (códigos postales, cuentas...) el valor es texto, no un número
+        leading_zero = values.str.match(r"^[+-]?0\d").any()
+        if numeric.notna().all() and not leading_zero:
+            types[col] = "integer" if (numeric % 1 == 0).all() else "float"
+        elif values.str.lower().isin(["true", "false", "yes", "no", "si", "sí", "0", "1"]).all():
+            types[col] = "boolean"
+        elif pd.to_datetime(values, errors="coerce", format="mixed").notna().mean() > 0.9:
+            types[col] = "datetime"
+        elif values.nunique() <= max(10, len(values) // 5):
+            types[col] = "categorical"
+        else:
+            types[col] = "text"
+    return types
+
+
+# ==========================================
+# CACHÉ EN DISCO CON TTL Y EXPULSIÓN POR TAMAÑO
+# ==========================================
+
+class SchemaCache:
+    """
+    Estructuras diseñadas por el LLM, en un único JSON en disco.
+
+    - Acierto exacto: misma clave (descripción normalizada + país).
+    - Casi-repetición: mismo país y similitud de Jaccard entre palabras >= ``min_similarity``.
+    - Las entradas caducan a las ``ttl_hours`` y, por encima de ``max_entries``, se expulsan
+      las menos usadas recientemente.
+    """
+
+    def __init__(self,
+                 path: Path = SCHEMA_CACHE_FILE,
+                 ttl_hours: float = SCHEMA_CACHE_TTL_HOURS,
+                 max_entries: int = SCHEMA_CACHE_MAX_ENTRIES,
+                 min_similarity: float = SCHEMA_CACHE_MIN_SIMILARITY):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_hours * 3600
+        self.max_entries = max_entries
+        self.min_similarity = min_similarity
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock = threading.RLock()
+        self.stats = {"hits": 0, "near_hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._entries is None:
+            self._entries = {}
+            if self.path.exists():
+                try:
+                    self._entries = json.loads(self.path.read_text(encoding="utf-8")).get("entries", {})
+                except (OSError, ValueError) as e:
+                    logger.warning(f"⚠️ Caché de esquemas ilegible, se descarta: {e}")
+        return self._entries
+
+    def _save(self) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps({"entries": self._entries}, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.warning(f"⚠️ No se pudo guardar la caché de esquemas: {e}")
+
+    def _purge_expired(self, entries: Dict[str, Dict[str, Any]]) -> bool:
+        now = time.time()
+        expired = [key for key, entry in entries.items() if now - entry["created_at"] > self.ttl_seconds]
+        for key in expired:
+            del entries[key]
+        self.stats["expired"] += len(expired)
+        return bool(expired)
+
+    def get(self, description: str, country: str) -> Optional[Dict[str, Any]]:
+        """Esquema cacheado (headers, columns, column_types, match) o None"""
+        with self._lock:
+            entries = self._load()
+            changed = self._purge_expired(entries)
+            key = make_schema_key(description, country)
+            entry, match = entries.get(key), "exact"
+
+            if entry is None:
+                tokens = set(normalize_tokens(description))
+                country_tokens = normalize_tokens(country)
+                best = 0.0
+                for candidate in entries.values():
+                    if candidate["country_tokens"] != country_tokens or not tokens:
+                        continue
+                    other = set(candidate["tokens"])
+                    similarity = len(tokens & other) / len(tokens | other)
+                    if similarity >= self.min_similarity and similarity > best:
+                        entry, match, best = candidate, f"similar ({similarity:.2f})", similarity
+
+            if entry is None:
+                self.stats["misses"] += 1
+                if changed:
+                    self._save()
+                return None
+
+            self.stats["hits" if match == "exact" else "near_hits"] += 1
+            entry["last_used"] = time.time()
+            entry["uses"] = entry.get("uses", 0) + 1
+            self._save()
+            return {**entry, "match": match}
+
+    def put(self, description: str, country: str, headers: str, columns: List[str]) -> str:
+        """Guardar la estructura diseñada para (descripción, país); devuelve la clave"""
+        with self._lock:
+            entries = self._load()
+            key = make_schema_key(description, country)
+            now = time.time()
+            entries[key] = {
+                "key": key,
+                "description": description,
+                "country": country,
+                "tokens": normalize_tokens(description),
+                "country_tokens": normalize_tokens(country),
+                "headers": headers,
+                "columns": columns,
+                "column_types": {},
+                "created_at": now,
+                "last_used": now,
+                "uses": 0
+            }
+            self._purge_expired(entries)
+            # Expulsar las menos usadas recientemente, nunca la recién insertada
+            while len(entries) > self.max_entries:
+                oldest = min((k for k in entries if k != key), key=lambda k: entries[k]["last_used"])
+                del entries[oldest]
+                self.stats["evictions"] += 1
+            self._save()
+            return key
+
+    def set_column_types(self, key: str, column_types: Dict[str, str]) -> None:
+        """Añadir los tipos inferidos de las filas generadas con un esquema ya guardado"""
+        with self._lock:
+            entry = self._load().get(key)
+            if entry is None or entry.get("column_types") == column_types:
+                return
+            entry["column_types"] = column_types
+            self._save()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, "entries": len(self._load()), "path": str(self.path)}
+
+
+# Caché compartida por todas las sesiones del proceso
+SCHEMA_CACHE = SchemaCache()
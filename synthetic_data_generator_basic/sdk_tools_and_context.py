@@ -4,13 +4,42 @@ Herramientas que usan el contexto del SDK para mantener estado entre llamadas
 """
 
 import os
+import shutil
+import asyncio
 import logging
+import functools
+import threading
 import pandas as pd
 from pathlib import Path
 import tempfile
-from typing import Dict, Any, Optional, List
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Callable
 from dataclasses import dataclass, field
 from agents import function_tool, RunContextWrapper
+from sdv_sampling import (
+    sample_to_csv, sample_to_csv_parallel, sample_range_to_csv, seed_synthesizer,
+    resolve_row_range, DEFAULT_BATCH_SIZE, BLOCK_ROWS
+)
+from synthesizer_cache import SYNTHESIZER_CACHE, fingerprint_metadata, make_cache_key
+from dataset_cache import DatasetCache
+from training_monitor import epoch_hook, latest_losses
+from training_budget import TrainingBudget, resolve_training_plan, apply_torch_threads
+from incremental_refit import find_appended_base, refit_appended, record_fit
+from fast_copula import FastCopulaSynthesizer
+from column_roles import detect_column_roles, apply_column_roles, model_metadata, summarize_roles, ColumnRegenerator
+from conditional_sampling import (
+    parse_conditions, build_condition_index, validate_conditions, estimate_acceptance,
+    choose_strategy, fit_condition_submodel, ConditionalSampler
+)
+from streaming_profiler import profile_csv
+from tool_metrics import instrument_tool, SESSION_METRICS
+from csv_ingestion import read_csv
+from dtype_compaction import compact_dataframe, restore_dtypes, memory_mb
+from fit_sampling import (
+    MAX_FIT_ROWS, FIT_SAMPLING_STRATEGIES, RESERVOIR_POOL_FACTOR,
+    sample_for_fit, strata_columns, reservoir_sample_csv
+)
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -22,6 +51,19 @@ logger = logging.getLogger(__name__)
 BASE_DIR = Path(__file__).parent
 OUTPUT_DIR = BASE_DIR / "Synthetic data generated"
 
+class GenerationCancelled(Exception):
+    """Se lanza dentro del pipeline SDV cuando se cancela la generación"""
+
+# Executor para el trabajo bloqueante de SDV (entrenamiento y muestreo)
+SDV_EXECUTOR_WORKERS = int(os.getenv("SDV_EXECUTOR_WORKERS", "4"))
+SDV_EXECUTOR = ThreadPoolExecutor(max_workers=SDV_EXECUTOR_WORKERS, thread_name_prefix="sdv")
+
+# Modelos que acepta generate_synthetic_data_with_sdv
+SDV_MODEL_TYPES = ("GaussianCopula", "CTGAN", "CopulaGAN", "TVAE", "FastCopula")
+
+# Por encima de este tamaño analyze_csv_file perfila por bloques sin cargar el archivo
+STREAMING_PROFILE_THRESHOLD_MB = float(os.getenv("STREAMING_PROFILE_THRESHOLD_MB", "512"))
+
 @dataclass
 class SyntheticDataContext:
     """
@@ -46,6 +88,20 @@ class SyntheticDataContext:
     processing_history: list = field(default_factory=list)
     current_agent: Optional[str] = None
     
+    # 📡 Receptor de progreso de herramientas (lo asigna el handler de streaming)
+    progress_listener: Optional[Callable[[Dict[str, Any]], None]] = None
+    
+    # 🗂️ DataFrames ya parseados en esta sesión (se crea al primer uso)
+    dataset_cache: Optional[DatasetCache] = None
+    
+    # 👀 Generación progresiva: vista previa + trabajo del modelo completo
+    generation_stages: Optional[Dict[str, Any]] = None
+    
+    # ⏱️ Métricas de las herramientas en curso, por nombre de herramienta (ver tool_metrics)
+    active_metrics: Dict[str, Any] = field(default_factory=dict)
+    # 📏 Resúmenes de las últimas llamadas (aparte de processing_history, que es de acciones)
+    tool_metrics: deque = field(default_factory=lambda: deque(maxlen=SESSION_METRICS))
+    
     def add_to_history(self, action: str, details: Dict[str, Any]):
         """Agregar acción al historial"""
         self.processing_history.append({
@@ -54,17 +110,48 @@ class SyntheticDataContext:
             "details": details
         })
 
+    def load_dataframe(self, file_path: str) -> pd.DataFrame:
+        """Leer un CSV reutilizando el frame ya parseado si el archivo no cambió (no modificar in-place)"""
+        if self.dataset_cache is None:
+            self.dataset_cache = DatasetCache(spill_dir=self.temp_dir)
+        return self.dataset_cache.load(file_path, reader=read_csv)
+
+    def file_hash(self, file_path: str) -> str:
+        """Hash del contenido del archivo, memorizado mientras no cambie"""
+        if self.dataset_cache is None:
+            self.dataset_cache = DatasetCache(spill_dir=self.temp_dir)
+        return self.dataset_cache.file_hash(file_path)
+
+    def report_progress(self, tool: str, phase: str, **data: Any):
+        """Notificar progreso de una herramienta (seguro desde hilos del executor)"""
+        metrics = self.active_metrics.get(tool)
+        if metrics is not None:
+            metrics.observe(phase, data)
+        listener = self.progress_listener
+        if listener is None:
+            return
+        try:
+            listener({"tool": tool, "phase": phase, **data})
+        except Exception as e:
+            logger.debug(f"No se pudo notificar progreso: {e}")
+
 # ==========================================
 # HERRAMIENTAS CON CONTEXTO DEL SDK
 # ==========================================
 
 @function_tool
-def analyze_csv_file(wrapper: RunContextWrapper[SyntheticDataContext], file_path: str) -> Dict[str, Any]:
+@instrument_tool
+def analyze_csv_file(
+    wrapper: RunContextWrapper[SyntheticDataContext],
+    file_path: str,
+    streaming: Optional[bool] = None
+) -> Dict[str, Any]:
     """
     Analiza un archivo CSV y guarda la información en el contexto para uso posterior.
     
     Args:
         file_path: Ruta completa al archivo CSV a analizar
+        streaming: Perfilar por bloques con memoria constante (por defecto, automático según tamaño)
         
     Returns:
         Diccionario con estadísticas del archivo CSV
@@ -73,37 +160,57 @@ def analyze_csv_file(wrapper: RunContextWrapper[SyntheticDataContext], file_path
         # Obtener contexto del SDK
         context = wrapper.context
         
-        # Cargar CSV
-        df = pd.read_csv(file_path)
+        file_bytes = os.path.getsize(file_path)
+        if streaming is None:
+            streaming = file_bytes > STREAMING_PROFILE_THRESHOLD_MB * 1024 * 1024
         
-        # Análisis completo del archivo
-        analysis = {
-            "success": True,
-            "file_path": file_path,
-            "filename": os.path.basename(file_path),
-            "rows": len(df),
-            "columns": list(df.columns),
-            "column_count": len(df.columns),
-            "data_types": {col: str(dtype) for col, dtype in df.dtypes.to_dict().items()},
-            "missing_values": df.isnull().sum().to_dict(),
-            "missing_percentage": (df.isnull().sum() / len(df) * 100).round(2).to_dict(),
-            "memory_usage_mb": round(df.memory_usage(deep=True).sum() / 1024 / 1024, 2),
-            "numeric_columns": df.select_dtypes(include=['number']).columns.tolist(),
-            "categorical_columns": df.select_dtypes(include=['object']).columns.tolist(),
-            "sample_data": df.head(3).to_dict('records'),
-            "basic_stats": df.describe().to_dict() if len(df.select_dtypes(include=['number']).columns) > 0 else {}
-        }
+        if streaming:
+            context.report_progress("analyze_csv_file", "profiling", bytes_in=file_bytes)
+            # Perfilado por bloques: la memoria depende de las columnas, no de las filas
+            # (cuantiles, distintos y valores frecuentes son aproximados)
+            analysis = {
+                "success": True,
+                "file_path": file_path,
+                "filename": os.path.basename(file_path),
+                **profile_csv(file_path)
+            }
+        else:
+            # Cargar CSV (queda en la caché de la sesión para las siguientes herramientas)
+            context.report_progress("analyze_csv_file", "reading", bytes_in=file_bytes)
+            df = context.load_dataframe(file_path)
+            context.report_progress("analyze_csv_file", "profiling")
+            
+            # Análisis completo del archivo
+            analysis = {
+                "success": True,
+                "file_path": file_path,
+                "filename": os.path.basename(file_path),
+                "rows": len(df),
+                "columns": list(df.columns),
+                "column_count": len(df.columns),
+                "data_types": {col: str(dtype) for col, dtype in df.dtypes.to_dict().items()},
+                "missing_values": df.isnull().sum().to_dict(),
+                "missing_percentage": (df.isnull().sum() / len(df) * 100).round(2).to_dict(),
+                "memory_usage_mb": round(df.memory_usage(deep=True).sum() / 1024 / 1024, 2),
+                "numeric_columns": df.select_dtypes(include=['number']).columns.tolist(),
+                "categorical_columns": df.select_dtypes(include=['object', 'category']).columns.tolist(),
+                "sample_data": df.head(3).to_dict('records'),
+                "basic_stats": df.describe().to_dict() if len(df.select_dtypes(include=['number']).columns) > 0 else {},
+                "profiling_mode": "full",
+                "ingestion": df.attrs.get("ingestion")
+            }
         
         # 🎯 GUARDAR EN CONTEXTO para uso posterior
         context.analyzed_file_path = file_path
         context.analyzed_file_info = analysis
         context.add_to_history("csv_analyzed", {
             "file_path": file_path,
-            "rows": len(df),
-            "columns": len(df.columns)
+            "rows": analysis["rows"],
+            "columns": analysis["column_count"],
+            "profiling_mode": analysis["profiling_mode"]
         })
         
-        logger.info(f"✅ CSV analizado y guardado en contexto: {os.path.basename(file_path)} - {len(df)} filas, {len(df.columns)} columnas")
+        logger.info(f"✅ CSV analizado y guardado en contexto: {os.path.basename(file_path)} - {analysis['rows']} filas, {analysis['column_count']} columnas")
         return analysis
         
     except FileNotFoundError:
@@ -124,26 +231,146 @@ def analyze_csv_file(wrapper: RunContextWrapper[SyntheticDataContext], file_path
         return {"success": False, "error": error_msg}
 
 
-@function_tool
-def generate_synthetic_data_with_sdv(
-    wrapper: RunContextWrapper[SyntheticDataContext],
+def validate_generation_params(
+    num_rows: int,
+    model_type: str = "GaussianCopula",
+    batch_size: Optional[int] = None,
+    num_workers: int = 1,
+    seed: Optional[int] = None,
+    max_fit_rows: Optional[int] = None,
+    fit_sampling: str = "stratified",
+    epochs: Optional[int] = None,
+    max_training_seconds: Optional[float] = None,
+    shard_index: Optional[int] = None,
+    shard_count: Optional[int] = None,
+    row_offset: Optional[int] = None,
+    **_: Any
+) -> Optional[Dict[str, Any]]:
+    """Resultado de error si los parámetros de run_sdv_generation no son válidos, o None"""
+    def error(message: str) -> Dict[str, Any]:
+        return {"success": False, "error": f"❌ {message}"}
+
+    if num_rows <= 0:
+        return error("El número de filas debe ser mayor a 0")
+    if model_type not in SDV_MODEL_TYPES:
+        return error(f"Modelo no soportado: {model_type}. Modelos disponibles: {', '.join(SDV_MODEL_TYPES)}")
+    if batch_size is not None and batch_size <= 0:
+        return error("El tamaño de lote debe ser mayor a 0")
+    if num_workers < 1:
+        return error("num_workers debe ser al menos 1")
+    try:
+        row_range = resolve_row_range(num_rows, shard_index, shard_count, row_offset)
+    except ValueError as e:
+        return error(str(e))
+    if row_range is not None and seed is None:
+        return error("La generación por shards o por rango de filas necesita una semilla (seed)")
+    if (max_fit_rows or MAX_FIT_ROWS) < 2:
+        return error("max_fit_rows debe ser al menos 2")
+    if epochs is not None and epochs < 1:
+        return error("epochs debe ser al menos 1")
+    if max_training_seconds is not None and max_training_seconds <= 0:
+        return error("max_training_seconds debe ser mayor a 0")
+    if fit_sampling not in FIT_SAMPLING_STRATEGIES:
+        return error(f"Estrategia de submuestreo no soportada: {fit_sampling}. Opciones: {', '.join(FIT_SAMPLING_STRATEGIES)}")
+    return None
+
+
+def run_sdv_generation(
+    context: SyntheticDataContext,
     num_rows: int,
-    model_type: str = "GaussianCopula"
+    model_type: str = "GaussianCopula",
+    batch_size: Optional[int] = None,
+    num_workers: int = 1,
+    seed: Optional[int] = None,
+    partitioned_output: bool = False,
+    max_fit_rows: Optional[int] = None,
+    fit_sampling: str = "stratified",
+    upweight_rare: bool = False,
+    epochs: Optional[int] = None,
+    max_training_seconds: Optional[float] = None,
+    early_stopping: bool = True,
+    incremental: bool = True,
+    conditions: Optional[Dict[str, Any]] = None,
+    shard_index: Optional[int] = None,
+    shard_count: Optional[int] = None,
+    row_offset: Optional[int] = None,
+    progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+    cancel_event: Optional[threading.Event] = None
 ) -> Dict[str, Any]:
     """
-    Genera datos sintéticos usando SDV. Usa automáticamente el archivo previamente analizado.
+    Pipeline síncrono de generación SDV (lectura, metadatos, entrenamiento, muestreo).
+    Hace trabajo bloqueante de pandas/SDV/torch: llamarlo desde un executor, nunca
+    desde el hilo del event loop. El progreso se reporta con context.report_progress() o,
+    si se indica progress_callback (p.ej. el de un job en segundo plano), solo con él: un
+    job no debe llegar al stream ni a las métricas del turno que esté activo en la sesión.
+    Si cancel_event se activa, el entrenamiento se detiene en la siguiente época y el
+    muestreo en el siguiente lote. Se entrena con como mucho max_fit_rows filas
+    (submuestreo estratificado o por reservorio, ver fit_sampling). Los modelos neuronales
+    entrenan con épocas, lote e hilos ajustados a la máquina (ver training_budget) y se
+    detienen antes si se agota max_training_seconds o, en TVAE, si la pérdida se estanca. Con
+    incremental, si el archivo es uno ya entrenado con filas añadidas al final, el
+    modelo anterior se actualiza solo con esas filas (ver incremental_refit). Con
+    conditions ({columna: valor}) todas las filas generadas cumplen esos valores
+    (ver conditional_sampling). Con shard_index/shard_count (num_rows es el total del
+    trabajo) o row_offset se escribe solo ese tramo de filas, idéntico en cualquier
+    proceso o máquina que use la misma semilla y el mismo modelo cacheado.
     
-    Args:
-        num_rows: Número de filas sintéticas a generar
-        model_type: Tipo de modelo SDV (GaussianCopula, CTGAN, CopulaGAN, TVAE)
-        
     Returns:
         Diccionario con información del archivo generado
     """
+    tool_name = "generate_synthetic_data_with_sdv"
+
+    def report(phase: str, **data: Any) -> None:
+        if progress_callback:
+            progress_callback({"tool": tool_name, "phase": phase, **data})
+        else:
+            context.report_progress(tool_name, phase, **data)
+
+    def is_cancelled() -> bool:
+        return cancel_event is not None and cancel_event.is_set()
+
+    def compact_for_fit(df: pd.DataFrame, metadata_dict: Dict[str, Any]):
+        # IDs y PII se generan fuera del rango observado: conservan su tipo original
+        modelled = ("numerical", "categorical", "boolean", "datetime")
+        exclude = [col for col, spec in metadata_dict["columns"].items() if spec.get("sdtype") not in modelled]
+        return compact_dataframe(df, exclude=exclude)
+
+    def load_source():
+        # Archivos perfilados por bloques (demasiado grandes): reservorio sin cargarlos enteros
+        info = context.analyzed_file_info or {}
+        if info.get("profiling_mode") == "streaming" and info.get("rows", 0) > fit_row_limit:
+            pool_rows = RESERVOIR_POOL_FACTOR * fit_row_limit
+            report("loading_data", reservoir_rows=pool_rows, bytes_in=os.path.getsize(source_file_path))
+            df, total_rows = reservoir_sample_csv(source_file_path, pool_rows)
+            return df, total_rows
+        report("loading_data", bytes_in=os.path.getsize(source_file_path))
+        df = context.load_dataframe(source_file_path)
+        return df, len(df)
+
+    def prepare_fit_frame(df: pd.DataFrame, metadata_dict: Dict[str, Any], column_roles: Dict[str, Any]):
+        # Quitar IDs/PII/texto y acotar la alta cardinalidad; compactar sobre todas las filas
+        # disponibles y después submuestrear para entrenar
+        df = apply_column_roles(df, column_roles)
+        compact_df, compaction = compact_for_fit(df, metadata_dict)
+        fit_frame, plan = sample_for_fit(
+            compact_df,
+            max_rows=fit_row_limit,
+            strategy=fit_sampling,
+            strata=strata_columns(compact_df, metadata_dict),
+            upweight_rare=upweight_rare
+        )
+        if model_type in ("CTGAN", "TVAE", "CopulaGAN"):
+            # Los modelos neuronales rechazan columnas 'category': se entrenan como texto (solo la submuestra)
+            categorical = fit_frame.select_dtypes(include="category").columns
+            fit_frame = fit_frame.astype({col: object for col in categorical})
+        return fit_frame, compaction, memory_mb(compact_df), plan
+
+    cancelled_result = {
+        "success": False,
+        "cancelled": True,
+        "error": "🛑 Generación cancelada"
+    }
     try:
-        # Obtener contexto del SDK
-        context = wrapper.context
-        
         # 🎯 USAR ARCHIVO DEL CONTEXTO
         if not context.analyzed_file_path:
             return {
@@ -153,27 +380,18 @@ def generate_synthetic_data_with_sdv(
         
         source_file_path = context.analyzed_file_path
         
-        # Cargar datos fuente
-        source_df = pd.read_csv(source_file_path)
-        
-        # Validaciones básicas
-        if len(source_df) < 2:
-            return {
-                "success": False,
-                "error": "❌ Se necesitan al menos 2 filas en los datos fuente para entrenar el modelo"
-            }
-        
-        if num_rows <= 0:
-            return {
-                "success": False,
-                "error": "❌ El número de filas debe ser mayor a 0"
-            }
-        
-        if num_rows > 100000:
-            return {
-                "success": False,
-                "error": "❌ Máximo 100,000 filas por generación para evitar problemas de memoria"
-            }
+        # Validaciones básicas (las mismas que la generación progresiva hace antes de la vista previa)
+        error = validate_generation_params(
+            num_rows, model_type, batch_size=batch_size, num_workers=num_workers, seed=seed,
+            max_fit_rows=max_fit_rows, fit_sampling=fit_sampling, epochs=epochs,
+            max_training_seconds=max_training_seconds, shard_index=shard_index,
+            shard_count=shard_count, row_offset=row_offset
+        )
+        if error is not None:
+            return error
+        row_range = resolve_row_range(num_rows, shard_index, shard_count, row_offset)
+        rows_to_generate = row_range[1] - row_range[0] if row_range else num_rows
+        fit_row_limit = max_fit_rows or MAX_FIT_ROWS
         
         # Import SDV basado en el modelo seleccionado (SDV 1.21+)
         try:
@@ -185,96 +403,365 @@ def generate_synthetic_data_with_sdv(
                 from sdv.single_table import CopulaGANSynthesizer as Synthesizer
             elif model_type == "TVAE":
                 from sdv.single_table import TVAESynthesizer as Synthesizer
+            elif model_type == "FastCopula":
+                from fast_copula import FastCopulaSynthesizer as Synthesizer
             else:
                 return {
                     "success": False,
-                    "error": f"❌ Modelo no soportado: {model_type}. Modelos disponibles: GaussianCopula, CTGAN, CopulaGAN, TVAE"
+                    "error": f"❌ Modelo no soportado: {model_type}. Modelos disponibles: {', '.join(SDV_MODEL_TYPES)}"
                 }
+            from sdv.metadata import SingleTableMetadata
         except ImportError as e:
             return {
                 "success": False,
                 "error": "❌ SDV no está instalado correctamente. Instala con: pip install sdv"
             }
 
-        logger.info(f"🚀 Iniciando entrenamiento {model_type} con {len(source_df)} filas fuente")
+        # 🗄️ Perfil del archivo fuente (metadatos + filas) desde caché, si ya se vio este contenido
+        file_hash = context.file_hash(source_file_path)
+        source_profile = SYNTHESIZER_CACHE.get_source_profile(file_hash)
+        if source_profile is not None and "compaction" not in source_profile:
+            source_profile = None  # Perfil anterior a la compactación de tipos: se recalcula
+        if source_profile is not None and "column_roles" not in source_profile:
+            source_profile = None  # Perfil anterior a los roles de columna: se recalcula
+        if source_profile is not None and "condition_index" not in source_profile:
+            source_profile = None  # Perfil anterior al índice de condiciones: se recalcula
+        source_df = None
+        fit_df = None
+        fit_plan = None
+        
+        # Los modelos entrenados con tipos compactados no se mezclan con los anteriores en la caché,
+        # y cada plan de submuestreo da un modelo distinto
+        base_hyperparameters: Dict[str, Any] = {
+            "dtype_compaction": True,
+            "fit_sampling": {"max_fit_rows": fit_row_limit, "strategy": fit_sampling, "upweight_rare": upweight_rare}
+        }
+        
+        # 🔁 Archivo nuevo que amplía uno ya entrenado: actualizar el modelo solo con las filas añadidas
+        incremental_update = None
+        if source_profile is None and incremental:
+            base = find_appended_base(source_file_path, model_type, base_hyperparameters)
+            if base is not None:
+                report("incremental_refit", model_type=model_type, base_rows=base["rows"])
 
-        # Crear metadatos para SDV 1.21+ (algunos modelos los requieren)
-        try:
-            from sdv.metadata import SingleTableMetadata
-            metadata = SingleTableMetadata()
-            metadata.detect_from_dataframe(source_df)
-            logger.info(f"📊 Metadatos detectados: {len(metadata.columns)} columnas")
-        except Exception as e:
-            logger.error(f"Error creando metadatos: {str(e)}")
-            return {
-                "success": False,
-                "error": f"❌ Error creando metadatos: {str(e)}"
-            }
+                def on_warm_epoch(epochs_done: int, total_epochs: int) -> bool:
+                    report("fitting", model_type=model_type, epoch=epochs_done,
+                           total_epochs=total_epochs, incremental=True)
+                    return not is_cancelled()
 
-        # Crear synthesizer con manejo específico por modelo
-        try:
-            if model_type == "GaussianCopula":
-                # GaussianCopula puede funcionar sin metadatos
-                try:
-                    synthesizer = Synthesizer()
-                except:
-                    synthesizer = Synthesizer(metadata)
-            else:
-                # CTGAN, CopulaGAN, TVAE requieren metadatos
-                synthesizer = Synthesizer(metadata)
-            
-            logger.info(f"✅ Synthesizer {model_type} creado exitosamente")
-            
-            # Entrenar modelo
-            synthesizer.fit(source_df)
-            logger.info(f"✅ Modelo {model_type} entrenado exitosamente")
+                incremental_update = refit_appended(
+                    source_file_path, base, model_type, Synthesizer.load, fit_row_limit,
+                    fit_sampling=fit_sampling, upweight_rare=upweight_rare, on_epoch=on_warm_epoch
+                )
+                if is_cancelled():
+                    return cancelled_result
+            if incremental_update is not None:
+                source_profile = incremental_update["source_profile"]
+                SYNTHESIZER_CACHE.put_source_profile(file_hash, source_profile)
+
+        if source_profile is None:
+            # Cargar datos fuente
+            source_df, total_rows = load_source()
             
-        except Exception as e:
-            logger.error(f"Error entrenando modelo {model_type}: {str(e)}")
+            if len(source_df) < 2:
+                return {
+                    "success": False,
+                    "error": "❌ Se necesitan al menos 2 filas en los datos fuente para entrenar el modelo"
+                }
+
+            # Crear metadatos para SDV 1.21+ (algunos modelos los requieren)
+            report("detecting_metadata")
+            try:
+                metadata = SingleTableMetadata()
+                metadata.detect_from_dataframe(source_df)
+                logger.info(f"📊 Metadatos detectados: {len(metadata.columns)} columnas")
+            except Exception as e:
+                logger.error(f"Error creando metadatos: {str(e)}")
+                return {
+                    "success": False,
+                    "error": f"❌ Error creando metadatos: {str(e)}"
+                }
+
+            # 🏷️ IDs, PII, texto libre y alta cardinalidad no llegan al modelo: se regeneran al muestrear
+            report("detecting_column_roles")
+            column_roles = detect_column_roles(source_df, metadata.to_dict())
+            fit_metadata = model_metadata(metadata.to_dict(), column_roles)
+
+            # 🗜️ Compactar tipos (el esquema permite devolver la salida a los tipos originales)
+            # y submuestrear las filas de entrenamiento
+            report("compacting_dtypes")
+            fit_df, compaction, compacted_mb, fit_plan = prepare_fit_frame(source_df, fit_metadata, column_roles)
+
+            source_profile = {
+                "rows": total_rows,
+                "metadata": fit_metadata,
+                "column_roles": column_roles,
+                "columns": list(source_df.columns),
+                "condition_index": build_condition_index(apply_column_roles(source_df, column_roles), fit_metadata),
+                "compaction": compaction,
+                "memory_mb": {"source": memory_mb(source_df), "compacted": compacted_mb},
+                "dtypes": {col: str(dtype) for col, dtype in source_df.dtypes.items()}
+            }
+            SYNTHESIZER_CACHE.put_source_profile(file_hash, source_profile)
+        elif source_profile["rows"] < 2:
             return {
                 "success": False,
-                "error": f"❌ Error entrenando modelo {model_type}: {str(e)}"
+                "error": "❌ Se necesitan al menos 2 filas en los datos fuente para entrenar el modelo"
+            }
+
+        source_rows = source_profile["rows"]
+        # ⏱️ Épocas, lote e hilos de torch según la máquina (vacío en las cópulas)
+        training_plan = resolve_training_plan(model_type, min(source_rows, fit_row_limit), epochs=epochs)
+        # Cada plan de entrenamiento da también un modelo distinto
+        hyperparameters: Dict[str, Any] = dict(base_hyperparameters)
+        if training_plan:
+            hyperparameters["training"] = {
+                "epochs": training_plan["epochs"],
+                "batch_size": training_plan["batch_size"],
+                "early_stopping": early_stopping,
+                "max_training_seconds": max_training_seconds
             }
+        training_summary = None
+        cache_key = make_cache_key(
+            file_hash, model_type, fingerprint_metadata(source_profile["metadata"]), hyperparameters
+        )
+
+        # 🗄️ Reutilizar synthesizer ya entrenado si existe en caché
+        synthesizer = SYNTHESIZER_CACHE.get(cache_key, Synthesizer.load)
+        cache_hit = synthesizer is not None
+
+        if cache_hit:
+            logger.info(f"♻️ Synthesizer {model_type} recuperado de caché, se omite el entrenamiento")
+        elif incremental_update is not None:
+            synthesizer = incremental_update["synthesizer"]
+            context.add_to_history("model_refit_incremental", {"model_type": model_type, **incremental_update["summary"]})
+            SYNTHESIZER_CACHE.put(cache_key, synthesizer)
+        else:
+            if fit_df is None:
+                source_df, _ = load_source()
+                fit_df, _, _, fit_plan = prepare_fit_frame(
+                    source_df, source_profile["metadata"], source_profile["column_roles"]
+                )
+            metadata = SingleTableMetadata.load_from_dict(source_profile["metadata"])
+
+            fit_plan["source_rows"] = source_rows
+            context.add_to_history("fit_sampling_planned", {"model_type": model_type, **fit_plan})
+            logger.info(f"🚀 Iniciando entrenamiento {model_type} con {len(fit_df)} de {source_rows} filas fuente")
+
+            # Crear synthesizer con manejo específico por modelo
+            try:
+                if model_type == "GaussianCopula":
+                    # GaussianCopula puede funcionar sin metadatos
+                    try:
+                        synthesizer = Synthesizer()
+                    except:
+                        synthesizer = Synthesizer(metadata)
+                elif training_plan:
+                    # CTGAN, CopulaGAN, TVAE requieren metadatos y entrenan con el plan resuelto
+                    training_plan["torch_threads"] = apply_torch_threads(training_plan["torch_threads"]) \
+                        or training_plan["torch_threads"]
+                    synthesizer = Synthesizer(
+                        metadata, epochs=training_plan["epochs"], batch_size=training_plan["batch_size"]
+                    )
+                else:
+                    # FastCopula usa los metadatos para IDs y PII
+                    synthesizer = Synthesizer(metadata)
+                
+                logger.info(f"✅ Synthesizer {model_type} creado exitosamente")
+                
+                # Entrenar modelo (con progreso por época en los modelos neuronales)
+                report("fitting", model_type=model_type, source_rows=source_rows, fit_rows=len(fit_df))
+                budget = TrainingBudget(model_type, early_stopping=early_stopping, max_seconds=max_training_seconds)
+
+                def on_epoch(epochs_done: int, total_epochs: int) -> bool:
+                    losses = latest_losses(synthesizer)
+                    report(
+                        "fitting",
+                        model_type=model_type,
+                        epoch=epochs_done,
+                        total_epochs=total_epochs,
+                        losses=losses
+                    )
+                    if is_cancelled():
+                        return False
+                    return budget.should_continue(epochs_done, total_epochs, losses)
+
+                with epoch_hook(on_epoch):
+                    synthesizer.fit(fit_df)
+                if training_plan:
+                    training_summary = {
+                        **budget.summary(training_plan["epochs"]),
+                        "batch_size": training_plan["batch_size"],
+                        "torch_threads": training_plan["torch_threads"],
+                        "hints": training_plan["hints"]
+                    }
+                    context.add_to_history("model_trained", {"model_type": model_type, **training_summary})
+                logger.info(f"✅ Modelo {model_type} entrenado exitosamente")
+                
+            except Exception as e:
+                logger.error(f"Error entrenando modelo {model_type}: {str(e)}")
+                return {
+                    "success": False,
+                    "error": f"❌ Error entrenando modelo {model_type}: {str(e)}"
+                }
+
+            # Un modelo cortado por cancelación queda a medio entrenar: no se cachea
+            if is_cancelled():
+                return cancelled_result
+
+            SYNTHESIZER_CACHE.put(cache_key, synthesizer)
         
-        logger.info(f"🎯 Generando {num_rows} filas sintéticas...")
+        # Registrar el archivo entrenado para actualizarlo de forma incremental cuando crezca
+        record_fit(source_file_path, file_hash, source_profile, model_type, base_hyperparameters, cache_key)
         
-        # Generar datos sintéticos
-        try:
-            synthetic_data = synthesizer.sample(num_rows)
-            logger.info(f"✅ {num_rows} filas sintéticas generadas exitosamente")
-        except Exception as e:
-            logger.error(f"Error generando datos: {str(e)}")
-            return {
-                "success": False,
-                "error": f"❌ Error generando {num_rows} filas: {str(e)}"
-            }
+        # 🎯 Muestreo condicionado: directo en FastCopula, con un submodelo cacheado si las
+        # condiciones están en el índice o, si no lo están, por rechazo sobre el modelo
+        sampler = synthesizer
+        sampler_key = cache_key
+        conditional_sampler = None
+        model_used = model_type
+        if conditions:
+            try:
+                conditions = validate_conditions(
+                    conditions, source_profile["metadata"], source_profile["column_roles"],
+                    source_profile["condition_index"]
+                )
+            except ValueError as e:
+                return {"success": False, "error": f"❌ {e}"}
+            acceptance = estimate_acceptance(conditions, source_profile["condition_index"])
+            strategy = choose_strategy(model_type, acceptance)
+            report("conditioning", conditions=conditions, strategy=strategy, expected_acceptance=acceptance)
+
+            if strategy == "submodel":
+                submodel_key = make_cache_key(
+                    file_hash, "FastCopula", fingerprint_metadata(source_profile["metadata"]),
+                    {**base_hyperparameters, "conditions": conditions}
+                )
+                sampler_key = submodel_key
+                model_used = "FastCopula"
+                sampler = SYNTHESIZER_CACHE.get(submodel_key, FastCopulaSynthesizer.load)
+                if sampler is None:
+                    if fit_df is None:
+                        source_df, _ = load_source()
+                        fit_df, _, _, _ = prepare_fit_frame(
+                            source_df, source_profile["metadata"], source_profile["column_roles"]
+                        )
+                    try:
+                        sampler = fit_condition_submodel(
+                            fit_df, SingleTableMetadata.load_from_dict(source_profile["metadata"]), conditions
+                        )
+                    except ValueError as e:
+                        return {"success": False, "error": f"❌ {e}"}
+                    SYNTHESIZER_CACHE.put(submodel_key, sampler)
+            conditional_sampler = ConditionalSampler(sampler, conditions, strategy, acceptance)
+            sampler = conditional_sampler
         
         # Crear archivo con nombre descriptivo en directorio de trabajo
         timestamp = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
         source_filename = os.path.splitext(os.path.basename(source_file_path))[0]
-        output_filename = f"{source_filename}_synthetic_data_{model_type.lower()}_{num_rows}rows_{timestamp}.csv"
+        conditional_tag = "_conditional" if conditions else ""
+        rows_tag = f"rows{row_range[0]}-{row_range[1]}" if row_range else f"{num_rows}rows"
+        output_filename = f"{source_filename}_synthetic_data_{model_used.lower()}{conditional_tag}_{rows_tag}_{timestamp}.csv"
+        if num_workers > 1 and partitioned_output:
+            output_filename = os.path.splitext(output_filename)[0]
         
         # Guardar en directorio específico para datos sintéticos
-        output_dir = "/Users/davidnogueras/Desktop/Cursor/Synthetic_Data_Generator/synthetic_data_generator_basic/Synthetic data generated"
+        output_dir = str(OUTPUT_DIR)
         os.makedirs(output_dir, exist_ok=True)
         output_path = os.path.join(output_dir, output_filename)
         
-        # Guardar archivo CSV
-        synthetic_data.to_csv(output_path, index=False)
+        logger.info(f"🎯 Generando {rows_to_generate} filas sintéticas...")
+        report("sampling", rows_sampled=0, total_rows=rows_to_generate)
+
+        def on_batch(rows_sampled: int, total_rows: int) -> None:
+            if is_cancelled():
+                raise GenerationCancelled()
+            report("sampling", rows_sampled=rows_sampled, total_rows=total_rows)
+
+        # Cada lote sintético vuelve a los tipos originales antes de escribirse
+        restore = functools.partial(restore_dtypes, schema=source_profile["compaction"])
+        # ...y recupera las columnas que se quitaron del modelo, en el orden original
+        if source_profile["column_roles"]:
+            restore = ColumnRegenerator(
+                source_profile["column_roles"], source_profile["columns"], seed=seed, before=restore
+            )
+        
+        # Generar datos sintéticos por lotes, escribiendo cada lote directamente al CSV
+        try:
+            # El synthesizer cacheado es compartido: semilla y estado de muestreo, de una sesión a la vez
+            with SYNTHESIZER_CACHE.sampling_lock(sampler_key):
+                if num_workers > 1:
+                    sampling = sample_to_csv_parallel(
+                        sampler,
+                        rows_to_generate,
+                        output_path,
+                        num_workers=num_workers,
+                        base_seed=seed,
+                        batch_size=batch_size or DEFAULT_BATCH_SIZE,
+                        partitioned_output=partitioned_output,
+                        work_dir=context.temp_dir,
+                        on_batch=on_batch,
+                        transform=restore,
+                        row_range=row_range
+                    )
+                elif row_range:
+                    sampling = sample_range_to_csv(
+                        sampler,
+                        row_range[0],
+                        row_range[1],
+                        output_path,
+                        base_seed=seed,
+                        on_batch=on_batch,
+                        transform=restore
+                    )
+                else:
+                    if seed is not None:
+                        seed_synthesizer(sampler, seed)
+                    sampling = sample_to_csv(
+                        sampler,
+                        num_rows,
+                        output_path,
+                        batch_size=batch_size or DEFAULT_BATCH_SIZE,
+                        on_batch=on_batch,
+                        transform=restore
+                    )
+            logger.info(f"✅ {sampling['rows_written']} filas sintéticas generadas en {sampling['batches']} lotes")
+        except GenerationCancelled:
+            logger.info(f"🛑 Muestreo cancelado, se elimina la salida parcial: {output_path}")
+            if os.path.isdir(output_path):
+                shutil.rmtree(output_path, ignore_errors=True)
+            elif os.path.exists(output_path):
+                os.remove(output_path)
+            return cancelled_result
+        except Exception as e:
+            logger.error(f"Error generando datos: {str(e)}")
+            return {
+                "success": False,
+                "error": f"❌ Error generando {rows_to_generate} filas: {str(e)}"
+            }
         
         # Calcular métricas básicas
-        file_size_mb = round(os.path.getsize(output_path) / 1024 / 1024, 2)
+        if os.path.isdir(output_path):
+            output_bytes = sum(entry.stat().st_size for entry in os.scandir(output_path))
+        else:
+            output_bytes = os.path.getsize(output_path)
+        file_size_mb = round(output_bytes / 1024 / 1024, 2)
         
         # 🎯 ACTUALIZAR CONTEXTO
         context.generated_file_path = output_path
         context.generated_file_id = timestamp
-        context.generated_rows = num_rows
-        context.last_model_used = model_type
+        context.generated_rows = rows_to_generate
+        context.last_model_used = model_used
         context.add_to_history("synthetic_data_generated", {
             "model_type": model_type,
-            "num_rows": num_rows,
+            "num_rows": rows_to_generate,
+            "row_range": list(row_range) if row_range else None,
             "output_filename": output_filename,
             "file_size_mb": file_size_mb,
+            "synthesizer_cache": "hit" if cache_hit else "miss",
+            "incremental_refit": bool(incremental_update) and not cache_hit,
+            "conditions": conditions or None,
+            "batches": sampling["batches"],
             "saved_to": "synthetic_data_generated_directory"
         })
         
@@ -285,17 +772,51 @@ def generate_synthetic_data_with_sdv(
             "output_path": output_path,
             "saved_in_specific_directory": True,
             "full_path_for_access": output_path,
-            "rows_generated": num_rows,
-            "columns": list(synthetic_data.columns),
-            "model_used": model_type,
+            "rows_generated": rows_to_generate,
+            "columns": sampling["columns"],
+            "model_used": model_used,
+            "trained_model": model_type,
             "source_file": os.path.basename(source_file_path),
-            "source_rows": len(source_df),
+            "source_rows": source_rows,
+            "synthesizer_cache": "hit" if cache_hit else "miss",
+            "training_skipped": cache_hit,
             "file_size_mb": file_size_mb,
-            "sample_synthetic_data": synthetic_data.head(3).to_dict('records'),
-            "generation_summary": f"✅ Generadas {num_rows:,} filas sintéticas usando {model_type} desde {len(source_df):,} filas originales",
+            "sample_synthetic_data": sampling["sample_rows"],
+            "rows_written": sampling["rows_written"],
+            "batches": sampling["batches"],
+            "batch_size": sampling["batch_size"],
+            "peak_rss_mb": sampling["peak_rss_mb"],
+            "workers": sampling.get("workers", 1),
+            "base_seed": sampling.get("base_seed", seed),
+            "shards": sampling.get("shards", []),
+            "source_memory_mb": source_profile["memory_mb"]["source"],
+            "compacted_memory_mb": source_profile["memory_mb"]["compacted"],
+            "fit_sampling": fit_plan,
+            "training": training_summary,
+            "incremental_refit": incremental_update["summary"] if incremental_update and not cache_hit else None,
+            "column_treatments": summarize_roles(source_profile["column_roles"]),
+            "regeneration_seed": restore.seed if isinstance(restore, ColumnRegenerator) else None,
+            "conditional_sampling": conditional_sampler.summary() if conditional_sampler else None,
+            "row_range": {
+                "start_row": row_range[0],
+                "end_row": row_range[1],
+                "shard_index": shard_index,
+                "shard_count": shard_count,
+                "total_rows": num_rows if shard_count else None,
+                "seed": seed,
+                "block_rows": BLOCK_ROWS,
+                "model_cache_key": cache_key
+            } if row_range else None,
+            "compacted_columns": {
+                col: f"{entry['original_dtype']} → {entry['compact_dtype']}"
+                for col, entry in source_profile["compaction"].items()
+            },
+            "generation_summary": f"✅ Generadas {rows_to_generate:,} filas sintéticas usando {model_type} desde {source_rows:,} filas originales",
             "access_instructions": f"El archivo se guardó en: {output_path}"
         }
         
+        report("completed", rows_sampled=sampling["rows_written"], total_rows=rows_to_generate,
+               bytes_out=output_bytes, write_seconds=sampling.get("write_seconds"))
         logger.info(f"✅ Datos sintéticos generados y guardados en contexto: {output_filename} ({file_size_mb}MB)")
         return result
         
@@ -306,6 +827,170 @@ def generate_synthetic_data_with_sdv(
     
 
 @function_tool
+@instrument_tool
+async def generate_synthetic_data_with_sdv(
+    wrapper: RunContextWrapper[SyntheticDataContext],
+    num_rows: int,
+    model_type: str = "GaussianCopula",
+    batch_size: Optional[int] = None,
+    num_workers: int = 1,
+    seed: Optional[int] = None,
+    partitioned_output: bool = False,
+    max_fit_rows: Optional[int] = None,
+    fit_sampling: str = "stratified",
+    upweight_rare: bool = False,
+    epochs: Optional[int] = None,
+    max_training_seconds: Optional[float] = None,
+    early_stopping: bool = True,
+    incremental: bool = True,
+    conditions: Optional[str] = None,
+    shard_index: Optional[int] = None,
+    shard_count: Optional[int] = None,
+    row_offset: Optional[int] = None,
+    preview: Optional[bool] = None
+) -> Dict[str, Any]:
+    """
+    Genera datos sintéticos usando SDV. Usa automáticamente el archivo previamente analizado.
+    Las filas se generan y escriben por lotes, por lo que no hay límite de filas por memoria.
+    Con modelos lentos (CTGAN, TVAE, CopulaGAN) devuelve al instante una vista previa
+    y entrena el modelo pedido como trabajo en segundo plano.
+    
+    Args:
+        num_rows: Número de filas sintéticas a generar
+        model_type: Tipo de modelo (GaussianCopula, CTGAN, CopulaGAN, TVAE, FastCopula)
+        batch_size: Filas por lote de muestreo (por defecto 50,000)
+        num_workers: Procesos de muestreo en paralelo (1 = un solo núcleo)
+        seed: Semilla base para resultados reproducibles
+        partitioned_output: Con varios workers, dejar un CSV por shard en un directorio
+        max_fit_rows: Máximo de filas fuente para entrenar (por defecto 100,000)
+        fit_sampling: Submuestreo de entrenamiento: stratified (conserva categorías raras) o reservoir
+        upweight_rare: Replicar las filas de categorías raras al entrenar
+        epochs: Épocas de CTGAN/TVAE/CopulaGAN (por defecto, según núcleos, RAM y filas)
+        max_training_seconds: Presupuesto de tiempo de entrenamiento; al agotarse se para y se usa el modelo
+        early_stopping: Parar TVAE cuando su pérdida deja de mejorar (CTGAN/CopulaGAN: solo max_training_seconds)
+        incremental: Si el archivo amplía uno ya entrenado, actualizar el modelo solo con las filas nuevas
+        conditions: Valores fijos para todas las filas, p.ej. "country=ES, segment=premium" o JSON
+        shard_index: Shard a generar (0..shard_count-1) de un trabajo de num_rows filas; requiere seed
+        shard_count: Número total de shards del trabajo
+        row_offset: Generar num_rows filas a partir de esta fila del trabajo; requiere seed
+        preview: Vista previa inmediata + modelo en segundo plano (por defecto, solo modelos lentos)
+        
+    Returns:
+        Diccionario con información del archivo generado (o de la vista previa y el trabajo)
+    """
+    # Import local para evitar circular import
+    from progressive_generation import HEAVY_MODELS, start_progressive_generation
+
+    try:
+        parsed_conditions = parse_conditions(conditions)
+    except ValueError as e:
+        return {"success": False, "error": f"❌ {e}"}
+
+    params = {
+        "num_rows": num_rows,
+        "model_type": model_type,
+        "batch_size": batch_size,
+        "num_workers": num_workers,
+        "seed": seed,
+        "partitioned_output": partitioned_output,
+        "max_fit_rows": max_fit_rows,
+        "fit_sampling": fit_sampling,
+        "upweight_rare": upweight_rare,
+        "epochs": epochs,
+        "max_training_seconds": max_training_seconds,
+        "early_stopping": early_stopping,
+        "incremental": incremental,
+        "conditions": parsed_conditions,
+        "shard_index": shard_index,
+        "shard_count": shard_count,
+        "row_offset": row_offset
+    }
+    if preview is None:
+        # Un shard de un trabajo repartido no necesita vista previa
+        preview = model_type in HEAVY_MODELS and shard_count is None and row_offset is None
+    
+    # 🧵 Entrenamiento y muestreo fuera del event loop para no bloquear otras sesiones
+    loop = asyncio.get_running_loop()
+    if preview:
+        return await loop.run_in_executor(
+            SDV_EXECUTOR, functools.partial(start_progressive_generation, wrapper.context, params)
+        )
+    return await loop.run_in_executor(
+        SDV_EXECUTOR, functools.partial(run_sdv_generation, wrapper.context, **params)
+    )
+
+
+@function_tool
+@instrument_tool
+async def list_sdv_models(
+    wrapper: RunContextWrapper[SyntheticDataContext],
+    num_rows: Optional[int] = None,
+    models: Optional[List[str]] = None,
+    max_fit_rows: Optional[int] = None,
+    refresh: bool = False
+) -> Dict[str, Any]:
+    """
+    Lista los modelos disponibles con su coste medido sobre el archivo analizado.
+    La primera vez entrena cada modelo sobre una submuestra pequeña (unos segundos por modelo)
+    y extrapola; después usa la calibración cacheada para ese archivo.
+    
+    Args:
+        num_rows: Filas sintéticas a generar para estimar el muestreo (por defecto, las del archivo)
+        models: Modelos a evaluar (por defecto todos: FastCopula, GaussianCopula, CTGAN, TVAE, CopulaGAN)
+        max_fit_rows: Máximo de filas fuente para entrenar (por defecto 100,000)
+        refresh: Volver a medir aunque haya una calibración cacheada
+        
+    Returns:
+        Por modelo: tiempo de entrenamiento, velocidad y tiempo de muestreo y pico de memoria estimados
+    """
+    # Import local para evitar circular import
+    from model_calibration import estimate_model_costs
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        SDV_EXECUTOR,
+        functools.partial(
+            estimate_model_costs,
+            wrapper.context,
+            num_rows=num_rows,
+            models=models,
+            max_fit_rows=max_fit_rows,
+            refresh=refresh
+        )
+    )
+
+
+@function_tool
+@instrument_tool
+def create_download_link(wrapper: RunContextWrapper[SyntheticDataContext]) -> Dict[str, Any]:
+    """
+    Devuelve el enlace al último archivo sintético generado en la sesión.
+    
+    Returns:
+        Ruta, nombre y enlace file:// del archivo generado
+    """
+    context = wrapper.context
+    if not context.generated_file_path or not os.path.exists(context.generated_file_path):
+        return {
+            "success": False,
+            "error": "❌ Todavía no hay archivo generado. Usa generate_synthetic_data_with_sdv() primero"
+        }
+    
+    path = Path(context.generated_file_path).resolve()
+    return {
+        "success": True,
+        "file_id": context.generated_file_id,
+        "filename": path.name,
+        "file_path": str(path),
+        "download_url": path.as_uri(),
+        "size_mb": round(path.stat().st_size / 1024 / 1024, 2),
+        "rows": context.generated_rows,
+        "model_used": context.last_model_used
+    }
+
+
+@function_tool
+@instrument_tool
 def get_session_status(wrapper: RunContextWrapper[SyntheticDataContext]) -> Dict[str, Any]:
     """
     Obtiene el estado completo de la sesión actual.
@@ -317,6 +1002,10 @@ def get_session_status(wrapper: RunContextWrapper[SyntheticDataContext]) -> Dict
         # Obtener contexto del SDK
         context = wrapper.context
         
+        # Import local para evitar circular import
+        from generation_jobs import GENERATION_JOBS
+        from progressive_generation import stages_status
+        
         session_status = {
             "success": True,
             "session_info": {
@@ -336,8 +1025,27 @@ def get_session_status(wrapper: RunContextWrapper[SyntheticDataContext]) -> Dict
                 "rows_generated": context.generated_rows,
                 "model_used": context.last_model_used
             },
+            "synthesizer_cache": SYNTHESIZER_CACHE.get_stats(),
+            "dataset_cache": context.dataset_cache.get_stats() if context.dataset_cache else None,
+            "generation_jobs": [
+                {
+                    "job_id": job.job_id,
+                    "status": job.status,
+                    "model_type": job.params.get("model_type"),
+                    "num_rows": job.params.get("num_rows"),
+                    "wait_seconds": job.wait_seconds,
+                    "run_seconds": job.run_seconds,
+                    "phase": job.progress.get("phase")
+                }
+                for job in GENERATION_JOBS.list_jobs(context.session_id)
+            ],
+            "progressive_generation": stages_status(context),
             "processing_history": context.processing_history[-5:] if context.processing_history else [],  # Últimas 5 acciones
-            "total_actions": len(context.processing_history)
+            "total_actions": len(context.processing_history),
+            "recent_tool_metrics": [
+                {"tool": m["tool"], "success": m["success"], "wall_seconds": m["wall_seconds"]}
+                for m in list(context.tool_metrics)[-5:]
+            ]
         }
         
         return session_status
@@ -363,9 +1071,16 @@ def get_tools_for_agent(agent_type: str) -> list:
         Lista de function_tools para el agente
     """
     if agent_type == "sample_data":
+        # Import local para evitar circular import
+        from generation_jobs import submit_generation_job, get_generation_job_status, cancel_generation_job
         return [
             analyze_csv_file,
+            list_sdv_models,
             generate_synthetic_data_with_sdv,
+            create_download_link,
+            submit_generation_job,
+            get_generation_job_status,
+            cancel_generation_job,
             get_session_status
         ]
     elif agent_type == "pure_synthetic":
@@ -0,0 +1,505 @@
+"""
+SDV Sampling - Muestreo por lotes desde synthesizers entrenados
+Escribe las filas sintéticas al archivo a medida que se generan, con memoria constante
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import secrets
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Any, Optional, Callable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Tamaño de lote por defecto: suficientemente grande para amortizar el coste por llamada
+# a synthesizer.sample(), suficientemente pequeño para mantener la memoria acotada
+DEFAULT_BATCH_SIZE = 50_000
+
+# Filas por bloque de aleatoriedad en el muestreo por rango: la fila i sale siempre del
+# bloque i // BLOCK_ROWS con la misma semilla, sea cual sea el shard, worker o máquina
+BLOCK_ROWS = int(os.getenv("SAMPLING_BLOCK_ROWS", "10000"))
+
+# Cada cuánto se consulta el pool en el muestreo paralelo (progreso y cancelación)
+POOL_POLL_SECONDS = 1.0
+
+
+def get_peak_rss_mb() -> Optional[float]:
+    """
+    Pico de memoria residente (RSS) de toda la vida del proceso en MB (ru_maxrss), o None si
+    no está disponible. No baja nunca: para el pico de una llamada usa RssPeak.
+    """
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB, macOS reporta bytes
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 2)
+
+
+def get_current_rss_mb() -> Optional[float]:
+    """RSS actual del proceso en MB (/proc/self/statm, Linux), o None si no está disponible"""
+    try:
+        with open("/proc/self/statm") as statm:
+            resident_pages = int(statm.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return round(resident_pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024, 2)
+
+
+class RssPeak:
+    """
+    Máximo del RSS actual visto en las muestras de una llamada (al crearse y en cada
+    ``sample()``, p.ej. tras cada lote). A diferencia de ru_maxrss, una llamada no hereda
+    el pico de las anteriores. None donde no se puede leer el RSS actual.
+    """
+
+    def __init__(self):
+        self.peak_mb: Optional[float] = None
+        self.sample()
+
+    def sample(self) -> Optional[float]:
+        current = get_current_rss_mb()
+        if current is not None and (self.peak_mb is None or current > self.peak_mb):
+            self.peak_mb = current
+        return self.peak_mb
+
+
+def sample_to_csv(synthesizer,
+                  num_rows: int,
+                  output_path: str,
+                  batch_size: int = DEFAULT_BATCH_SIZE,
+                  on_batch: Optional[Callable[[int, int], None]] = None,
+                  transform: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None) -> Dict[str, Any]:
+    """
+    Muestrear ``num_rows`` filas en lotes de ``batch_size`` y anexarlas al CSV de salida.
+
+    Solo un lote vive en memoria a la vez, así que el consumo no depende de ``num_rows``.
+
+    Args:
+        synthesizer: Synthesizer SDV ya entrenado
+        num_rows: Número total de filas a generar
+        output_path: Ruta del CSV de salida (se sobrescribe)
+        batch_size: Filas por llamada a ``synthesizer.sample()``
+        on_batch: Callback opcional ``(filas_escritas, filas_totales)`` tras cada lote
+        transform: Función opcional aplicada a cada lote antes de escribirlo
+
+    Returns:
+        Resumen con filas escritas, lotes, columnas, muestra, segundos de escritura, pico de RSS
+        de la llamada (``peak_rss_mb``, muestreado por lote) y pico del proceso (``process_peak_rss_mb``)
+
+    Raises:
+        RuntimeError: si un lote vuelve vacío (el bucle no podría terminar)
+    """
+    batch_size = max(1, min(batch_size, num_rows))
+    rss = RssPeak()
+    rows_written = 0
+    batches = 0
+    write_seconds = 0.0
+    columns = []
+    sample_rows = []
+
+    with open(output_path, "w", newline="", encoding="utf-8") as output_file:
+        while rows_written < num_rows:
+            rows_in_batch = min(batch_size, num_rows - rows_written)
+            batch = synthesizer.sample(rows_in_batch)
+            if transform:
+                batch = transform(batch)
+            if len(batch) == 0:
+                # Sin avance posible (p.ej. un filtro o una condición descartan todas las filas)
+                raise RuntimeError(
+                    f"El muestreo devolvió un lote vacío tras {rows_written:,}/{num_rows:,} filas"
+                )
+
+            write_start = time.perf_counter()
+            batch.to_csv(output_file, index=False, header=(batches == 0))
+            write_seconds += time.perf_counter() - write_start
+            rss.sample()
+
+            if batches == 0:
+                columns = list(batch.columns)
+                sample_rows = batch.head(3).to_dict("records")
+
+            rows_written += len(batch)
+            batches += 1
+            del batch
+
+            if on_batch:
+                on_batch(rows_written, num_rows)
+            if batches % 10 == 0:
+                logger.info(f"📦 {rows_written:,}/{num_rows:,} filas escritas ({batches} lotes)")
+
+    return {
+        "rows_written": rows_written,
+        "batches": batches,
+        "batch_size": batch_size,
+        "columns": columns,
+        "sample_rows": sample_rows,
+        "write_seconds": round(write_seconds, 4),
+        "peak_rss_mb": rss.peak_mb,
+        "process_peak_rss_mb": get_peak_rss_mb()
+    }
+
+
+# ==========================================
+# MUESTREO PARALELO MULTI-PROCESO
+# ==========================================
+
+def split_rows(num_rows: int, num_shards: int) -> List[int]:
+    """Repartir filas entre shards de forma determinista (los primeros reciben el resto)"""
+    base, remainder = divmod(num_rows, num_shards)
+    return [base + (1 if i < remainder else 0) for i in range(num_shards)]
+
+
+def derive_shard_seeds(base_seed: int, num_shards: int) -> List[int]:
+    """Semillas independientes y reproducibles por shard a partir de una semilla base"""
+    children = np.random.SeedSequence(base_seed).spawn(num_shards)
+    return [int(child.generate_state(1)[0]) for child in children]
+
+
+def seed_synthesizer(synthesizer, seed: int, start_row: int = 0) -> None:
+    """
+    Reiniciar el muestreo del synthesizer y fijar su generador aleatorio. Los modelos que
+    generan IDs propios (FastCopula) los numeran desde ``start_row``, la fila absoluta del
+    trabajo, para que bloques y shards no repitan IDs.
+    """
+    synthesizer.reset_sampling()
+    synthesizer._set_random_state(seed)
+    if hasattr(synthesizer, "set_start_row"):
+        synthesizer.set_start_row(start_row)
+
+
+# ==========================================
+# MUESTREO REPRODUCIBLE POR RANGO DE FILAS
+# ==========================================
+
+def resolve_row_range(num_rows: int,
+                      shard_index: Optional[int] = None,
+                      shard_count: Optional[int] = None,
+                      row_offset: Optional[int] = None) -> Optional[Tuple[int, int]]:
+    """
+    Filas [inicio, fin) que tocan a esta llamada dentro de un trabajo mayor.
+
+    - ``shard_index``/``shard_count``: ``num_rows`` es el total del trabajo y se devuelve
+      la parte del shard (mismo reparto que split_rows)
+    - ``row_offset``: se generan ``num_rows`` filas a partir de esa fila
+    Devuelve None si no se pidió ninguna de las dos cosas. Lanza ValueError si son incoherentes.
+    """
+    if shard_index is None and shard_count is None and row_offset is None:
+        return None
+    if row_offset is not None:
+        if shard_index is not None or shard_count is not None:
+            raise ValueError("Usa row_offset o shard_index/shard_count, no ambos")
+        if row_offset < 0:
+            raise ValueError("row_offset no puede ser negativo")
+        return row_offset, row_offset + num_rows
+    if shard_index is None or shard_count is None:
+        raise ValueError("shard_index y shard_count deben indicarse juntos")
+    if shard_count < 1 or not 0 <= shard_index < shard_count:
+        raise ValueError(f"shard_index debe estar entre 0 y {shard_count - 1}")
+    if shard_count > num_rows:
+        raise ValueError("Hay más shards que filas en el trabajo")
+    shard_rows = split_rows(num_rows, shard_count)
+    start = sum(shard_rows[:shard_index])
+    return start, start + shard_rows[shard_index]
+
+
+def derive_block_seed(base_seed: int, block_index: int) -> int:
+    """Semilla de un bloque: depende solo de la semilla base y de la posición del bloque"""
+    return int(np.random.SeedSequence([base_seed, block_index]).generate_state(1)[0])
+
+
+def sample_range_to_csv(synthesizer,
+                        start_row: int,
+                        end_row: int,
+                        output_path: str,
+                        base_seed: int,
+                        block_rows: int = BLOCK_ROWS,
+                        on_batch: Optional[Callable[[int, int], None]] = None,
+                        transform: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None) -> Dict[str, Any]:
+    """
+    Escribir exactamente las filas [start_row, end_row) del trabajo definido por ``base_seed``.
+
+    Cada bloque de ``block_rows`` filas se muestrea completo con su propia semilla y se
+    recorta al rango, así que una fila es idéntica aunque la genere otro shard, otro
+    número de workers u otro proceso. Una transformación con ``for_shard`` recibe la
+    fila inicial y la semilla del bloque (las secuencias de claves no colisionan).
+
+    Returns:
+        Mismo resumen que sample_to_csv, más el rango, la semilla y el tamaño de bloque
+
+    Raises:
+        RuntimeError: si un bloque vuelve con menos de ``block_rows`` filas
+    """
+    total_rows = end_row - start_row
+    rss = RssPeak()
+    rows_written = 0
+    batches = 0
+    write_seconds = 0.0
+    columns = []
+    sample_rows = []
+
+    with open(output_path, "w", newline="", encoding="utf-8") as output_file:
+        for block_index in range(start_row // block_rows, -(-end_row // block_rows)):
+            block_start = block_index * block_rows
+            block_seed = derive_block_seed(base_seed, block_index)
+            seed_synthesizer(synthesizer, block_seed, start_row=block_start)
+            batch = synthesizer.sample(block_rows)
+            if transform:
+                block_transform = transform.for_shard(block_start, block_seed) if hasattr(transform, "for_shard") else transform
+                batch = block_transform(batch)
+            if len(batch) < block_rows:
+                # Un bloque corto desplazaría todas las filas siguientes: el rango dejaría de ser reproducible
+                raise RuntimeError(
+                    f"El bloque {block_index} devolvió {len(batch):,} de {block_rows:,} filas"
+                )
+
+            first = max(start_row - block_start, 0)
+            last = min(end_row - block_start, block_rows)
+            batch = batch.iloc[first:last]
+            write_start = time.perf_counter()
+            batch.to_csv(output_file, index=False, header=(batches == 0))
+            write_seconds += time.perf_counter() - write_start
+            rss.sample()
+
+            if batches == 0:
+                columns = list(batch.columns)
+                sample_rows = batch.head(3).to_dict("records")
+
+            rows_written += len(batch)
+            batches += 1
+            del batch
+
+            if on_batch:
+                on_batch(rows_written, total_rows)
+
+    return {
+        "rows_written": rows_written,
+        "batches": batches,
+        "batch_size": block_rows,
+        "columns": columns,
+        "sample_rows": sample_rows,
+        "write_seconds": round(write_seconds, 4),
+        "peak_rss_mb": rss.peak_mb,
+        "process_peak_rss_mb": get_peak_rss_mb(),
+        "start_row": start_row,
+        "end_row": end_row,
+        "base_seed": base_seed,
+        "block_rows": block_rows
+    }
+
+
+# Synthesizer cargado una sola vez por proceso worker (ver _init_worker)
+_WORKER_SYNTHESIZER = None
+
+
+def _init_worker(model_path: str) -> None:
+    """Inicializador de cada worker: deserializa el modelo y evita sobresuscribir hilos"""
+    global _WORKER_SYNTHESIZER
+    try:
+        import torch
+        torch.set_num_threads(1)
+    except ImportError:
+        pass
+
+    import cloudpickle
+    with open(model_path, "rb") as f:
+        _WORKER_SYNTHESIZER = cloudpickle.load(f)
+
+
+def _sample_shard(shard_index: int, num_rows: int, seed: int, output_path: str, batch_size: int,
+                  transform: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+                  start_row: int = 0) -> Dict[str, Any]:
+    """
+    Trabajo de un worker: muestrear su shard con su propia semilla.
+    Una transformación con estado (p.ej. secuencias de IDs) expone ``for_shard(fila_inicial, semilla)``
+    para que los shards no repitan valores.
+    """
+    seed_synthesizer(_WORKER_SYNTHESIZER, seed, start_row=start_row)
+    if hasattr(transform, "for_shard"):
+        transform = transform.for_shard(start_row, seed)
+    summary = sample_to_csv(_WORKER_SYNTHESIZER, num_rows, output_path,
+                            batch_size=batch_size, transform=transform)
+    summary["shard_index"] = shard_index
+    summary["seed"] = seed
+    summary["output_path"] = output_path
+    return summary
+
+
+def _sample_range_shard(shard_index: int, start_row: int, end_row: int, base_seed: int, output_path: str,
+                        block_rows: int, transform: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None
+                        ) -> Dict[str, Any]:
+    """Trabajo de un worker en modo rango: sus filas salen de los mismos bloques que en un solo proceso"""
+    summary = sample_range_to_csv(_WORKER_SYNTHESIZER, start_row, end_row, output_path, base_seed,
+                                  block_rows=block_rows, transform=transform)
+    summary["shard_index"] = shard_index
+    summary["seed"] = base_seed
+    summary["output_path"] = output_path
+    return summary
+
+
+def _merge_shards(part_paths: List[str], output_path: str) -> None:
+    """Concatenar los CSV de los shards en orden, conservando solo la primera cabecera"""
+    with open(output_path, "wb") as merged:
+        for i, part_path in enumerate(part_paths):
+            with open(part_path, "rb") as part:
+                if i > 0:
+                    part.readline()
+                shutil.copyfileobj(part, merged)
+
+
+def _stop_pool(pool: ProcessPoolExecutor) -> None:
+    """Cancelar lo pendiente y terminar los workers en marcha (cancelación o error de un shard)"""
+    terminate = getattr(pool, "terminate_workers", None)  # Python 3.14+
+    if terminate is not None:
+        terminate()
+    else:
+        for process in list((getattr(pool, "_processes", None) or {}).values()):
+            if process.is_alive():
+                process.terminate()
+    pool.shutdown(wait=True, cancel_futures=True)
+
+
+def sample_to_csv_parallel(synthesizer,
+                           num_rows: int,
+                           output_path: str,
+                           num_workers: int,
+                           base_seed: Optional[int] = None,
+                           batch_size: int = DEFAULT_BATCH_SIZE,
+                           partitioned_output: bool = False,
+                           work_dir: Optional[str] = None,
+                           on_batch: Optional[Callable[[int, int], None]] = None,
+                           transform: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+                           row_range: Optional[Tuple[int, int]] = None,
+                           block_rows: int = BLOCK_ROWS) -> Dict[str, Any]:
+    """
+    Muestrear en paralelo con un pool de procesos, un shard por worker.
+
+    El synthesizer se serializa una sola vez a disco y cada worker lo carga en su
+    inicializador (contexto ``spawn``, seguro aunque el proceso padre tenga hilos activos).
+    Cada shard usa una semilla derivada de ``base_seed``, por lo que el resultado es
+    determinista para una misma semilla base y número de workers. Con ``row_range``
+    cada worker escribe un tramo del rango con sample_range_to_csv y el resultado es
+    el mismo para cualquier número de workers.
+
+    Args:
+        synthesizer: Synthesizer SDV ya entrenado
+        num_rows: Número total de filas a generar
+        output_path: CSV de salida, o directorio de particiones si ``partitioned_output``
+        num_workers: Número de procesos worker
+        base_seed: Semilla base (si es None se elige una y se reporta)
+        batch_size: Filas por lote dentro de cada worker
+        partitioned_output: Dejar un CSV por shard en lugar de fusionarlos
+        work_dir: Directorio temporal para el modelo serializado
+        on_batch: Callback opcional ``(filas_escritas, filas_totales)`` al terminar cada shard y cada
+            POOL_POLL_SECONDS; si lanza una excepción se cancelan los shards y se terminan los workers
+        transform: Función por lote (debe poder serializarse para enviarla a los workers)
+        row_range: Filas [inicio, fin) del trabajo a escribir (``num_rows`` debe ser su longitud)
+        block_rows: Filas por bloque de aleatoriedad en modo rango
+
+    Returns:
+        Resumen con filas escritas, lotes, semillas por shard y pico de RSS de la llamada
+        (el mayor de un proceso: el padre o cualquier worker)
+    """
+    num_workers = max(1, min(num_workers, num_rows))
+    rss = RssPeak()
+    if base_seed is None:
+        base_seed = secrets.randbits(32)
+
+    shard_rows = split_rows(num_rows, num_workers)
+    shard_starts = [sum(shard_rows[:i]) for i in range(num_workers)]
+    shard_seeds = derive_shard_seeds(base_seed, num_workers)
+    range_start = row_range[0] if row_range else 0
+
+    if partitioned_output:
+        parts_dir = output_path
+    else:
+        parts_dir = f"{os.path.splitext(output_path)[0]}_parts"
+    os.makedirs(parts_dir, exist_ok=True)
+    part_paths = [os.path.join(parts_dir, f"part-{i:05d}.csv") for i in range(num_workers)]
+
+    # Serializar el modelo una única vez para todos los workers
+    model_fd, model_path = tempfile.mkstemp(suffix=".pkl", dir=work_dir)
+    os.close(model_fd)
+    pool = None
+    completed = False
+    try:
+        synthesizer.save(model_path)
+
+        logger.info(f"⚙️ Muestreo paralelo: {num_workers} workers, semilla base {base_seed}")
+        pool = ProcessPoolExecutor(max_workers=num_workers,
+                                   mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_init_worker,
+                                   initargs=(model_path,))
+        if row_range:
+            futures = [
+                pool.submit(_sample_range_shard, i, range_start + shard_starts[i],
+                            range_start + shard_starts[i] + shard_rows[i], base_seed, part_paths[i],
+                            block_rows, transform)
+                for i in range(num_workers)
+            ]
+        else:
+            futures = [
+                pool.submit(_sample_shard, i, shard_rows[i], shard_seeds[i], part_paths[i], batch_size,
+                            transform, shard_starts[i])
+                for i in range(num_workers)
+            ]
+        rows_done = 0
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=POOL_POLL_SECONDS, return_when=FIRST_COMPLETED)
+            for future in done:
+                rows_done += future.result()["rows_written"]
+            rss.sample()
+            if on_batch:
+                # También sin shards nuevos terminados: así una cancelación no espera al shard más lento
+                on_batch(rows_done, num_rows)
+        shards = [future.result() for future in futures]
+        pool.shutdown(wait=True)
+
+        if not partitioned_output:
+            _merge_shards(part_paths, output_path)
+        completed = True
+    finally:
+        # Cancelación (on_batch lanza) o fallo de un shard: no esperar al resto de workers
+        if pool is not None and not completed:
+            _stop_pool(pool)
+        os.remove(model_path)
+        if not partitioned_output or not completed:
+            shutil.rmtree(parts_dir, ignore_errors=True)
+
+    return {
+        "rows_written": sum(shard["rows_written"] for shard in shards),
+        "batches": sum(shard["batches"] for shard in shards),
+        "batch_size": block_rows if row_range else batch_size,
+        "columns": shards[0]["columns"],
+        "sample_rows": shards[0]["sample_rows"],
+        # Suma de los workers (escriben en paralelo): tiempo de escritura agregado, no de pared
+        "write_seconds": round(sum(shard["write_seconds"] for shard in shards), 4),
+        "peak_rss_mb": max([peak for peak in [rss.peak_mb] + [shard["peak_rss_mb"] for shard in shards]
+                            if peak is not None], default=None),
+        "process_peak_rss_mb": get_peak_rss_mb(),
+        "workers": num_workers,
+        "base_seed": base_seed,
+        "shards": [
+            {
+                "shard_index": shard["shard_index"],
+                "rows": shard["rows_written"],
+                "seed": shard["seed"],
+                **({"start_row": shard["start_row"], "end_row": shard["end_row"]} if row_range else {}),
+                "peak_rss_mb": shard["peak_rss_mb"],
+                **({"output_path": shard["output_path"]} if partitioned_output else {})
+            }
+            for shard in shards
+        ]
+    }
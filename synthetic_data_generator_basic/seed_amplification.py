@@ -0,0 +1,115 @@
+"""
+Seed Amplification - Pocas filas de calidad del LLM, el resto de un modelo local
+El LLM genera una semilla pequeña (AMPLIFY_SEED_ROWS filas) con la estructura diseñada;
+una FastCopula se ajusta con ella y muestrea por lotes todas las filas pedidas. Las
+claves, la PII y el texto libre de la semilla no pasan al modelo: se regeneran con
+ColumnRegenerator, igual que en el camino SDV. Con semilla, el CSV semilla se guarda por
+(esquema, semilla) y todos los shards del trabajo lo reutilizan: el LLM se llama una vez
+"""
+
+import os
+import time
+import logging
+from pathlib import Path
+from typing import Dict, Any, Optional, Callable
+
+import pandas as pd
+
+from column_roles import detect_column_roles, apply_column_roles, summarize_roles, ColumnRegenerator
+from csv_ingestion import read_csv
+from fast_copula import FastCopulaSynthesizer
+from sdv_sampling import sample_to_csv, sample_range_to_csv
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# CONFIGURACIÓN DE LA AMPLIFICACIÓN
+# ==========================================
+AMPLIFY_SEED_ROWS = int(os.getenv("AMPLIFY_SEED_ROWS", "150"))      # Filas que genera el LLM
+AMPLIFY_MIN_ROWS = int(os.getenv("AMPLIFY_MIN_ROWS", "1000"))       # mode="auto": amplificar a partir de aquí
+AMPLIFY_MAX_ROWS = int(os.getenv("AMPLIFY_MAX_ROWS", "10000000"))
+MIN_SEED_ROWS = 50               # Por debajo la semilla no basta para distribuciones ni roles
+BASE_DIR = Path(__file__).parent
+SEED_CACHE_DIR = Path(os.getenv("AMPLIFY_SEED_DIR", str(BASE_DIR / ".synthesizer_cache" / "seeds")))
+
+# Tipo inferido por la caché de esquemas -> sdtype de SDV (el texto lo reclasifican los roles)
+SCHEMA_SDTYPES = {
+    "integer": "numerical",
+    "float": "numerical",
+    "datetime": "datetime",
+    "boolean": "boolean",
+    "categorical": "categorical",
+    "text": "categorical"
+}
+
+
+def seed_cache_path(schema_key: str, seed: int, rows: int = AMPLIFY_SEED_ROWS) -> Path:
+    """CSV semilla de una estructura y una semilla: el mismo para todos los shards del trabajo"""
+    return SEED_CACHE_DIR / f"{schema_key}_seed{seed}_{rows}rows.csv"
+
+
+def seed_metadata(seed_df: pd.DataFrame, column_types: Dict[str, str],
+                  key_column: Optional[str] = None) -> Dict[str, Any]:
+    """Metadatos al estilo SDV a partir de los tipos del esquema; la clave se marca como id"""
+    columns = {}
+    for col in seed_df.columns:
+        columns[col] = {"sdtype": "id" if col == key_column else SCHEMA_SDTYPES.get(column_types.get(col), "categorical")}
+    metadata = {"columns": columns}
+    if key_column is not None:
+        metadata["primary_key"] = key_column
+    return metadata
+
+
+def amplify_seed(seed_path: str,
+                 column_types: Dict[str, str],
+                 num_rows: int,
+                 output_path: str,
+                 key_column: Optional[str] = None,
+                 start_row: int = 0,
+                 seed: Optional[int] = None,
+                 on_batch: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+    """
+    Ajustar una FastCopula con las filas semilla y escribir ``num_rows`` filas en ``output_path``.
+
+    Con ``seed`` se muestrea por bloques con semilla propia (sample_range_to_csv), así que
+    las filas [start_row, start_row + num_rows) son las mismas en cualquier shard. Las
+    claves siguen la posición global de la fila, empezando en 1.
+    """
+    seed_df = read_csv(seed_path)
+    if len(seed_df) < MIN_SEED_ROWS:
+        raise ValueError(f"La semilla tiene {len(seed_df)} filas; hacen falta al menos {MIN_SEED_ROWS}")
+
+    metadata_dict = seed_metadata(seed_df, column_types, key_column)
+    roles = detect_column_roles(seed_df, metadata_dict, pii_from_vocabulary=True)
+    if key_column in roles:
+        # Misma numeración que las filas generadas por el LLM: start_row + 1, start_row + 2...
+        roles[key_column]["generator"] = {"kind": "integer_sequence", "start": 1, "step": 1}
+
+    fit_start = time.perf_counter()
+    model = FastCopulaSynthesizer()
+    model.fit(apply_column_roles(seed_df, roles))
+    fit_seconds = time.perf_counter() - fit_start
+
+    regenerator = ColumnRegenerator(roles, list(seed_df.columns), seed=seed, start_row=start_row)
+    sample_start = time.perf_counter()
+    if seed is not None:
+        sampling = sample_range_to_csv(model, start_row, start_row + num_rows, output_path,
+                                       base_seed=seed, on_batch=on_batch, transform=regenerator)
+    else:
+        sampling = sample_to_csv(model, num_rows, output_path, on_batch=on_batch, transform=regenerator)
+    sample_seconds = time.perf_counter() - sample_start
+
+    logger.info(f"🌱 Semilla de {len(seed_df)} filas amplificada a {sampling['rows_written']:,} "
+                f"en {fit_seconds + sample_seconds:.2f}s")
+    return {
+        "seed_rows": len(seed_df),
+        "rows_written": sampling["rows_written"],
+        "model": "FastCopula",
+        "column_roles": summarize_roles(roles),
+        "regeneration_seed": regenerator.seed,
+        "fit_seconds": round(fit_seconds, 3),
+        "sample_seconds": round(sample_seconds, 3),
+        "rows_per_second": round(sampling["rows_written"] / sample_seconds) if sample_seconds > 0 else None,
+        "write_seconds": sampling["write_seconds"],
+        "peak_rss_mb": sampling["peak_rss_mb"]
+    }
@@ -0,0 +1,333 @@
+"""
+Streaming Profiler - Perfilado de CSV por bloques con memoria constante
+Estadísticas online y combinables: la memoria depende del número de columnas, no de filas
+"""
+
+import os
+import math
+import logging
+from typing import Dict, Any, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from csv_ingestion import iter_csv_chunks, SchemaMismatchError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+# ==========================================
+# ESTADÍSTICOS ONLINE COMBINABLES
+# ==========================================
+
+class RunningStats:
+    """Conteo, media y varianza (Welford/Chan, combinable por bloques), mínimo y máximo"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values: np.ndarray) -> None:
+        if len(values) == 0:
+            return
+        chunk_count = len(values)
+        chunk_mean = float(values.mean())
+        chunk_m2 = float(((values - chunk_mean) ** 2).sum())
+        self._combine(chunk_count, chunk_mean, chunk_m2)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    def merge(self, other: "RunningStats") -> None:
+        if other.count == 0:
+            return
+        self._combine(other.count, other.mean, other.m2)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def _combine(self, count: int, mean: float, m2: float) -> None:
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+    @property
+    def std(self) -> float:
+        """Desviación estándar muestral (ddof=1), como pandas.describe()"""
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else float("nan")
+
+
+class QuantileSketch:
+    """
+    Sketch de cuantiles estilo KLL: una pila de compactadores de capacidad ``k``.
+
+    Cuando un nivel se llena se ordena y se promueve la mitad de sus elementos
+    (pares o impares al azar) al nivel siguiente, donde cada elemento pesa el doble.
+    Memoria O(k · log(n/k)); error de rango del orden de 1/k.
+    """
+
+    def __init__(self, k: int = 2048, seed: int = 0):
+        self.k = k
+        self.n = 0
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values: np.ndarray) -> None:
+        if len(values) == 0:
+            return
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values.astype(np.float64)])
+        self._compress()
+
+    def merge(self, other: "QuantileSketch") -> None:
+        self.n += other.n
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self._compress()
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self.k:
+                items = np.sort(items)
+                keep = items[-1:] if len(items) % 2 else items[:0]
+                paired = items[:len(items) - len(keep)]
+                promoted = paired[int(self._rng.integers(2))::2]
+                self.levels[level] = keep
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def quantiles(self, qs: List[float]) -> List[float]:
+        if self.n == 0:
+            return [float("nan")] * len(qs)
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        values, cumulative = values[order], np.cumsum(weights[order])
+        positions = np.searchsorted(cumulative, np.asarray(qs) * cumulative[-1], side="left")
+        return [float(values[min(p, len(values) - 1)]) for p in positions]
+
+
+class HyperLogLog:
+    """Conteo aproximado de valores distintos (error típico ≈ 1.04/√(2^p))"""
+
+    def __init__(self, p: int = 12):
+        self.p = p
+        self.m = 1 << p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def update_hashes(self, hashes: np.ndarray) -> None:
+        """Añadir hashes uint64 (p.ej. de pandas.util.hash_pandas_object)"""
+        if len(hashes) == 0:
+            return
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        # 32 bits siguientes al índice: su conversión a float64 es exacta
+        window = ((hashes >> np.uint64(32 - self.p)) & np.uint64(0xFFFFFFFF)).astype(np.float64)
+        rank = np.where(window > 0, 32 - np.floor(np.log2(np.maximum(window, 1))), 33).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        raw = alpha * self.m * self.m / float(np.sum(np.power(2.0, -self.registers.astype(np.float64))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * self.m and zeros > 0:
+            return int(round(self.m * math.log(self.m / zeros)))  # Corrección de rango pequeño
+        return int(round(raw))
+
+
+class HeavyHitters:
+    """Top-k aproximado (Misra-Gries combinable): los conteos son cotas inferiores"""
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self.counters: Dict[Any, int] = {}
+
+    def update_counts(self, counts: pd.Series) -> None:
+        """Añadir los value_counts() de un bloque (ya ordenados de mayor a menor)"""
+        counts = counts[counts > 0]  # Las categóricas listan también categorías ausentes
+        if len(counts) > self.capacity:
+            threshold = counts.iloc[self.capacity]
+            counts = counts[counts > threshold] - threshold
+        for value, count in counts.items():
+            self.counters[value] = self.counters.get(value, 0) + int(count)
+        self._prune()
+
+    def merge(self, other: "HeavyHitters") -> None:
+        for value, count in other.counters.items():
+            self.counters[value] = self.counters.get(value, 0) + count
+        self._prune()
+
+    def _prune(self) -> None:
+        if len(self.counters) <= self.capacity:
+            return
+        threshold = sorted(self.counters.values(), reverse=True)[self.capacity]
+        self.counters = {value: count - threshold for value, count in self.counters.items() if count > threshold}
+
+    def top(self, k: int = 10) -> Dict[str, int]:
+        ranked = sorted(self.counters.items(), key=lambda item: item[1], reverse=True)[:k]
+        return {str(value): count for value, count in ranked}
+
+
+# ==========================================
+# PERFIL POR COLUMNA
+# ==========================================
+
+_DTYPE_RANK = {"bool": 0, "int64": 1, "float64": 2, "datetime64[ns]": 3, "category": 4, "object": 5}
+
+
+class ColumnProfile:
+    """Estadísticas acumuladas de una columna a lo largo de todos los bloques"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.rows = 0
+        self.nulls = 0
+        self.dtype = None
+        self.memory_bytes = 0
+        self.numeric = RunningStats()
+        self.quantiles = QuantileSketch()
+        self.distinct = HyperLogLog()
+        self.heavy_hitters = HeavyHitters()
+
+    def update(self, series: pd.Series, memory_bytes: int) -> None:
+        self.rows += len(series)
+        self.memory_bytes += memory_bytes
+
+        null_mask = series.isna()
+        self.nulls += int(null_mask.sum())
+        self._merge_dtype(series)
+
+        non_null = series[~null_mask]
+        if pd.api.types.is_numeric_dtype(non_null) and not pd.api.types.is_bool_dtype(non_null):
+            values = non_null.to_numpy(dtype=np.float64)
+            self.numeric.update(values)
+            self.quantiles.update(values)
+            # Hash sobre float64 para que 1 y 1.0 cuenten como el mismo valor entre bloques
+            hashed = pd.util.hash_pandas_object(pd.Series(values), index=False).to_numpy()
+        else:
+            hashed = pd.util.hash_pandas_object(non_null, index=False).to_numpy()
+
+        self.distinct.update_hashes(hashed)
+        self.heavy_hitters.update_counts(non_null.value_counts())
+
+    def _merge_dtype(self, series: pd.Series) -> None:
+        """El tipo final es el más general visto en cualquier bloque (bool < int < float < ... < object)"""
+        if pd.api.types.is_bool_dtype(series):
+            chunk_dtype = "bool"
+        elif pd.api.types.is_integer_dtype(series):
+            chunk_dtype = "int64"
+        elif pd.api.types.is_float_dtype(series):
+            chunk_dtype = "float64"
+        elif pd.api.types.is_datetime64_any_dtype(series):
+            chunk_dtype = "datetime64[ns]"
+        elif isinstance(series.dtype, pd.CategoricalDtype):
+            chunk_dtype = "category"
+        else:
+            chunk_dtype = "object"
+
+        if series.isna().all():
+            return  # Un bloque todo nulo no aporta información de tipo
+        if self.dtype is None or _DTYPE_RANK[chunk_dtype] > _DTYPE_RANK[self.dtype]:
+            if self.dtype == "bool" and chunk_dtype != "bool":
+                chunk_dtype = "object"  # pandas trata bool mezclado con otros valores como object
+            self.dtype = chunk_dtype
+
+    @property
+    def is_numeric(self) -> bool:
+        return self.dtype in ("int64", "float64")
+
+    def describe(self) -> Dict[str, float]:
+        """Mismas claves que pandas.DataFrame.describe() para una columna numérica"""
+        q25, q50, q75 = self.quantiles.quantiles([0.25, 0.5, 0.75])
+        return {
+            "count": float(self.numeric.count),
+            "mean": self.numeric.mean if self.numeric.count else float("nan"),
+            "std": self.numeric.std,
+            "min": self.numeric.min if self.numeric.count else float("nan"),
+            "25%": q25,
+            "50%": q50,
+            "75%": q75,
+            "max": self.numeric.max if self.numeric.count else float("nan")
+        }
+
+
+# ==========================================
+# PERFILADO COMPLETO
+# ==========================================
+
+def profile_chunks(chunks: Iterable[pd.DataFrame]) -> Dict[str, Any]:
+    """
+    Perfilar un CSV a partir de sus bloques.
+
+    Returns:
+        Diccionario con la misma forma que el análisis de analyze_csv_file()
+        más distinct_counts (aproximado) y top_values (heavy hitters)
+    """
+    profiles: Dict[str, ColumnProfile] = {}
+    columns: List[str] = []
+    sample_data: List[Dict[str, Any]] = []
+    rows = 0
+    chunk_count = 0
+
+    for chunk in chunks:
+        if chunk_count == 0:
+            columns = list(chunk.columns)
+            profiles = {col: ColumnProfile(col) for col in columns}
+            sample_data = chunk.head(3).to_dict("records")
+
+        memory = chunk.memory_usage(deep=True, index=False)
+        for col in columns:
+            profiles[col].update(chunk[col], int(memory[col]))
+
+        rows += len(chunk)
+        chunk_count += 1
+
+    if chunk_count == 0:
+        raise pd.errors.EmptyDataError("No columns to parse from file")
+
+    numeric_columns = [col for col in columns if profiles[col].is_numeric]
+
+    return {
+        "rows": rows,
+        "columns": columns,
+        "column_count": len(columns),
+        "data_types": {col: profiles[col].dtype or "object" for col in columns},
+        "missing_values": {col: profiles[col].nulls for col in columns},
+        "missing_percentage": {
+            col: round(profiles[col].nulls / rows * 100, 2) if rows else 0.0 for col in columns
+        },
+        "memory_usage_mb": round(sum(p.memory_bytes for p in profiles.values()) / 1024 / 1024, 2),
+        "numeric_columns": numeric_columns,
+        "categorical_columns": [
+            col for col in columns if (profiles[col].dtype or "object") in ("object", "category")
+        ],
+        "sample_data": sample_data,
+        "basic_stats": {col: profiles[col].describe() for col in numeric_columns},
+        "distinct_counts": {col: profiles[col].distinct.estimate() for col in columns},
+        "top_values": {col: profiles[col].heavy_hitters.top(5) for col in columns},
+        "profiling_mode": "streaming",
+        "chunks_processed": chunk_count
+    }
+
+
+def profile_csv(file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, Any]:
+    """Perfilar un CSV leyéndolo por bloques (de ``chunk_size`` filas con pandas)"""
+    logger.info(f"🌊 Perfilando {os.path.basename(file_path)} por bloques")
+    try:
+        return profile_chunks(iter_csv_chunks(file_path, chunk_size))
+    except SchemaMismatchError as e:
+        logger.warning(f"⚠️ El esquema de la muestra no encaja ({e}), se perfila con pandas")
+        return profile_chunks(pd.read_csv(file_path, chunksize=chunk_size))
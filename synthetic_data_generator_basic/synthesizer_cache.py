@@ -0,0 +1,312 @@
+"""
+Synthesizer Cache - Caché persistente de synthesizers SDV entrenados
+Evita reentrenar el modelo cuando se repite la generación sobre el mismo archivo y modelo
+"""
+
+import os
+import json
+import uuid
+import hashlib
+import logging
+import weakref
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Callable
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# CONFIGURACIÓN DE LA CACHÉ
+# ==========================================
+BASE_DIR = Path(__file__).parent
+CACHE_DIR = Path(os.getenv("SYNTHESIZER_CACHE_DIR", str(BASE_DIR / ".synthesizer_cache")))
+CACHE_MAX_MEMORY_MB = float(os.getenv("SYNTHESIZER_CACHE_MAX_MEMORY_MB", "512"))
+CACHE_MAX_DISK_MB = float(os.getenv("SYNTHESIZER_CACHE_MAX_DISK_MB", "4096"))
+MAX_FIT_RECORDS = int(os.getenv("SYNTHESIZER_CACHE_MAX_FIT_RECORDS", "500"))
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+# ==========================================
+# HUELLAS (HASHES) PARA LA CLAVE DE CACHÉ
+# ==========================================
+
+def hash_file(file_path: str) -> str:
+    """Hash SHA-256 del contenido del archivo, leído por bloques para no cargarlo en memoria"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprint_metadata(metadata_dict: Dict[str, Any]) -> str:
+    """Huella estable de los metadatos SDV (independiente del orden de las claves)"""
+    payload = json.dumps(metadata_dict, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def make_cache_key(file_hash: str,
+                   model_type: str,
+                   metadata_fingerprint: str,
+                   hyperparameters: Optional[Dict[str, Any]] = None) -> str:
+    """Clave de caché: (contenido del archivo, modelo, metadatos, hiperparámetros)"""
+    payload = json.dumps({
+        "file_hash": file_hash,
+        "model_type": model_type,
+        "metadata": metadata_fingerprint,
+        "hyperparameters": hyperparameters or {}
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ==========================================
+# CACHÉ LRU EN MEMORIA + DISCO
+# ==========================================
+
+class _SamplingLock:
+    """threading.Lock que admite referencias débiles (un _thread.lock no las admite)"""
+
+    __slots__ = ("_lock", "__weakref__")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "_SamplingLock":
+        self._lock.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._lock.release()
+
+
+class SynthesizerCache:
+    """
+    Caché de synthesizers entrenados.
+
+    - En memoria: LRU acotada por un presupuesto de bytes (tamaño serializado del modelo).
+    - En disco: cada synthesizer se guarda con ``synthesizer.save()`` al insertarse, de modo
+      que los expulsados de memoria (o los de un proceso anterior) se recuperan con
+      ``Synthesizer.load()`` sin reentrenar.
+    - Perfiles de origen: por hash de archivo se guardan los metadatos detectados y el
+      número de filas, para no releer el CSV cuando el modelo ya está en caché.
+    - Calibraciones: por hash de archivo, el coste medido de cada modelo (ver model_calibration).
+    - Registro de entrenamientos: tamaño, filas y hash de cada archivo entrenado, para
+      detectar cuándo un archivo nuevo es uno anterior con filas añadidas (ver incremental_refit).
+
+    El mismo objeto synthesizer se entrega a todas las sesiones que piden la misma clave:
+    quien lo siembre o muestree debe hacerlo dentro de ``sampling_lock(key)``. La carga y
+    el guardado en disco (segundos de pickle) se hacen fuera del cerrojo de la caché.
+    """
+
+    def __init__(self,
+                 cache_dir: Path = CACHE_DIR,
+                 max_memory_bytes: int = int(CACHE_MAX_MEMORY_MB * 1024 * 1024),
+                 max_disk_bytes: int = int(CACHE_MAX_DISK_MB * 1024 * 1024)):
+        self.cache_dir = Path(cache_dir)
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.RLock()
+        # Un cerrojo vive mientras alguien lo tenga: las claves ya usadas no se acumulan
+        self._sampling_locks: "weakref.WeakValueDictionary[str, _SamplingLock]" = weakref.WeakValueDictionary()
+
+        self.stats = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "disk_evictions": 0
+        }
+
+    # ---------- rutas en disco ----------
+
+    def _model_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.pkl"
+
+    def _profile_path(self, file_hash: str) -> Path:
+        return self.cache_dir / f"{file_hash}.profile.json"
+
+    def _calibration_path(self, file_hash: str) -> Path:
+        return self.cache_dir / f"{file_hash}.calibration.json"
+
+    def _fit_records_path(self) -> Path:
+        return self.cache_dir / "fit_records.json"
+
+    # ---------- perfiles de archivo fuente ----------
+
+    def _read_json(self, path: Path) -> Optional[Dict[str, Any]]:
+        if not path.exists():
+            return None
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Archivo de caché ilegible {path.name}: {e}")
+            return None
+
+    def _write_json(self, path: Path, payload: Dict[str, Any]) -> None:
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(payload, default=str), encoding="utf-8")
+        except OSError as e:
+            logger.warning(f"⚠️ No se pudo guardar {path.name} en la caché: {e}")
+
+    def get_source_profile(self, file_hash: str) -> Optional[Dict[str, Any]]:
+        """Metadatos y filas de un archivo ya visto, o None"""
+        return self._read_json(self._profile_path(file_hash))
+
+    def put_source_profile(self, file_hash: str, profile: Dict[str, Any]) -> None:
+        """Guardar metadatos y filas de un archivo fuente"""
+        self._write_json(self._profile_path(file_hash), profile)
+
+    def get_calibration(self, file_hash: str) -> Optional[Dict[str, Any]]:
+        """Mediciones de coste por modelo de un archivo ya calibrado, o None"""
+        return self._read_json(self._calibration_path(file_hash))
+
+    def put_calibration(self, file_hash: str, calibration: Dict[str, Any]) -> None:
+        """Guardar las mediciones de coste por modelo de un archivo"""
+        self._write_json(self._calibration_path(file_hash), calibration)
+
+    def get_fit_records(self) -> List[Dict[str, Any]]:
+        """Entrenamientos registrados, del más reciente al más antiguo"""
+        with self._lock:
+            payload = self._read_json(self._fit_records_path()) or {}
+            return payload.get("records", [])
+
+    def add_fit_record(self, record: Dict[str, Any]) -> None:
+        """Registrar un entrenamiento (sustituye al anterior con la misma clave de modelo)"""
+        with self._lock:
+            records = [entry for entry in self.get_fit_records() if entry.get("cache_key") != record.get("cache_key")]
+            self._write_json(self._fit_records_path(), {"records": [record] + records[: MAX_FIT_RECORDS - 1]})
+
+    # ---------- synthesizers ----------
+
+    def get(self, key: str, load_fn: Callable[[str], Any]) -> Optional[Any]:
+        """
+        Buscar un synthesizer entrenado.
+
+        Args:
+            key: Clave generada con make_cache_key()
+            load_fn: Función de carga desde disco (p.ej. ``CTGANSynthesizer.load``)
+
+        Returns:
+            Synthesizer entrenado o None si no está en caché
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry["synthesizer"]
+
+        path = self._model_path(key)
+        synthesizer = None
+        if path.exists():
+            try:
+                synthesizer = load_fn(str(path))
+                size_bytes = path.stat().st_size
+                os.utime(path)  # Marcar como usado recientemente para la expulsión en disco
+            except FileNotFoundError:
+                synthesizer = None  # Expulsado de disco mientras se cargaba
+            except Exception as e:
+                logger.warning(f"⚠️ Synthesizer en disco corrupto, se descarta: {e}")
+                path.unlink(missing_ok=True)
+                synthesizer = None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                # Otra sesión lo cargó a la vez: todas comparten el mismo objeto (y su cerrojo)
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry["synthesizer"]
+            if synthesizer is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["disk_hits"] += 1
+            self._insert(key, synthesizer, size_bytes)
+            return synthesizer
+
+    def put(self, key: str, synthesizer: Any) -> None:
+        """Guardar un synthesizer recién entrenado en memoria y en disco"""
+        size_bytes = 0
+        path = self._model_path(key)
+        saved = False
+        # Pickle a un temporal propio fuera del cerrojo; el reemplazo atómico evita leer un .pkl a medias
+        tmp_path = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            synthesizer.save(str(tmp_path))
+            size_bytes = tmp_path.stat().st_size
+            os.replace(tmp_path, path)
+            saved = True
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo persistir el synthesizer en disco: {e}")
+            tmp_path.unlink(missing_ok=True)
+
+        with self._lock:
+            if saved:
+                self._enforce_disk_budget(keep=path)
+            self._insert(key, synthesizer, size_bytes)
+
+    def sampling_lock(self, key: str) -> _SamplingLock:
+        """Cerrojo de una clave: sembrar y muestrear su synthesizer compartido sin mezclar semillas"""
+        with self._lock:
+            lock = self._sampling_locks.get(key)
+            if lock is None:
+                lock = self._sampling_locks[key] = _SamplingLock()
+            return lock
+
+    def _insert(self, key: str, synthesizer: Any, size_bytes: int) -> None:
+        if key in self._entries:
+            self._memory_bytes -= self._entries.pop(key)["size_bytes"]
+
+        self._entries[key] = {"synthesizer": synthesizer, "size_bytes": size_bytes}
+        self._memory_bytes += size_bytes
+
+        # Expulsar los menos usados, pero nunca el recién insertado
+        while self._memory_bytes > self.max_memory_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self._memory_bytes -= evicted["size_bytes"]
+            self.stats["evictions"] += 1
+
+    def _enforce_disk_budget(self, keep: Optional[Path] = None) -> None:
+        """Borrar los .pkl menos usados hasta caber en el presupuesto, nunca ``keep`` (el recién guardado)"""
+        models = []
+        for path in self.cache_dir.glob("*.pkl"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            models.append((stat.st_mtime, stat.st_size, path))
+        models.sort(key=lambda model: model[0])
+        total = sum(size for _, size, _ in models)
+        for _, size, path in models:
+            if total <= self.max_disk_bytes:
+                break
+            if keep is not None and path == keep:
+                continue
+            total -= size
+            path.unlink(missing_ok=True)
+            self.stats["disk_evictions"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Contadores de aciertos/fallos/expulsiones y ocupación actual"""
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["disk_hits"] + self.stats["misses"]
+            hit_rate = (self.stats["hits"] + self.stats["disk_hits"]) / lookups if lookups else 0.0
+            return {
+                **self.stats,
+                "hit_rate": round(hit_rate, 3),
+                "entries_in_memory": len(self._entries),
+                "memory_mb": round(self._memory_bytes / 1024 / 1024, 2),
+                "memory_budget_mb": round(self.max_memory_bytes / 1024 / 1024, 2),
+                "cache_dir": str(self.cache_dir)
+            }
+
+
+# Caché compartida por todas las sesiones del proceso
+SYNTHESIZER_CACHE = SynthesizerCache()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Los módulos de la aplicación se importan por nombre plano, como en main.py
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
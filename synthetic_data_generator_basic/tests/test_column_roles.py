@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+from column_roles import (
+    OTHER_TOKEN, ColumnRegenerator, apply_column_roles, detect_column_roles, model_metadata
+)
+
+
+def _frame(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    users = np.array([f"user{i:04d}.{chr(97 + i % 26)}" for i in range(n)])
+    return pd.DataFrame({
+        "customer_id": np.arange(1, n + 1),
+        "order_ref": [f"ORD-{i:06d}" for i in range(n)],
+        "email": np.char.add(users, np.where(np.arange(n) % 2, "@example.com", "@mail.org")),
+        "comment": [" ".join(rng.choice(["muy", "buen", "servicio", "entrega", "rapida", "producto"], 8))
+                    for _ in range(n)],
+        "city": [f"ciudad_{i % 150}" for i in range(n)],
+        "segment": rng.choice(["basic", "premium"], n),
+        "amount": rng.normal(100.0, 20.0, n)
+    })
+
+
+def _metadata(df):
+    columns = {col: {"sdtype": "categorical"} for col in df.columns}
+    columns["amount"] = {"sdtype": "numerical"}
+    columns["customer_id"] = {"sdtype": "id"}
+    return {"columns": columns, "primary_key": "customer_id"}
+
+
+def _model_batch(df, roles, n):
+    return apply_column_roles(df, roles).head(n).reset_index(drop=True)
+
+
+def test_detect_column_roles_classifies_columns():
+    df = _frame()
+    roles = detect_column_roles(df, _metadata(df))
+
+    assert roles["customer_id"]["role"] == "id"
+    assert roles["customer_id"]["generator"] == {"kind": "integer_sequence", "start": 1, "step": 1}
+    assert roles["order_ref"]["generator"]["kind"] == "prefixed_sequence"
+    assert roles["order_ref"]["generator"]["width"] == 6
+    assert roles["email"]["role"] == "pii"
+    assert roles["email"]["generator"]["kind"] == "email"
+    assert roles["comment"]["role"] == "text"
+    assert roles["city"]["role"] == "high_cardinality"
+    assert len(roles["city"]["kept_values"]) < 150
+    assert "segment" not in roles and "amount" not in roles
+
+
+def test_apply_column_roles_and_model_metadata():
+    df = _frame()
+    metadata = _metadata(df)
+    roles = detect_column_roles(df, metadata)
+
+    modelled = apply_column_roles(df, roles)
+    assert set(modelled.columns) == {"city", "segment", "amount"}
+    assert (modelled["city"] == OTHER_TOKEN).any()
+    reduced = model_metadata(metadata, roles)
+    assert set(reduced["columns"]) == {"city", "segment", "amount"}
+    assert "primary_key" not in reduced
+
+
+def test_regenerator_restores_columns_and_continues_ids_across_batches():
+    df = _frame()
+    roles = detect_column_roles(df, _metadata(df))
+    regenerator = ColumnRegenerator(roles, list(df.columns), seed=7)
+
+    first = regenerator(_model_batch(df, roles, 100))
+    second = regenerator(_model_batch(df, roles, 100))
+
+    assert list(first.columns) == list(df.columns)
+    assert first["customer_id"].tolist() == list(range(1, 101))
+    assert second["customer_id"].tolist() == list(range(101, 201))
+    assert second["order_ref"].iloc[0] == "ORD-000100"
+    assert first["email"].str.contains("@").all()
+    assert not (first["city"] == OTHER_TOKEN).any()
+
+
+def test_regenerator_seed_controls_reproducibility():
+    df = _frame()
+    roles = detect_column_roles(df, _metadata(df))
+    batch = _model_batch(df, roles, 200)
+
+    seeded = [ColumnRegenerator(roles, list(df.columns), seed=3)(batch) for _ in range(2)]
+    pd.testing.assert_frame_equal(seeded[0], seeded[1])
+
+    unseeded = [ColumnRegenerator(roles, list(df.columns)) for _ in range(2)]
+    assert unseeded[0].seed != unseeded[1].seed
+    outputs = [regenerator(batch) for regenerator in unseeded]
+    assert not outputs[0]["email"].equals(outputs[1]["email"])
+
+    replay = ColumnRegenerator(roles, list(df.columns), seed=unseeded[0].seed)(batch)
+    pd.testing.assert_frame_equal(outputs[0], replay)
+
+
+def test_for_shard_matches_sequential_ids():
+    df = _frame()
+    roles = detect_column_roles(df, _metadata(df))
+    regenerator = ColumnRegenerator(roles, list(df.columns), seed=1)
+
+    shard = regenerator.for_shard(start_row=300, seed=11)(_model_batch(df, roles, 50))
+
+    assert shard["customer_id"].tolist() == list(range(301, 351))
+    assert shard["order_ref"].iloc[0] == "ORD-000300"
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conditional_sampling import (
+    ConditionalSampler, build_condition_index, choose_strategy, estimate_acceptance,
+    fit_condition_submodel, parse_conditions, validate_conditions
+)
+from fast_copula import FastCopulaSynthesizer
+
+METADATA = {"columns": {
+    "country": {"sdtype": "categorical"},
+    "segment": {"sdtype": "categorical"},
+    "amount": {"sdtype": "numerical"},
+    "email": {"sdtype": "email"}
+}}
+
+
+def _frame(n=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "country": rng.choice(["ES", "FR", "DE"], n, p=[0.6, 0.3, 0.1]),
+        "segment": rng.choice(["basic", "premium"], n, p=[0.8, 0.2]),
+        "amount": rng.normal(100.0, 20.0, n)
+    })
+
+
+@pytest.fixture(scope="module")
+def data():
+    return _frame()
+
+
+@pytest.fixture(scope="module")
+def model(data):
+    synthesizer = FastCopulaSynthesizer()
+    synthesizer.fit(data)
+    return synthesizer
+
+
+def test_parse_conditions_accepts_json_and_pairs():
+    assert parse_conditions('{"country": "ES"}') == {"country": "ES"}
+    assert parse_conditions("country=ES; segment = premium") == {"country": "ES", "segment": "premium"}
+    with pytest.raises(ValueError):
+        parse_conditions("country")
+
+
+def test_validate_conditions_normalizes_and_rejects(data):
+    index = build_condition_index(data, METADATA)
+    roles = {"email": {"role": "pii", "treatment": "dropped"}}
+
+    assert validate_conditions({"country": "es"}, METADATA, roles, index) == {"country": "ES"}
+    assert validate_conditions({"amount": 100}, METADATA, roles, index) == {"amount": 100}
+    for conditions in ({"country": "IT"}, {"email": "a@b.com"}, {"missing": 1}, {}):
+        with pytest.raises(ValueError):
+            validate_conditions(conditions, METADATA, roles, index)
+
+
+def test_estimate_acceptance_uses_index(data):
+    index = build_condition_index(data, METADATA)
+    acceptance = estimate_acceptance({"country": "DE", "segment": "premium"}, index)
+    assert acceptance == pytest.approx(0.1 * 0.2, abs=0.01)
+    assert estimate_acceptance({"country": "ES", "amount": 100}, index) is None
+
+
+def test_choose_strategy_keeps_rejection_for_unindexed_conditions():
+    assert choose_strategy("FastCopula", None) == "native"
+    assert choose_strategy("FastCopula", 0.5) == "native"
+    assert choose_strategy("CTGAN", 0.5) == "submodel"
+    assert choose_strategy("CTGAN", 0.001) == "submodel"
+    assert choose_strategy("GaussianCopula", None) == "rejection"
+
+
+def test_native_sampler_returns_only_matching_rows(model):
+    sampler = ConditionalSampler(model, {"country": "DE", "segment": "premium"}, "native")
+    rows = sampler.sample(500)
+    assert len(rows) == 500
+    assert (rows["country"] == "DE").all() and (rows["segment"] == "premium").all()
+    assert sampler.summary()["model_calls"] == 1
+
+
+def test_rejection_sampler_fills_request_and_reports_acceptance(model):
+    model._set_random_state(3)
+    sampler = ConditionalSampler(model, {"country": "FR"}, "rejection", expected_acceptance=0.3)
+    rows = sampler.sample(1000)
+
+    assert len(rows) == 1000
+    assert (rows["country"] == "FR").all()
+    summary = sampler.summary()
+    assert summary["strategy"] == "rejection"
+    assert 0.15 < summary["observed_acceptance"] < 0.45
+
+
+def test_rejection_sampler_gives_up_on_impossible_conditions(model):
+    sampler = ConditionalSampler(model, {"country": "IT"}, "rejection", expected_acceptance=0.5)
+    with pytest.raises(ValueError):
+        sampler.sample(10)
+
+
+def test_submodel_sampler_uses_matching_rows(data):
+    submodel = fit_condition_submodel(data, None, {"country": "DE"})
+    sampler = ConditionalSampler(submodel, {"country": "DE"}, "submodel", expected_acceptance=0.1)
+    rows = sampler.sample(200)
+    assert (rows["country"] == "DE").all()
+    assert sampler.summary()["submodel"] == "FastCopula"
+    with pytest.raises(ValueError):
+        fit_condition_submodel(data, None, {"country": "IT"})
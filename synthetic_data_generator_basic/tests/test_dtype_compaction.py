@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dtype_compaction import apply_compaction, compact_dataframe, memory_mb, restore_dtypes
+
+
+def _frame(n=1000):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "age": rng.integers(18, 90, n),
+        "balance": rng.integers(-10 ** 12, 10 ** 12, n),
+        "score": rng.integers(0, 200, n) / 2.0,
+        "ratio": rng.random(n),
+        "segment": pd.Series(rng.choice(["basic", "premium", "gold"], n), dtype=object),
+        "active": pd.Series(rng.choice(["True", "False"], n), dtype=object),
+        "flag": rng.random(n) > 0.5,
+        "email": pd.Series([f"user{i}@example.com" for i in range(n)], dtype=object)
+    })
+
+
+def test_compaction_narrows_dtypes_and_saves_memory():
+    df = _frame()
+    compacted, schema = compact_dataframe(df)
+
+    assert compacted["age"].dtype == np.uint8
+    assert compacted["balance"].dtype == np.int64
+    assert compacted["score"].dtype == np.float32
+    assert compacted["ratio"].dtype == np.float64
+    assert isinstance(compacted["segment"].dtype, pd.CategoricalDtype)
+    assert compacted["active"].dtype == bool
+    assert schema["active"]["bool_tokens"] == {"true": "True", "false": "False"}
+    assert set(schema) == {"age", "score", "segment", "active"}
+    assert memory_mb(compacted) < memory_mb(df)
+    assert df["age"].dtype == np.int64   # La entrada no se modifica
+
+
+def test_restore_dtypes_round_trips_the_original_frame():
+    df = _frame()
+    compacted, schema = compact_dataframe(df)
+    restored = restore_dtypes(compacted.copy(), schema)
+
+    pd.testing.assert_frame_equal(restored, df)
+
+
+def test_restore_keeps_nulls_in_integer_columns():
+    df = _frame(50)
+    compacted, schema = compact_dataframe(df)
+    synthetic = compacted.assign(age=compacted["age"].astype("float32"))
+    synthetic.loc[0, "age"] = np.nan
+
+    restored = restore_dtypes(synthetic, schema)
+    assert restored["age"].dtype == np.float64
+    assert restored["age"].isna().sum() == 1
+
+
+def test_excluded_columns_are_left_alone():
+    df = _frame()
+    df["code"] = pd.Series(np.resize(["A", "B"], len(df)), dtype="category")
+    compacted, schema = compact_dataframe(df, exclude=["segment", "code"])
+
+    assert compacted["segment"].dtype == object
+    assert compacted["code"].dtype == object
+    assert "segment" not in schema
+
+
+def test_apply_compaction_reuses_schema_and_rejects_overflow():
+    df = _frame()
+    _, schema = compact_dataframe(df)
+
+    appended = apply_compaction(_frame(100), schema)
+    assert appended["age"].dtype == np.uint8
+    assert appended["active"].dtype == bool
+    with pytest.raises(ValueError):
+        apply_compaction(_frame(100).assign(age=1000), schema)
+    with pytest.raises(ValueError):
+        apply_compaction(_frame(100).assign(score=0.1), schema)
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fast_copula import FastCopulaSynthesizer
+
+
+def _frame(n, seed, segments=("basic", "premium"), shift=0.0):
+    rng = np.random.default_rng(seed)
+    age = rng.integers(18, 80, n)
+    return pd.DataFrame({
+        "age": age,
+        "income": age * 1000.0 + rng.normal(shift, 5000.0, n),
+        "segment": rng.choice(list(segments), n)
+    })
+
+
+def _fitted(data):
+    model = FastCopulaSynthesizer()
+    model.fit(data)
+    return model
+
+
+def test_partial_fit_matches_fit_on_all_rows():
+    # Filas añadidas con la misma distribución (el caso de las exportaciones diarias)
+    first, second = _frame(20_000, 0), _frame(20_000, 1)
+    incremental = _fitted(first)
+    incremental.partial_fit(second)
+    full = _fitted(pd.concat([first, second], ignore_index=True))
+
+    a, b = incremental.sample(40_000), full.sample(40_000)
+    assert a["income"].mean() == pytest.approx(b["income"].mean(), rel=0.02)
+    assert a["income"].std() == pytest.approx(b["income"].std(), rel=0.05)
+    assert a[["age", "income"]].corr().iloc[0, 1] == pytest.approx(b[["age", "income"]].corr().iloc[0, 1], abs=0.03)
+    assert incremental._rows_fitted == 40_000
+
+
+def test_partial_fit_moves_toward_new_rows():
+    base = _fitted(_frame(10_000, 0))
+    before = base.sample(20_000)["income"].mean()
+    base.partial_fit(_frame(10_000, 2, shift=40_000.0))
+    after = base.sample(20_000)["income"].mean()
+    assert after - before == pytest.approx(20_000.0, rel=0.15)
+
+
+def test_partial_fit_learns_new_categories():
+    model = _fitted(_frame(5_000, 0))
+    model.partial_fit(_frame(5_000, 3, segments=("vip",)))
+    shares = model.sample(20_000)["segment"].value_counts(normalize=True)
+    assert shares["vip"] == pytest.approx(0.5, abs=0.03)
+    assert set(shares.index) == {"basic", "premium", "vip"}
+
+
+def test_partial_fit_weights_a_subsample_by_represented_rows():
+    model = _fitted(_frame(10_000, 0))
+    # 1.000 filas que representan 90.000: el delta pesa el 90 %
+    model.partial_fit(_frame(1_000, 4, segments=("vip",)), represented_rows=90_000)
+    shares = model.sample(20_000)["segment"].value_counts(normalize=True)
+    assert shares["vip"] == pytest.approx(0.9, abs=0.03)
+    assert model._rows_fitted == 100_000
+
+
+def test_partial_fit_rejects_other_columns_and_unfitted_models():
+    model = _fitted(_frame(1_000, 0))
+    with pytest.raises(ValueError):
+        model.partial_fit(_frame(100, 1)[["income", "age", "segment"]])
+    with pytest.raises(ValueError):
+        FastCopulaSynthesizer().partial_fit(_frame(100, 1))
+
+
+def test_partial_fit_survives_save_and_load(tmp_path):
+    model = _fitted(_frame(2_000, 0))
+    path = tmp_path / "model.pkl"
+    model.save(str(path))
+    loaded = FastCopulaSynthesizer.load(str(path))
+    assert loaded.supports_partial_fit
+    loaded.partial_fit(_frame(2_000, 1))
+    assert loaded._rows_fitted == 4_000
+    assert len(loaded.sample(100)) == 100
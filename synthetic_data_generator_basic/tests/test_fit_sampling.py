@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fit_sampling import reservoir_sample_chunks, reservoir_sample_csv
+
+
+def _chunks(n, size):
+    for start in range(0, n, size):
+        yield pd.DataFrame({"row": np.arange(start, min(start + size, n))})
+
+
+def test_reservoir_keeps_k_distinct_rows_and_counts_all():
+    sample, seen = reservoir_sample_chunks(_chunks(100_000, 7_000), 1_000, seed=1)
+    assert seen == 100_000
+    assert len(sample) == 1_000 and sample["row"].is_unique
+    assert sample["row"].between(0, 99_999).all()
+
+
+def test_reservoir_smaller_file_returns_everything():
+    sample, seen = reservoir_sample_chunks(_chunks(300, 64), 1_000)
+    assert seen == 300
+    assert sorted(sample["row"]) == list(range(300))
+
+
+def test_reservoir_is_deterministic_for_a_seed():
+    first, _ = reservoir_sample_chunks(_chunks(20_000, 3_000), 200, seed=7)
+    again, _ = reservoir_sample_chunks(_chunks(20_000, 3_000), 200, seed=7)
+    other, _ = reservoir_sample_chunks(_chunks(20_000, 3_000), 200, seed=8)
+    assert first.equals(again)
+    assert not first.equals(other)
+
+
+def test_reservoir_is_uniform_over_positions():
+    # Cada fila debe entrar con probabilidad k/n, también las del primer y el último bloque
+    n, k, trials = 2_000, 100, 300
+    hits = np.zeros(n)
+    for seed in range(trials):
+        sample, _ = reservoir_sample_chunks(_chunks(n, 450), k, seed=seed)
+        hits[sample["row"].to_numpy()] += 1
+    by_decile = hits.reshape(10, -1).sum(axis=1) / trials
+    assert by_decile == pytest.approx(np.full(10, k / 10), rel=0.1)
+
+
+def test_reservoir_empty_input_raises():
+    with pytest.raises(pd.errors.EmptyDataError):
+        reservoir_sample_chunks(iter([]), 10)
+
+
+def test_reservoir_sample_csv_reads_in_chunks(tmp_path):
+    path = tmp_path / "data.csv"
+    pd.DataFrame({"row": np.arange(5_000), "city": np.resize(["Madrid", "Bilbao"], 5_000)}).to_csv(path, index=False)
+    sample, seen = reservoir_sample_csv(str(path), 250)
+    assert seen == 5_000
+    assert len(sample) == 250 and sample["row"].is_unique
+    assert list(sample.columns) == ["row", "city"]
@@ -0,0 +1,106 @@
+import pytest
+
+from llm_csv_parser import CsvLineAssembler, RowParser, parse_header_line, dayfirst_for, build_repair_prompt
+
+
+# ==========================================
+# ENSAMBLADO DE LÍNEAS DEL STREAM
+# ==========================================
+
+def _assemble(fragments):
+    assembler = CsvLineAssembler()
+    lines = []
+    for fragment in fragments:
+        lines.extend(assembler.feed(fragment))
+    return lines + assembler.flush()
+
+
+def test_assembler_joins_fragments_split_anywhere():
+    text = "1,Ana,Madrid\r\n2,Luis,Sevilla\n3,Eva,Bilbao"
+    for size in (1, 2, 5, 7, len(text)):
+        fragments = [text[i:i + size] for i in range(0, len(text), size)]
+        assert _assemble(fragments) == ["1,Ana,Madrid", "2,Luis,Sevilla", "3,Eva,Bilbao"]
+
+
+def test_assembler_keeps_newlines_inside_quotes():
+    lines = _assemble(['1,"calle ', 'Mayor\n3, 2º",Madrid\n', '2,"sin salto",Bilbao\n'])
+    assert lines == ['1,"calle Mayor\n3, 2º",Madrid', '2,"sin salto",Bilbao']
+
+
+def test_assembler_flush_ignores_blank_rest():
+    assembler = CsvLineAssembler()
+    assert assembler.feed("1,a\n  ") == ["1,a"]
+    assert assembler.flush() == []
+
+
+# ==========================================
+# CABECERA
+# ==========================================
+
+def test_parse_header_skips_prose_and_fences():
+    response = "Here is the structure:\n```csv\nid,name,city,signup_date\n```"
+    assert parse_header_line(response) == ["id", "name", "city", "signup_date"]
+    assert parse_header_line("id,ID") is None
+    assert parse_header_line("Sure! I can help with that.") is None
+
+
+# ==========================================
+# PARSEO Y VALIDACIÓN
+# ==========================================
+
+COLUMNS = ["id", "name", "postal_code", "signup_date", "active"]
+TYPES = {"id": "integer", "postal_code": "integer", "signup_date": "datetime", "active": "boolean"}
+
+
+def test_parse_line_classifies_rows_noise_and_rejections():
+    parser = RowParser(COLUMNS, TYPES)
+    assert parser.parse_line(' 1,"García, Ana", 08001 ,2024-01-01,true ') == \
+        (["1", "García, Ana", "08001", "2024-01-01", "true"], None)
+    assert parser.parse_line("") == (None, None)
+    assert parser.parse_line("```") == (None, None)
+    assert parser.parse_line("id,name,postal_code,signup_date,active") == (None, None)
+    assert parser.parse_line("Here are the rows:") == (None, None)
+    row, rejection = parser.parse_line("1,Ana,08001,2024-01-01,true,extra")
+    assert row is None and rejection[1] == "6 fields instead of 5"
+
+
+def test_validate_keeps_the_original_text():
+    parser = RowParser(COLUMNS, TYPES, dayfirst=True)
+    rows = [["007", "Ana", "08001", "13/02/2024", "sí"],
+            ["8", "Luis", "28013", "2024-03-01 10:30", "null"]]
+    accepted, rejected = parser.validate(rows, ["l1", "l2"])
+    assert rejected == []
+    assert accepted == [["007", "Ana", "08001", "13/02/2024", "sí"],
+                        ["8", "Luis", "28013", "2024-03-01 10:30", ""]]
+
+
+def test_validate_rejects_whole_rows_with_reasons():
+    parser = RowParser(COLUMNS, TYPES)
+    rows = [["1.5", "Ana", "08001", "2024-01-01", "true"],
+            ["2", "Luis", "abc", "31/31/2024", "maybe"],
+            ["3", "Eva", "41001", "2024-01-01", "no"]]
+    accepted, rejected = parser.validate(rows, ["l1", "l2", "l3"])
+    assert accepted == [["3", "Eva", "41001", "2024-01-01", "no"]]
+    assert rejected == [
+        ("l1", "id is not integer"),
+        ("l2", "postal_code is not integer; signup_date is not datetime; active is not boolean")
+    ]
+
+
+def test_validate_without_types_accepts_everything():
+    parser = RowParser(["a", "b"])
+    assert parser.validate([["x", "y"]], ["x,y"]) == ([["x", "y"]], [])
+    assert parser.validate([], []) == ([], [])
+
+
+@pytest.mark.parametrize("country, expected", [
+    ("Spain", True), ("  méxico ", True), ("United States", False), ("USA", False), (None, True)
+])
+def test_dayfirst_by_country(country, expected):
+    assert dayfirst_for(country) is expected
+
+
+def test_repair_prompt_lists_lines_reasons_and_types():
+    prompt = build_repair_prompt([("1,Ana", "2 fields instead of 5")], COLUMNS, TYPES)
+    assert "1,Ana    <- 2 fields instead of 5" in prompt
+    assert "id: integer" in prompt and "exactly 5 fields" in prompt
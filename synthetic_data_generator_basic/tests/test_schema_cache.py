@@ -0,0 +1,97 @@
+import pandas as pd
+import pytest
+
+import schema_cache
+from schema_cache import SchemaCache, infer_column_types, make_schema_key, normalize_tokens
+
+HEADERS = "id,name,age,city"
+COLUMNS = ["id", "name", "age", "city"]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(schema_cache.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    return SchemaCache(path=tmp_path / "schemas.json", ttl_hours=1, max_entries=3, min_similarity=0.8)
+
+
+def test_normalized_key_ignores_order_case_accents_and_plurals():
+    assert normalize_tokens("Clientes de una tienda ONLINE") == ["client", "online", "tienda"]
+    assert make_schema_key("clientes de tienda online", "España") == \
+        make_schema_key("Tienda online: clientes", "espana")
+    assert make_schema_key("clientes de tienda online", "Spain") != \
+        make_schema_key("clientes de tienda online", "France")
+
+
+def test_exact_and_near_matches(cache):
+    cache.put("clientes de una tienda online de ropa deportiva", "Spain", HEADERS, COLUMNS)
+
+    exact = cache.get("Tienda online de ropa deportiva: clientes", "spain")
+    assert exact["match"] == "exact"
+    assert exact["columns"] == COLUMNS
+
+    near = cache.get("clientes de tienda online de ropa deportiva barata", "Spain")
+    assert near["match"].startswith("similar")
+    assert near["headers"] == HEADERS
+
+    assert cache.get("clientes de tienda online de ropa deportiva barata", "France") is None
+    assert cache.get("pedidos de un restaurante", "Spain") is None
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["near_hits"], stats["misses"]) == (1, 1, 2)
+
+
+def test_entries_expire_after_ttl(cache, clock):
+    cache.put("clientes de tienda", "Spain", HEADERS, COLUMNS)
+    clock[0] += 1800
+    assert cache.get("clientes de tienda", "Spain") is not None
+
+    clock[0] += 1801
+    assert cache.get("clientes de tienda", "Spain") is None
+    assert cache.get_stats()["expired"] == 1
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted(cache, clock):
+    for description in ("clientes", "pedidos", "facturas"):
+        clock[0] += 1
+        cache.put(description, "Spain", HEADERS, COLUMNS)
+    clock[0] += 1
+    cache.get("clientes", "Spain")
+    clock[0] += 1
+    cache.put("envios", "Spain", HEADERS, COLUMNS)
+
+    assert cache.get_stats()["evictions"] == 1
+    assert cache.get("pedidos", "Spain") is None
+    assert cache.get("clientes", "Spain") is not None
+
+
+def test_entries_persist_with_column_types(cache, tmp_path):
+    key = cache.put("clientes de tienda", "Spain", HEADERS, COLUMNS)
+    cache.set_column_types(key, {"age": "integer"})
+
+    reloaded = SchemaCache(path=tmp_path / "schemas.json", ttl_hours=1)
+    assert reloaded.get("clientes de tienda", "Spain")["column_types"] == {"age": "integer"}
+
+
+def test_infer_column_types_keeps_leading_zero_codes_as_text():
+    df = pd.DataFrame({
+        "age": ["34", "51", "28", "45"],
+        "income": ["1200.5", "980", "2100.25", "1500"],
+        "postal_code": ["08001", "28013", "46001", "01001"],
+        "active": ["true", "false", "true", "true"],
+        "signup": ["2024-01-05", "2024-02-11", "2024-03-20", "2024-04-01"],
+        "segment": ["basic", "premium", "basic", "basic"]
+    })
+    types = infer_column_types(df)
+
+    assert types["age"] == "integer"
+    assert types["income"] == "float"
+    assert types["postal_code"] in ("categorical", "text")
+    assert types["active"] == "boolean"
+    assert types["signup"] == "datetime"
+    assert types["segment"] == "categorical"
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fast_copula import FastCopulaSynthesizer
+from sdv_sampling import resolve_row_range, sample_range_to_csv
+
+BLOCK = 1000
+
+
+@pytest.fixture(scope="module")
+def model():
+    rng = np.random.default_rng(0)
+    n = 2000
+    synthesizer = FastCopulaSynthesizer()
+    synthesizer.fit(pd.DataFrame({
+        "age": rng.integers(18, 80, n),
+        "income": rng.normal(30000.0, 8000.0, n),
+        "segment": rng.choice(["basic", "premium"], n)
+    }))
+    return synthesizer
+
+
+def _range(model, tmp_path, start, end, seed=42, name="part.csv"):
+    path = tmp_path / name
+    summary = sample_range_to_csv(model, start, end, str(path), base_seed=seed, block_rows=BLOCK)
+    return pd.read_csv(path), summary
+
+
+def test_range_is_a_slice_of_the_full_job(model, tmp_path):
+    full, _ = _range(model, tmp_path, 0, 3500, name="full.csv")
+    part, summary = _range(model, tmp_path, 1200, 2750)
+
+    assert len(full) == 3500
+    assert summary["rows_written"] == 1550
+    pd.testing.assert_frame_equal(part, full.iloc[1200:2750].reset_index(drop=True))
+
+
+def test_shards_concatenate_to_the_full_job(model, tmp_path):
+    full, _ = _range(model, tmp_path, 0, 3500, name="full.csv")
+    shards = [_range(model, tmp_path, *resolve_row_range(3500, i, 3), name=f"shard{i}.csv")[0]
+              for i in range(3)]
+
+    pd.testing.assert_frame_equal(pd.concat(shards, ignore_index=True), full)
+
+
+def test_range_depends_on_the_base_seed(model, tmp_path):
+    first, _ = _range(model, tmp_path, 0, 500, seed=1, name="a.csv")
+    again, _ = _range(model, tmp_path, 0, 500, seed=1, name="b.csv")
+    other, _ = _range(model, tmp_path, 0, 500, seed=2, name="c.csv")
+
+    pd.testing.assert_frame_equal(first, again)
+    assert not first.equals(other)
+
+
+def test_short_block_raises(model, tmp_path):
+    def drop_rows(batch):
+        return batch.iloc[:-1]
+
+    with pytest.raises(RuntimeError):
+        sample_range_to_csv(model, 0, 500, str(tmp_path / "short.csv"), base_seed=1,
+                            block_rows=BLOCK, transform=drop_rows)
+
+
+def test_resolve_row_range_validates_arguments():
+    assert resolve_row_range(100) is None
+    assert resolve_row_range(10, row_offset=5) == (5, 15)
+    assert resolve_row_range(10, 2, 3) == (7, 10)
+    for kwargs in ({"shard_index": 0}, {"shard_index": 3, "shard_count": 3},
+                   {"row_offset": -1}, {"row_offset": 0, "shard_index": 0, "shard_count": 2}):
+        with pytest.raises(ValueError):
+            resolve_row_range(10, **kwargs)
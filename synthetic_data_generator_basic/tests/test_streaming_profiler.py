@@ -0,0 +1,150 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from streaming_profiler import RunningStats, QuantileSketch, HyperLogLog, HeavyHitters, profile_chunks
+
+
+def _chunks(df, size):
+    return (df.iloc[i:i + size] for i in range(0, len(df), size))
+
+
+# ==========================================
+# WELFORD / CHAN
+# ==========================================
+
+def test_running_stats_match_numpy_across_chunks():
+    values = np.random.default_rng(0).normal(1e6, 3.0, 10_001)  # Media grande: prueba la estabilidad
+    stats = RunningStats()
+    for chunk in np.array_split(values, 7):
+        stats.update(chunk)
+    assert stats.count == len(values)
+    assert stats.mean == pytest.approx(values.mean(), rel=1e-12)
+    assert stats.std == pytest.approx(values.std(ddof=1), rel=1e-9)
+    assert (stats.min, stats.max) == (values.min(), values.max())
+
+
+def test_running_stats_merge_equals_single_pass():
+    rng = np.random.default_rng(1)
+    left, right = rng.exponential(2.0, 3000), rng.normal(-5.0, 1.0, 500)
+    merged, a, b = RunningStats(), RunningStats(), RunningStats()
+    a.update(left)
+    b.update(right)
+    merged.merge(a)
+    merged.merge(b)
+    merged.merge(RunningStats())  # Vacío: no cambia nada
+
+    both = np.concatenate([left, right])
+    assert merged.count == len(both)
+    assert merged.mean == pytest.approx(both.mean())
+    assert merged.std == pytest.approx(both.std(ddof=1))
+    assert (merged.min, merged.max) == (both.min(), both.max())
+
+
+def test_running_stats_std_needs_two_values():
+    stats = RunningStats()
+    stats.update(np.array([4.0]))
+    assert np.isnan(stats.std)
+
+
+# ==========================================
+# KLL
+# ==========================================
+
+def test_quantile_sketch_rank_error_is_small():
+    values = np.random.default_rng(2).lognormal(0, 1, 200_000)
+    sketch = QuantileSketch(k=512)
+    for chunk in np.array_split(values, 20):
+        sketch.update(chunk)
+
+    qs = [0.01, 0.25, 0.5, 0.75, 0.99]
+    sorted_values = np.sort(values)
+    for q, estimate in zip(qs, sketch.quantiles(qs)):
+        rank = np.searchsorted(sorted_values, estimate) / len(values)
+        assert abs(rank - q) < 0.02
+    # Memoria acotada: muchos menos elementos guardados que vistos
+    assert sum(len(level) for level in sketch.levels) < 20 * 512
+
+
+def test_quantile_sketch_merge_keeps_weights():
+    rng = np.random.default_rng(3)
+    low, high = QuantileSketch(k=256), QuantileSketch(k=256, seed=1)
+    low.update(rng.uniform(0, 1, 50_000))
+    high.update(rng.uniform(1, 2, 50_000))
+    low.merge(high)
+    assert low.n == 100_000
+    median, p90 = low.quantiles([0.5, 0.9])
+    assert median == pytest.approx(1.0, abs=0.03)
+    assert p90 == pytest.approx(1.8, abs=0.03)
+
+
+def test_quantile_sketch_empty():
+    assert all(np.isnan(QuantileSketch().quantiles([0.1, 0.9])))
+
+
+# ==========================================
+# HYPERLOGLOG
+# ==========================================
+
+def _hashes(values):
+    return pd.util.hash_pandas_object(pd.Series(values), index=False).to_numpy()
+
+
+@pytest.mark.parametrize("distinct", [10, 1_000, 100_000])
+def test_hyperloglog_estimate_within_expected_error(distinct):
+    hll = HyperLogLog(p=12)
+    hll.update_hashes(_hashes(np.arange(distinct).repeat(3)))
+    # Error típico 1.04/√4096 ≈ 1.6 %: margen de unas 4 desviaciones
+    assert abs(hll.estimate() - distinct) <= max(2, 0.065 * distinct)
+
+
+def test_hyperloglog_merge_is_union():
+    a, b = HyperLogLog(), HyperLogLog()
+    a.update_hashes(_hashes([f"a{i}" for i in range(20_000)]))
+    b.update_hashes(_hashes([f"a{i}" for i in range(10_000, 30_000)]))
+    a.merge(b)
+    assert abs(a.estimate() - 30_000) <= 0.065 * 30_000
+
+
+# ==========================================
+# MISRA-GRIES
+# ==========================================
+
+def test_heavy_hitters_find_frequent_values_with_lower_bounds():
+    rng = np.random.default_rng(4)
+    values = pd.Series(np.concatenate([
+        np.repeat(["ES", "FR", "DE"], [30_000, 20_000, 10_000]),
+        rng.integers(0, 50_000, 40_000).astype(str)
+    ]))
+    values = values.sample(frac=1.0, random_state=0)
+    hitters = HeavyHitters(capacity=16)
+    for chunk in _chunks(values.to_frame("v"), 7_000):
+        hitters.update_counts(chunk["v"].value_counts())
+
+    top = hitters.top(3)
+    assert list(top) == ["ES", "FR", "DE"]
+    true_counts = values.value_counts()
+    for value, count in hitters.counters.items():
+        assert count <= true_counts[value]  # Nunca sobreestima
+    # Misra-Gries: infraestima como mucho n / (capacidad + 1)
+    assert true_counts["ES"] - top["ES"] <= len(values) / 17
+
+
+def test_heavy_hitters_merge_and_capacity():
+    a, b = HeavyHitters(capacity=2), HeavyHitters(capacity=2)
+    a.update_counts(pd.Series({"x": 10, "y": 5}))
+    b.update_counts(pd.Series({"x": 3, "z": 4, "w": 1}))
+    a.merge(b)
+    assert len(a.counters) <= 2
+    assert a.top(1) == {"x": a.counters["x"]}
+    assert a.counters["x"] <= 13
+
+
+def test_profile_chunks_matches_pandas():
+    rng = np.random.default_rng(5)
+    df = pd.DataFrame({"age": rng.integers(18, 90, 5_000), "city": rng.choice(["Madrid", "Sevilla"], 5_000)})
+    profile = profile_chunks(_chunks(df, 700))
+    assert profile["rows"] == 5_000 and profile["chunks_processed"] == 8
+    assert profile["basic_stats"]["age"]["mean"] == pytest.approx(df["age"].mean())
+    assert profile["distinct_counts"]["city"] == 2
+    assert set(profile["top_values"]["city"]) == {"Madrid", "Sevilla"}
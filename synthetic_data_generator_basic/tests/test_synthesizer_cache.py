@@ -0,0 +1,77 @@
+import gc
+import pickle
+
+import pytest
+
+from synthesizer_cache import SynthesizerCache, fingerprint_metadata, make_cache_key
+
+
+class _Model:
+    """Synthesizer mínimo: save/load con pickle y un tamaño serializado controlado"""
+
+    def __init__(self, name, size=1000):
+        self.name = name
+        self.payload = b"x" * size
+
+    def save(self, filepath):
+        with open(filepath, "wb") as f:
+            pickle.dump(self, f)
+
+    @classmethod
+    def load(cls, filepath):
+        with open(filepath, "rb") as f:
+            return pickle.load(f)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SynthesizerCache(cache_dir=tmp_path, max_memory_bytes=2500, max_disk_bytes=10 ** 9)
+
+
+def test_make_cache_key_is_stable_and_sensitive():
+    metadata = fingerprint_metadata({"columns": {"a": {"sdtype": "numerical"}, "b": {"sdtype": "categorical"}}})
+    assert metadata == fingerprint_metadata({"columns": {"b": {"sdtype": "categorical"}, "a": {"sdtype": "numerical"}}})
+
+    key = make_cache_key("hash", "CTGAN", metadata, {"epochs": 10, "batch_size": 500})
+    assert key == make_cache_key("hash", "CTGAN", metadata, {"batch_size": 500, "epochs": 10})
+    assert make_cache_key("hash", "CTGAN", metadata) == make_cache_key("hash", "CTGAN", metadata, {})
+    for other in (make_cache_key("other", "CTGAN", metadata, {"epochs": 10, "batch_size": 500}),
+                  make_cache_key("hash", "TVAE", metadata, {"epochs": 10, "batch_size": 500}),
+                  make_cache_key("hash", "CTGAN", metadata, {"epochs": 20, "batch_size": 500})):
+        assert other != key
+
+
+def test_lru_evicts_least_recently_used_from_memory(cache):
+    for name in ("a", "b"):
+        cache.put(name, _Model(name))
+    assert cache.get("a", _Model.load).name == "a"   # "b" pasa a ser el menos usado
+    cache.put("c", _Model("c"))
+
+    stats = cache.get_stats()
+    assert stats["evictions"] == 1
+    assert stats["entries_in_memory"] == 2
+    assert stats["hits"] == 1
+
+    # El expulsado se recupera de disco sin reentrenar
+    reloaded = cache.get("b", _Model.load)
+    assert reloaded.name == "b"
+    assert cache.get_stats()["disk_hits"] == 1
+    assert cache.get("missing", _Model.load) is None
+    assert cache.get_stats()["misses"] == 1
+
+
+def test_shared_synthesizer_is_the_same_object(cache):
+    model = _Model("a")
+    cache.put("a", model)
+    assert cache.get("a", _Model.load) is model
+
+
+def test_sampling_locks_are_shared_and_released(cache):
+    lock = cache.sampling_lock("a")
+    assert cache.sampling_lock("a") is lock
+    with lock:
+        assert cache.sampling_lock("a") is lock
+
+    del lock
+    gc.collect()
+    assert len(cache._sampling_locks) == 0
@@ -0,0 +1,341 @@
+"""
+Tool Metrics - Tiempos y memoria por fase de cada llamada a una herramienta
+Cada function_tool se envuelve con @instrument_tool: las fases salen de los avisos de
+progreso que ya emiten las herramientas (loading_data, fitting, sampling...) o de
+bloques explícitos con measure_phase (p.ej. la llamada al LLM). Al terminar, el resumen
+va a ``context.tool_metrics`` (acotado, aparte del processing_history de acciones), al
+sumidero de métricas (JSON Lines) y al stream como evento "tool_metrics"
+"""
+
+import os
+import json
+import time
+import inspect
+import logging
+import threading
+import functools
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Optional, List
+
+from sdv_sampling import get_peak_rss_mb, RssPeak
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# CONFIGURACIÓN DE LAS MÉTRICAS
+# ==========================================
+BASE_DIR = Path(__file__).parent
+METRICS_FILE = os.getenv("TOOL_METRICS_FILE", str(BASE_DIR / "metrics" / "tool_metrics.jsonl"))  # "" = sin archivo
+# tracemalloc (1 frame) es opcional: encarece cada asignación de todo el proceso
+TRACE_MEMORY = os.getenv("TOOL_METRICS_TRACE_MEMORY", "0") == "1"
+RECENT_METRICS = 500             # Resúmenes que se guardan en memoria para agregar
+SESSION_METRICS = 50             # Resúmenes por sesión en context.tool_metrics
+
+# Fase de métricas de cada aviso de progreso (los que no aparecen se usan tal cual)
+PHASE_ALIASES = {
+    "reading": "read",
+    "loading_data": "read",
+    "detecting_metadata": "metadata",
+    "detecting_column_roles": "metadata",
+    "profiling": "metadata",
+    "compacting_dtypes": "prepare",
+    "conditioning": "prepare",
+    "incremental_refit": "fit",
+    "fitting": "fit",
+    "calibrating": "fit",
+    "preview": "fit",
+    "generating": "llm_call",
+    "sampling": "sample",
+    "writing": "write",
+}
+# Avisos que no abren fase (solo informan)
+NON_PHASES = ("completed", "calibrated", "preview_ready", "metrics")
+
+
+_traced_lock = threading.Lock()
+_traced_phases = 0               # Fases abiertas que miden el pico de tracemalloc
+
+
+def _mb(num_bytes: Optional[float]) -> Optional[float]:
+    return round(num_bytes / 1024 / 1024, 2) if num_bytes is not None else None
+
+
+class _Phase:
+    """
+    Fase abierta: reloj de pared, CPU del hilo que la mide y memoria.
+
+    El pico de RSS de la fase es el máximo del RSS actual al abrirla, en cada aviso de
+    progreso que recibe (p.ej. uno por lote) y al cerrarla. Con TOOL_METRICS_TRACE_MEMORY=1
+    se mide además el pico de tracemalloc; como es global al proceso, solo se reinicia si no
+    hay otra fase midiéndolo: con llamadas concurrentes el pico de una fase incluye lo
+    asignado por las demás.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.thread_id = threading.get_ident()
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.thread_time()
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.rss = RssPeak()
+        self.traced_start = None
+        if tracemalloc.is_tracing():
+            global _traced_phases
+            with _traced_lock:
+                if _traced_phases == 0:
+                    tracemalloc.reset_peak()  # Sin otra fase abierta no se pierde el pico de nadie
+                _traced_phases += 1
+                self.traced_start = tracemalloc.get_traced_memory()[0]
+
+    def close(self) -> Dict[str, Any]:
+        same_thread = threading.get_ident() == self.thread_id
+        peak = None
+        if self.traced_start is not None:
+            global _traced_phases
+            with _traced_lock:
+                _traced_phases -= 1
+                if tracemalloc.is_tracing():
+                    peak = max(tracemalloc.get_traced_memory()[1] - self.traced_start, 0)
+        return {
+            "phase": self.name,
+            "wall_seconds": round(time.perf_counter() - self.wall_start, 4),
+            # CPU del hilo: solo válida si la fase empieza y acaba en el mismo hilo
+            "cpu_seconds": round(time.thread_time() - self.cpu_start, 4) if same_thread else None,
+            "peak_traced_mb": _mb(peak),
+            "peak_rss_mb": self.rss.sample(),
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out
+        }
+
+
+class ToolMetrics:
+    """
+    Fases de una llamada a herramienta.
+
+    ``observe(fase, datos)`` recibe los avisos de progreso: al cambiar de fase cierra la
+    anterior y abre la nueva; las claves ``bytes_in``/``bytes_out`` de los datos se suman
+    a la fase abierta. El tiempo entre el inicio de la llamada y el primer aviso queda
+    como fase "queued" (p.ej. espera en el executor) o "total" si no hubo avisos.
+    """
+
+    def __init__(self, tool: str, session_id: Optional[str] = None):
+        self.tool = tool
+        self.session_id = session_id
+        self.started_at = time.time()
+        self.success: Optional[bool] = None
+        self.wall_start = time.perf_counter()
+        self.phases: List[Dict[str, Any]] = []
+        self._current: Optional[_Phase] = _Phase("queued")
+        self._lock = threading.Lock()
+        self._extra_write_seconds = 0.0
+
+    def observe(self, phase: str, data: Optional[Dict[str, Any]] = None) -> None:
+        data = data or {}
+        with self._lock:
+            if phase not in NON_PHASES:
+                name = PHASE_ALIASES.get(phase, phase)
+                if self._current is None or self._current.name != name:
+                    self._close_current()
+                    self._current = _Phase(name)
+            if "write_seconds" in data:
+                self._extra_write_seconds += float(data["write_seconds"] or 0)
+            target = self._current
+            if target is not None:
+                target.rss.sample()
+                target.bytes_in += int(data.get("bytes_in", 0) or 0)
+                target.bytes_out += int(data.get("bytes_out", 0) or 0)
+            elif self.phases:
+                self.phases[-1]["bytes_in"] += int(data.get("bytes_in", 0) or 0)
+                self.phases[-1]["bytes_out"] += int(data.get("bytes_out", 0) or 0)
+            if phase in NON_PHASES:
+                self._close_current()
+
+    def _close_current(self) -> None:
+        if self._current is not None:
+            closed = self._current.close()
+            if closed["phase"] == "queued" and not self.phases and closed["wall_seconds"] < 0.001:
+                closed = None  # Sin espera apreciable: no se registra
+            if closed is not None:
+                self.phases.append(closed)
+            self._current = None
+
+    def _split_write(self) -> None:
+        """El muestreo escribe cada lote al generarlo: separar su tiempo de escritura en la fase write"""
+        if not self._extra_write_seconds:
+            return
+        for phase in self.phases:
+            if phase["phase"] == "sample":
+                write = min(self._extra_write_seconds, phase["wall_seconds"])
+                phase["wall_seconds"] = round(phase["wall_seconds"] - write, 4)
+                self.phases.append({
+                    "phase": "write",
+                    "wall_seconds": round(write, 4),
+                    "cpu_seconds": None,
+                    "peak_traced_mb": None,
+                    "peak_rss_mb": phase["peak_rss_mb"],
+                    "bytes_in": 0,
+                    "bytes_out": phase["bytes_out"]
+                })
+                phase["bytes_out"] = 0
+                break
+
+    def finish(self) -> Dict[str, Any]:
+        with self._lock:
+            if self._current is not None and self._current.name == "queued" and not self.phases:
+                self._current.name = "total"
+            self._close_current()
+            self._split_write()
+
+        cpu_values = [p["cpu_seconds"] for p in self.phases if p["cpu_seconds"] is not None]
+        peaks = [p["peak_traced_mb"] for p in self.phases if p["peak_traced_mb"] is not None]
+        rss_peaks = [p["peak_rss_mb"] for p in self.phases if p["peak_rss_mb"] is not None]
+        return {
+            "tool": self.tool,
+            "session_id": self.session_id,
+            "started_at": self.started_at,
+            "success": self.success,
+            "wall_seconds": round(time.perf_counter() - self.wall_start, 4),
+            "cpu_seconds": round(sum(cpu_values), 4) if cpu_values else None,
+            "peak_traced_mb": max(peaks) if peaks else None,
+            "peak_rss_mb": max(rss_peaks) if rss_peaks else None,
+            "process_peak_rss_mb": get_peak_rss_mb(),
+            "bytes_in": sum(p["bytes_in"] for p in self.phases),
+            "bytes_out": sum(p["bytes_out"] for p in self.phases),
+            "phases": self.phases
+        }
+
+
+# ==========================================
+# SUMIDERO DE MÉTRICAS
+# ==========================================
+
+class MetricsSink:
+    """Resúmenes recientes en memoria y, si hay ruta, una línea JSON por llamada en disco"""
+
+    def __init__(self, path: Optional[str] = METRICS_FILE, max_recent: int = RECENT_METRICS):
+        self.path = Path(path) if path else None
+        self.recent: deque = deque(maxlen=max_recent)
+        self._lock = threading.Lock()
+
+    def emit(self, summary: Dict[str, Any]) -> None:
+        with self._lock:
+            self.recent.append(summary)
+            if self.path is None:
+                return
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(summary, default=str) + "\n")
+            except OSError as e:
+                logger.debug(f"No se pudieron escribir las métricas: {e}")
+
+    def aggregate(self) -> Dict[str, Dict[str, Any]]:
+        """Llamadas, tiempo total y medio por herramienta y fase sobre los resúmenes recientes"""
+        totals: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            recent = list(self.recent)
+        for summary in recent:
+            tool = totals.setdefault(summary["tool"], {"calls": 0, "wall_seconds": 0.0, "phases": {}})
+            tool["calls"] += 1
+            tool["wall_seconds"] += summary["wall_seconds"]
+            for phase in summary["phases"]:
+                entry = tool["phases"].setdefault(phase["phase"], {"count": 0, "wall_seconds": 0.0})
+                entry["count"] += 1
+                entry["wall_seconds"] += phase["wall_seconds"]
+        for tool in totals.values():
+            tool["mean_wall_seconds"] = round(tool["wall_seconds"] / tool["calls"], 4)
+            tool["wall_seconds"] = round(tool["wall_seconds"], 4)
+            for entry in tool["phases"].values():
+                entry["wall_seconds"] = round(entry["wall_seconds"], 4)
+        return totals
+
+
+METRICS_SINK = MetricsSink()
+
+
+# ==========================================
+# INSTRUMENTACIÓN DE HERRAMIENTAS
+# ==========================================
+
+@contextmanager
+def track_tool_call(context, tool: str, register: bool = True):
+    """
+    Medir una llamada y publicar el resumen al salir.
+
+    Con ``register`` el ToolMetrics queda en ``context.active_metrics`` para que
+    report_progress le pase los avisos de ``tool`` y el resumen se emite al stream; sin él
+    (p.ej. trabajos en segundo plano) quien llama le pasa el progreso con
+    ``metrics.observe()`` y el resumen solo va a ``context.tool_metrics`` y al sumidero.
+    """
+    if TRACE_MEMORY and not tracemalloc.is_tracing():
+        tracemalloc.start(1)
+
+    metrics = ToolMetrics(tool, getattr(context, "session_id", None))
+    active = getattr(context, "active_metrics", None) if register else None
+    if active is not None:
+        active[tool] = metrics
+    try:
+        yield metrics
+    finally:
+        if active is not None and active.get(tool) is metrics:
+            del active[tool]
+        summary = metrics.finish()
+        METRICS_SINK.emit(summary)
+        history = getattr(context, "tool_metrics", None)
+        if history is not None:
+            history.append(summary)
+        if register and hasattr(context, "report_progress"):
+            context.report_progress(tool, "metrics", **{k: v for k, v in summary.items() if k != "tool"})
+
+
+@contextmanager
+def measure_phase(context, tool: str, phase: str):
+    """
+    Fase explícita dentro de una herramienta (p.ej. "llm_call"). Devuelve un dict donde
+    sumar ``bytes_in``/``bytes_out``; se cierra al salir del bloque.
+    """
+    metrics = (getattr(context, "active_metrics", None) or {}).get(tool)
+    counters = {"bytes_in": 0, "bytes_out": 0}
+    if metrics is None:
+        yield counters
+        return
+    metrics.observe(phase)
+    try:
+        yield counters
+    finally:
+        metrics.observe(phase, counters)
+        with metrics._lock:
+            metrics._close_current()
+
+
+def _success(result: Any) -> Optional[bool]:
+    return result.get("success") if isinstance(result, dict) else None
+
+
+def instrument_tool(func):
+    """
+    Decorador para funciones de herramienta (se pone debajo de @function_tool).
+    Conserva firma, anotaciones y docstring para que el SDK genere el mismo esquema.
+    """
+    tool = func.__name__
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(wrapper, *args, **kwargs):
+            with track_tool_call(wrapper.context, tool) as metrics:
+                result = await func(wrapper, *args, **kwargs)
+                metrics.success = _success(result)
+                return result
+        return async_wrapper
+
+    @functools.wraps(func)
+    def sync_wrapper(wrapper, *args, **kwargs):
+        with track_tool_call(wrapper.context, tool) as metrics:
+            result = func(wrapper, *args, **kwargs)
+            metrics.success = _success(result)
+            return result
+    return sync_wrapper
@@ -0,0 +1,209 @@
+"""
+Training Budget - Épocas, lote e hilos de torch según la máquina, con parada temprana
+Resuelve las pistas de configuración (auto_fast, auto_optimal, auto_large, auto_conservative)
+en valores concretos para CTGAN/TVAE/CopulaGAN y corta el entrenamiento cuando la pérdida
+se estanca o se agota el presupuesto de tiempo
+"""
+
+import os
+import math
+import time
+import logging
+import threading
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# CONFIGURACIÓN DEL PRESUPUESTO
+# ==========================================
+NEURAL_MODELS = ("CTGAN", "TVAE", "CopulaGAN")
+# Modelos cuya pérdida baja al converger. En CTGAN/CopulaGAN las pérdidas del generador y
+# del discriminador oscilan y no se minimizan juntas: su estancamiento no indica nada
+LOSS_PLATEAU_MODELS = ("TVAE",)
+
+LARGE_RAM_GB = 16                # Por encima: lotes grandes y épocas completas (como config/settings.py)
+EPOCH_PRESETS = {"auto_optimal": 300, "auto_fast": 100}
+BATCH_PRESETS = {"auto_large": 2000, "auto_conservative": 500}
+ROW_PASSES_BUDGET = int(os.getenv("TRAINING_ROW_PASSES_BUDGET", "10000000"))  # épocas x filas
+MIN_EPOCHS = 10
+PAC = 10                         # CTGAN/CopulaGAN exigen lotes múltiplos de pac
+
+EARLY_STOPPING_PATIENCE = 10     # Épocas sin mejora antes de parar
+EARLY_STOPPING_MIN_DELTA = 0.01  # Mejora relativa mínima de la pérdida suavizada
+EARLY_STOPPING_WARMUP = 20       # Épocas antes de empezar a vigilar la pérdida
+LOSS_SMOOTHING = 0.3             # Peso de la última época en la media exponencial
+
+# Hilos de torch fijados en este proceso (ajuste global, se fija una sola vez)
+_TORCH_THREADS_LOCK = threading.Lock()
+_torch_threads_applied: Optional[int] = None
+
+
+def detect_resources() -> Dict[str, Any]:
+    """Núcleos utilizables por el proceso y RAM total (None si no se puede medir)"""
+    try:
+        cpu_count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpu_count = os.cpu_count() or 1
+
+    ram_gb = None
+    try:
+        import psutil
+        ram_gb = psutil.virtual_memory().total / (1024 ** 3)
+    except ImportError:
+        try:
+            ram_gb = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / (1024 ** 3)
+        except (AttributeError, ValueError, OSError):
+            pass
+
+    return {"cpu_count": cpu_count, "ram_gb": round(ram_gb, 1) if ram_gb else None}
+
+
+def training_hints(resources: Dict[str, Any]) -> Dict[str, str]:
+    """Pistas de épocas y lote según la RAM (mismo criterio que _select_optimal_sdv)"""
+    if (resources.get("ram_gb") or 8) > LARGE_RAM_GB:
+        return {"batch_size": "auto_large", "epochs": "auto_optimal"}
+    return {"batch_size": "auto_conservative", "epochs": "auto_fast"}
+
+
+def resolve_training_plan(model_type: str,
+                          fit_rows: int,
+                          epochs: Optional[int] = None,
+                          batch_size: Optional[int] = None,
+                          resources: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Convertir las pistas en épocas, tamaño de lote e hilos de torch concretos.
+
+    Las épocas de la pista se recortan para no superar ROW_PASSES_BUDGET filas procesadas:
+    con muchas filas cada época ya aporta muchos pasos de gradiente. ``epochs`` y
+    ``batch_size`` explícitos tienen prioridad. Los modelos no neuronales devuelven un plan vacío.
+    """
+    if model_type not in NEURAL_MODELS:
+        return {}
+
+    resources = resources or detect_resources()
+    hints = training_hints(resources)
+
+    if epochs is None:
+        budget_epochs = math.ceil(ROW_PASSES_BUDGET / max(fit_rows, 1))
+        epochs = max(MIN_EPOCHS, min(EPOCH_PRESETS[hints["epochs"]], budget_epochs))
+
+    if batch_size is None:
+        batch_size = BATCH_PRESETS[hints["batch_size"]]
+        # Sin lotes mayores que los datos: al menos un par de pasos por época
+        batch_size = min(batch_size, max(fit_rows // 2, PAC))
+    batch_size = max(PAC, batch_size - batch_size % PAC)
+
+    # Un núcleo libre para el event loop y el muestreo de otras sesiones
+    cpu_count = resources["cpu_count"]
+    torch_threads = int(os.getenv("TORCH_NUM_THREADS", "0")) or max(1, cpu_count - 1 if cpu_count > 2 else cpu_count)
+
+    return {
+        "epochs": int(epochs),
+        "batch_size": int(batch_size),
+        "torch_threads": torch_threads,
+        "hints": hints,
+        "resources": resources
+    }
+
+
+def apply_torch_threads(num_threads: int) -> Optional[int]:
+    """
+    Fijar los hilos intra-op de torch una sola vez por proceso. Es un ajuste global:
+    cambiarlo en cada entrenamiento alteraría los de las demás sesiones en curso, así que
+    las llamadas posteriores no lo tocan. Devuelve los hilos efectivos (None sin torch).
+    """
+    global _torch_threads_applied
+    try:
+        import torch
+    except ImportError:
+        return None
+    with _TORCH_THREADS_LOCK:
+        if _torch_threads_applied is None:
+            if torch.get_num_threads() != num_threads:
+                torch.set_num_threads(num_threads)
+                logger.info(f"🧵 torch usará {num_threads} hilos")
+            _torch_threads_applied = num_threads
+        elif num_threads != _torch_threads_applied:
+            logger.debug(f"torch ya está fijado a {_torch_threads_applied} hilos en este proceso, se ignora {num_threads}")
+        return torch.get_num_threads()
+
+
+class TrainingBudget:
+    """
+    Decide época a época si el entrenamiento continúa.
+
+    Para cuando se supera ``max_seconds`` de entrenamiento y, en los modelos de
+    LOSS_PLATEAU_MODELS, cuando la pérdida suavizada (media exponencial) no mejora al menos
+    ``min_delta`` relativo durante ``patience`` épocas. Se usa desde el callback de
+    ``epoch_hook``: ``should_continue()`` devuelve False para detener ``fit()`` con los
+    pesos actuales.
+    """
+
+    def __init__(self,
+                 model_type: str,
+                 early_stopping: bool = True,
+                 max_seconds: Optional[float] = None,
+                 patience: int = EARLY_STOPPING_PATIENCE,
+                 min_delta: float = EARLY_STOPPING_MIN_DELTA,
+                 warmup: int = EARLY_STOPPING_WARMUP):
+        self.model_type = model_type
+        self.early_stopping = early_stopping and model_type in LOSS_PLATEAU_MODELS
+        self.max_seconds = max_seconds
+        self.patience = patience
+        self.min_delta = min_delta
+        self.warmup = warmup
+
+        self.started_at = time.perf_counter()
+        self.epochs_run = 0
+        self.stopped_reason: Optional[str] = None
+        self._smoothed: Optional[float] = None
+        self._best: Optional[float] = None
+        self._epochs_without_improvement = 0
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    def _observe_loss(self, losses: Dict[str, float]) -> None:
+        if not self.early_stopping or not losses:
+            return
+        value = sum(losses.values())
+        if self._smoothed is None:
+            self._smoothed = value
+        else:
+            self._smoothed = LOSS_SMOOTHING * value + (1 - LOSS_SMOOTHING) * self._smoothed
+
+        if self._best is None or self._smoothed < self._best * (1 - self.min_delta):
+            self._best = self._smoothed
+            self._epochs_without_improvement = 0
+        else:
+            self._epochs_without_improvement += 1
+
+    def should_continue(self, epochs_done: int, total_epochs: int, losses: Dict[str, float]) -> bool:
+        """Registrar una época terminada y decidir si se entrena otra"""
+        self.epochs_run = epochs_done
+        self._observe_loss(losses)
+
+        if epochs_done >= total_epochs:
+            return True
+        if self.max_seconds is not None and self.elapsed() >= self.max_seconds:
+            self.stopped_reason = "time_budget"
+        elif (self.early_stopping and epochs_done >= self.warmup
+              and self._epochs_without_improvement >= self.patience):
+            self.stopped_reason = "loss_plateau"
+
+        if self.stopped_reason:
+            logger.info(f"⏹️ Parada temprana ({self.stopped_reason}) tras {epochs_done} épocas y {self.elapsed():.1f}s")
+            return False
+        return True
+
+    def summary(self, planned_epochs: int) -> Dict[str, Any]:
+        """Épocas ejecutadas y motivo de la parada para el resultado de la herramienta"""
+        return {
+            "epochs_planned": planned_epochs,
+            "epochs_run": self.epochs_run,
+            "stopped_reason": self.stopped_reason or "completed",
+            "loss_plateau_stopping": self.early_stopping,
+            "training_seconds": round(self.elapsed(), 2),
+            "final_smoothed_loss": round(self._smoothed, 4) if self._smoothed is not None else None
+        }
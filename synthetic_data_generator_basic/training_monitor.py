@@ -0,0 +1,115 @@
+"""
+Training Monitor - Ganchos por época para los modelos neuronales de SDV (CTGAN, TVAE, CopulaGAN)
+Permite reportar progreso durante el entrenamiento sin modificar SDV ni ctgan
+"""
+
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Optional, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+# Callback por época: (épocas_completadas, épocas_totales) -> True para continuar
+EpochCallback = Callable[[int, int], bool]
+
+_local = threading.local()
+_patch_lock = threading.Lock()
+_patched = False
+
+
+class _HookedEpochs:
+    """
+    Envuelve el iterador de épocas (tqdm) del bucle de entrenamiento de ctgan.
+
+    Antes de entregar cada época llama al callback con las épocas ya completadas;
+    si el callback devuelve False se deja de iterar y ``fit()`` termina normalmente
+    con los pesos entrenados hasta ese momento.
+    """
+
+    def __init__(self, bar, total: int, callback: EpochCallback):
+        self._bar = bar
+        self._total = total
+        self._callback = callback
+
+    def __iter__(self):
+        completed = 0
+        for epoch in self._bar:
+            if completed and not self._callback(completed, self._total):
+                logger.info(f"⏹️ Entrenamiento detenido tras {completed}/{self._total} épocas")
+                self._bar.close()
+                return
+            yield epoch
+            completed += 1
+        self._callback(completed, self._total)
+
+    def __getattr__(self, name):
+        # set_description(), close(), etc. se delegan a la barra original
+        return getattr(self._bar, name)
+
+
+def _install_patch() -> None:
+    """Sustituir ``tqdm`` en los módulos de ctgan por una versión que respeta el gancho del hilo"""
+    global _patched
+    with _patch_lock:
+        if _patched:
+            return
+
+        from ctgan.synthesizers import ctgan as ctgan_module
+        from ctgan.synthesizers import tvae as tvae_module
+
+        original_tqdm = ctgan_module.tqdm
+
+        def hooked_tqdm(iterable=None, *args, **kwargs):
+            bar = original_tqdm(iterable, *args, **kwargs)
+            callback = getattr(_local, "epoch_callback", None)
+            if callback is None or iterable is None:
+                return bar
+            return _HookedEpochs(bar, len(iterable), callback)
+
+        ctgan_module.tqdm = hooked_tqdm
+        tvae_module.tqdm = hooked_tqdm
+        _patched = True
+
+
+@contextmanager
+def epoch_hook(callback: Optional[EpochCallback]):
+    """
+    Activar un callback por época para los entrenamientos lanzados desde este hilo.
+
+    Uso:
+        with epoch_hook(lambda done, total: True):
+            synthesizer.fit(df)
+    """
+    if callback is None:
+        yield
+        return
+
+    try:
+        _install_patch()
+    except ImportError:
+        # Sin ctgan instalado no hay modelos neuronales que monitorizar
+        yield
+        return
+
+    previous = getattr(_local, "epoch_callback", None)
+    _local.epoch_callback = callback
+    try:
+        yield
+    finally:
+        _local.epoch_callback = previous
+
+
+def latest_losses(synthesizer) -> Dict[str, Any]:
+    """Últimas pérdidas registradas por el modelo neuronal interno (vacío si no hay)"""
+    model = getattr(synthesizer, "_model", None)
+    loss_values = getattr(model, "loss_values", None)
+    if loss_values is None or len(loss_values) == 0:
+        return {}
+
+    last = loss_values.iloc[-1].to_dict()
+    return {
+        key: round(float(value), 4)
+        for key, value in last.items()
+        if key not in ("Epoch", "Batch")
+    }